@@ -2,6 +2,7 @@ from pydantic_settings import BaseSettings
 from pydantic import field_validator, Field
 
 from pathlib import Path
+from typing import Optional
 import urllib.parse
 
 
@@ -15,6 +16,29 @@ class Settings(BaseSettings):
     PDF_UPLOAD_PATH: Path  # Use Path type instead of str
     PDF_SOURCE_PATH: Path  # Use Path type instead of str
     MODE: str
+    MAX_CONCURRENT_UPLOADS: int = 4  # PDF uploads written to disk at the same time
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes per read/write when streaming uploads
+    PDF_MAX_UPLOAD_MB: int = 100  # Larger uploads are rejected with 413 while streaming (0 = no limit)
+    PDF_UPLOAD_SESSION_HOURS: int = 24  # Resumable uploads idle this long are removed
+    PDF_DEDUP_ENABLED: bool = True  # Store identical PDFs once (content-addressed under PDF_UPLOAD_PATH/blobs)
+    PDF_STORAGE_BACKEND: str = "local"  # "local" (PDF_UPLOAD_PATH on disk) or "s3" (S3-compatible bucket, needs boto3)
+    PDF_S3_BUCKET: str = ""
+    PDF_S3_PREFIX: str = ""  # Key prefix inside the bucket; keys mirror the paths below PDF_UPLOAD_PATH
+    PDF_S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://minio:9000; AWS when empty
+    PDF_S3_REGION: Optional[str] = None
+    PDF_STORAGE_LAYOUT: str = "sharded"  # "sharded": <year>/<MM>/<ab>/<cd>/file.pdf, "flat": <year>/file.pdf (old layout)
+    PDF_DELIVERY_MODE: str = "app"  # "app" (uvicorn streams), "x-accel" (nginx) or "x-sendfile" (Apache/lighttpd)
+    PDF_ACCEL_PREFIX: str = "/protected-pdfs/"  # nginx internal location aliased to PDF_UPLOAD_PATH
+    PDF_PATH_CACHE_SIZE: int = 10000  # pdf_id -> file path entries kept per worker (0 disables the cache)
+    PDF_PATH_CACHE_TTL: int = 300  # Seconds, bounds staleness across uvicorn workers after a delete
+    PDF_THUMB_WIDTH: int = 240  # Pixel width of first-page thumbnails (needs PyMuPDF installed)
+    PDF_THUMB_WORKERS: int = 2  # Processes rendering thumbnails
+    PDF_OPTIMIZE_ENABLED: bool = False  # Recompress + linearize uploads in the background (needs pikepdf installed)
+    PDF_OPTIMIZE_WORKERS: int = 1  # Processes running the optimization stage
+    PDF_THUMB_CACHE_MB: int = 256  # Size limit of PDF_UPLOAD_PATH/.thumbs, least recently used entries go first
+    PDF_TEXT_WORKERS: int = 1  # Processes extracting PDF text for search (needs PyMuPDF installed)
+    PDF_TEXT_MAX_CHARS: int = 200000  # Text stored per PDF, the rest is not searchable
+    PDF_TEXT_FULLTEXT: bool = False  # Search with CONTAINS() on the SQL Server full-text index of PDFText, LIKE otherwise
     jwt_secret: str
     node_env: str = Field("development", env="NODE_ENV")  # Ensure development mode
     NODE_ENV: str = "development"  # add default
@@ -36,6 +60,27 @@ class Settings(BaseSettings):
             raise ValueError(f"Path {value} is not a directory")
         return value.resolve()  # Resolve to absolute path
 
+    @field_validator("PDF_STORAGE_BACKEND")
+    def validate_storage_backend(cls, value: str) -> str:
+        value = value.strip().lower()
+        if value not in ("local", "s3"):
+            raise ValueError("PDF_STORAGE_BACKEND must be 'local' or 's3'")
+        return value
+
+    @field_validator("PDF_STORAGE_LAYOUT")
+    def validate_storage_layout(cls, value: str) -> str:
+        value = value.strip().lower()
+        if value not in ("sharded", "flat"):
+            raise ValueError("PDF_STORAGE_LAYOUT must be 'sharded' or 'flat'")
+        return value
+
+    @field_validator("PDF_DELIVERY_MODE")
+    def validate_delivery_mode(cls, value: str) -> str:
+        value = value.strip().lower()
+        if value not in ("app", "x-accel", "x-sendfile"):
+            raise ValueError("PDF_DELIVERY_MODE must be 'app', 'x-accel' or 'x-sendfile'")
+        return value
+
     @property
     def sqlalchemy_database_url(self) -> str:
         params = urllib.parse.quote_plus(
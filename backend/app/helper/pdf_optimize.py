@@ -0,0 +1,42 @@
+from typing import Tuple
+import os
+
+try:
+    import pikepdf  # optional: pip install pikepdf
+except ImportError:  # pragma: no cover - depends on the deployment
+    pikepdf = None
+
+
+def optimization_available() -> bool:
+    return pikepdf is not None
+
+
+def optimize_pdf(source_path: str, dest_path: str) -> Tuple[int, int]:
+    """
+    Write a recompressed, linearized ("fast web view") copy of source_path to dest_path.
+
+    The copy is reopened and must have the same page count before this returns,
+    so the caller can swap it in for the original. Runs in a worker process.
+
+    Returns:
+        Tuple[int, int]: Original size and optimized size in bytes.
+    """
+    if pikepdf is None:
+        raise RuntimeError("pikepdf is not installed")
+
+    with pikepdf.open(source_path) as pdf:
+        page_count = len(pdf.pages)
+        pdf.remove_unreferenced_resources()
+        pdf.save(
+            dest_path,
+            linearize=True,
+            compress_streams=True,
+            recompress_flate=True,
+            object_stream_mode=pikepdf.ObjectStreamMode.generate
+        )
+
+    with pikepdf.open(dest_path) as check:
+        if len(check.pages) != page_count:
+            raise ValueError(f"Optimized copy has {len(check.pages)} pages, original has {page_count}")
+
+    return os.path.getsize(source_path), os.path.getsize(dest_path)
@@ -0,0 +1,167 @@
+import hashlib
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from app.database.config import settings
+from app.helper.pdf_storage import PDFStorage, get_pdf_storage
+
+#  Blob bytes never change (optimization stores a new blob). A plain file may be swapped once
+#  for its optimized copy: same document, new size and mtime, so its ETag and If-Range change
+#  and a cached copy is still a correct rendering of the PDF
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+class PDFFileResponse(FileResponse):
+    #  1 MiB reads instead of Starlette's 64 KiB: far fewer thread hand-offs for large scans
+    chunk_size = 1024 * 1024
+
+
+def build_pdf_response(request: Request, path: str, stat_result: os.stat_result, blob_hash: Optional[str] = None) -> Response:
+    """
+    Serve a stored PDF with validators and long-lived cache headers.
+
+    Returns 304 when If-None-Match / If-Modified-Since show the client copy is current.
+    Range, If-Range and 206 Partial Content are handled by FileResponse, so PDF viewers
+    can fetch pages incrementally.
+
+    With PDF_DELIVERY_MODE "x-accel" / "x-sendfile" the body is left to the front proxy
+    (see deploy/nginx-pdf-offload.conf); the worker is free as soon as headers are sent.
+    Other storage backends (S3) are streamed through the app with the same single-range support.
+
+    Args:
+        request (Request): Incoming request (conditional headers).
+        path (str): File to serve.
+        stat_result (os.stat_result): Result of PDFStorage.stat(path), taken off the event loop.
+        blob_hash (Optional[str]): SHA-256 of content-addressed files, basis of a strong ETag.
+    """
+    #  A blob's hash names its bytes (a strong ETag); the size suffix only keeps ETags issued earlier valid
+    etag = f'"{blob_hash}-{stat_result.st_size:x}"' if blob_hash else _stat_etag(stat_result)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if _is_not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    storage = get_pdf_storage()
+    if not storage.is_local:
+        return _storage_response(request, storage, path, stat_result, headers)
+
+    offload_headers = _offload_headers(path)
+    if offload_headers:
+        return Response(media_type="application/pdf", headers={**headers, **offload_headers})
+
+    return PDFFileResponse(path, media_type="application/pdf", stat_result=stat_result, headers=headers)
+
+
+def _storage_response(request: Request, storage: PDFStorage, path: str, stat_result: os.stat_result, headers: dict) -> Response:
+    """200 or 206 streamed from a non-local backend (one range per request, like most PDF viewers ask for)."""
+    size = stat_result.st_size
+    byte_range = None
+    if _if_range_matches(request, headers["ETag"], stat_result.st_mtime):
+        byte_range = _parse_range(request.headers.get("range"), size)
+
+    if byte_range == "unsatisfiable":
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    chunk_size = PDFFileResponse.chunk_size
+    if byte_range is None:
+        return StreamingResponse(
+            storage.iter_range(path, 0, None, chunk_size),
+            media_type="application/pdf",
+            headers={**headers, "Content-Length": str(size)}
+        )
+
+    start, end = byte_range
+    return StreamingResponse(
+        storage.iter_range(path, start, end, chunk_size),
+        status_code=206,
+        media_type="application/pdf",
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)}
+    )
+
+
+def _parse_range(range_header: Optional[str], size: int):
+    """(start, end) for a single "bytes=" range, "unsatisfiable", or None to send the whole file."""
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None  #  Absent, another unit, or multipart ranges: a full 200 is always allowed
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            #  Suffix range: the last N bytes
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, end
+
+
+def _if_range_matches(request: Request, etag: str, mtime: float) -> bool:
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    return if_range == etag or if_range == formatdate(mtime, usegmt=True)
+
+
+def build_thumbnail_response(request: Request, png: bytes, cache_key: str, page_count: int) -> Response:
+    """PNG preview with the same caching rules as the PDF itself; X-Page-Count carries the page count."""
+    headers = {
+        "ETag": f'"{cache_key}"',
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "X-Page-Count": str(page_count),
+    }
+    if _is_not_modified(request, headers["ETag"], None):
+        return Response(status_code=304, headers=headers)
+    return Response(content=png, media_type="image/png", headers=headers)
+
+
+def _offload_headers(path: str) -> Optional[dict]:
+    """Proxy redirect header for path, or None when the app should stream it itself."""
+    if settings.PDF_DELIVERY_MODE == "app":
+        return None
+
+    resolved = Path(path).resolve()
+    try:
+        relative = resolved.relative_to(settings.PDF_UPLOAD_PATH)
+    except ValueError:
+        #  Legacy rows can point outside the upload folder, the proxy has no location for them
+        return None
+
+    if settings.PDF_DELIVERY_MODE == "x-accel":
+        return {"X-Accel-Redirect": settings.PDF_ACCEL_PREFIX.rstrip("/") + "/" + quote(relative.as_posix())}
+    return {"X-Sendfile": str(resolved)}
+
+
+def _stat_etag(stat_result: os.stat_result) -> str:
+    #  Same recipe as Starlette's FileResponse, so If-Range keeps matching
+    etag_base = f"{stat_result.st_mtime}-{stat_result.st_size}"
+    return f'"{hashlib.md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def _is_not_modified(request: Request, etag: str, mtime: Optional[float]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        #  If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2), weak comparison
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and mtime is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    return False
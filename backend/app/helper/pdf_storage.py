@@ -0,0 +1,271 @@
+import asyncio
+import os
+import shutil
+import uuid
+from contextlib import asynccontextmanager
+from datetime import timezone
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, BinaryIO, Iterator, Optional, Tuple
+
+from app.database.config import settings
+from app.helper.save_pdf import STAGING_DIR_NAME, alternate_pdf_path, finalize_staged_pdf, locate_pdf, place_blob
+
+try:
+    import boto3  # optional: pip install boto3 (PDF_STORAGE_BACKEND=s3)
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover - depends on the deployment
+    boto3 = None
+
+
+class PDFStorage:
+    """
+    Where stored PDFs live. Every method is blocking (run it in a thread).
+
+    PDFs are addressed by their stored path (PDFTable.pdf / PDFBlob.path, always under
+    PDF_UPLOAD_PATH), so switching backends needs no row changes: the S3 backend maps a
+    path to the object key relative to PDF_UPLOAD_PATH. Staging stays on local disk.
+    """
+
+    is_local = True
+
+    def put_file(self, local_path: Path, path: str, overwrite: bool = False) -> str:
+        """Store a local (staged) file at path and remove the local copy. FileExistsError unless overwrite."""
+        raise NotImplementedError
+
+    def put_stream(self, source: BinaryIO, path: str) -> str:
+        """Store the contents of a readable file object at path."""
+        raise NotImplementedError
+
+    def stat(self, path: str) -> Tuple[str, os.stat_result]:
+        """(path actually holding the PDF, its stat); falls back to the other layout. FileNotFoundError if absent."""
+        raise NotImplementedError
+
+    def iter_range(self, path: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """Bytes start..end (inclusive, None = to the end) of the PDF at path, chunk by chunk."""
+        raise NotImplementedError
+
+    def delete(self, path: str) -> bool:
+        """Remove the PDF at path (or its other-layout location); False when it was already gone."""
+        raise NotImplementedError
+
+    def list_prefix(self, prefix: str) -> Iterator[Tuple[str, int, float]]:
+        """(path, size, mtime) of every stored file below the folder prefix."""
+        raise NotImplementedError
+
+    def fetch_local(self, path: str) -> Tuple[str, bool]:
+        """A local file with the PDF's bytes for tools that need one (PyMuPDF), and whether it is a temp copy."""
+        raise NotImplementedError
+
+
+class LocalPDFStorage(PDFStorage):
+    """PDF_UPLOAD_PATH on the app server's disk (or a share mounted there)."""
+
+    is_local = True
+
+    def put_file(self, local_path: Path, path: str, overwrite: bool = False) -> str:
+        if overwrite:
+            #  Content-addressed blobs: same name means same bytes
+            return place_blob(Path(local_path), Path(path))
+        return finalize_staged_pdf(Path(local_path), Path(path))
+
+    def put_stream(self, source: BinaryIO, path: str) -> str:
+        with open(path, "wb") as buffer:
+            shutil.copyfileobj(source, buffer)
+        return path
+
+    def stat(self, path: str) -> Tuple[str, os.stat_result]:
+        return locate_pdf(path)
+
+    def iter_range(self, path: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, path: str) -> bool:
+        try:
+            os.remove(locate_pdf(path)[0])  # The layout migration may have moved it
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list_prefix(self, prefix: str) -> Iterator[Tuple[str, int, float]]:
+        for directory, _, names in os.walk(prefix):
+            for name in names:
+                full_path = os.path.join(directory, name)
+                try:
+                    stat_result = os.stat(full_path)
+                except FileNotFoundError:
+                    continue  # Removed while listing
+                yield full_path, stat_result.st_size, stat_result.st_mtime
+
+    def fetch_local(self, path: str) -> Tuple[str, bool]:
+        return locate_pdf(path)[0], False
+
+
+class S3PDFStorage(PDFStorage):
+    """
+    S3-compatible object storage (AWS S3, MinIO, Ceph). Credentials come from the usual
+    AWS environment / config files; PDF_S3_ENDPOINT_URL points at MinIO and friends.
+    """
+
+    is_local = False
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None, region: Optional[str] = None):
+        if boto3 is None:
+            raise RuntimeError("PDF_STORAGE_BACKEND=s3 needs boto3 (pip install boto3)")
+        if not bucket:
+            raise RuntimeError("PDF_STORAGE_BACKEND=s3 needs PDF_S3_BUCKET")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        #  Path-style addressing for custom endpoints: MinIO buckets are not DNS names
+        config = BotoConfig(s3={"addressing_style": "path"}) if endpoint_url else None
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region, config=config)
+
+    def key(self, path: str) -> str:
+        """Object key of a stored path: <prefix>/<path relative to PDF_UPLOAD_PATH> (PDF_UPLOAD_PATH itself is the prefix)."""
+        try:
+            relative = Path(path).relative_to(settings.PDF_UPLOAD_PATH).as_posix()
+        except ValueError:
+            #  Legacy rows outside the upload folder were never copied to the bucket
+            raise FileNotFoundError(f"PDF outside PDF_UPLOAD_PATH: {path}") from None
+        relative = "" if relative == "." else relative
+        return "/".join(part for part in (self.prefix, relative) if part)
+
+    def path(self, key: str) -> str:
+        relative = key[len(self.prefix) + 1:] if self.prefix else key
+        return str(Path(settings.PDF_UPLOAD_PATH) / PurePosixPath(relative))
+
+    def put_file(self, local_path: Path, path: str, overwrite: bool = False) -> str:
+        key = self.key(path)
+        if not overwrite and self._head(key) is not None:
+            raise FileExistsError(f"PDF already exists at {path}")
+        self.client.upload_file(str(local_path), self.bucket, key, ExtraArgs={"ContentType": "application/pdf"})
+        Path(local_path).unlink(missing_ok=True)
+        return path
+
+    def put_stream(self, source: BinaryIO, path: str) -> str:
+        self.client.upload_fileobj(source, self.bucket, self.key(path), ExtraArgs={"ContentType": "application/pdf"})
+        return path
+
+    def stat(self, path: str) -> Tuple[str, os.stat_result]:
+        head = self._head(self.key(path))
+        if head is None:
+            alternate = alternate_pdf_path(path)
+            if alternate is not None:
+                head = self._head(self.key(str(alternate)))
+                path = str(alternate)
+        if head is None:
+            raise FileNotFoundError(f"PDF not found: {path}")
+        mtime = head["LastModified"].replace(tzinfo=head["LastModified"].tzinfo or timezone.utc).timestamp()
+        #  Only size and times matter to callers (ETag, Last-Modified, Content-Length, thumbnail cache key)
+        seconds = int(mtime)
+        return path, os.stat_result(
+            (0o100644, 0, 0, 1, 0, 0, head["ContentLength"], seconds, seconds, seconds),
+            {"st_atime": mtime, "st_mtime": mtime, "st_ctime": mtime, "st_mtime_ns": int(mtime * 1e9)}
+        )
+
+    def iter_range(self, path: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.key(path), Range=byte_range)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                raise FileNotFoundError(f"PDF not found: {path}") from None
+            raise
+        body = response["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def delete(self, path: str) -> bool:
+        try:
+            located, _ = self.stat(path)
+        except FileNotFoundError:
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(located))
+        return True
+
+    def list_prefix(self, prefix: str) -> Iterator[Tuple[str, int, float]]:
+        key_prefix = self.key(prefix).rstrip("/")
+        key_prefix = f"{key_prefix}/" if key_prefix else ""
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=key_prefix):
+            for item in page.get("Contents", []):
+                yield self.path(item["Key"]), item["Size"], item["LastModified"].timestamp()
+
+    def fetch_local(self, path: str) -> Tuple[str, bool]:
+        located, _ = self.stat(path)
+        staging_dir = Path(settings.PDF_UPLOAD_PATH) / STAGING_DIR_NAME
+        staging_dir.mkdir(parents=True, exist_ok=True)
+        local_path = staging_dir / f"{uuid.uuid4().hex}.fetch.tmp"
+        try:
+            self.client.download_file(self.bucket, self.key(located), str(local_path))
+        except BaseException:
+            local_path.unlink(missing_ok=True)
+            raise
+        return str(local_path), True
+
+    def _head(self, key: str) -> Optional[dict]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+
+_storage: Optional[PDFStorage] = None
+
+
+def get_pdf_storage() -> PDFStorage:
+    """The configured backend (PDF_STORAGE_BACKEND), created once per process."""
+    global _storage
+    if _storage is None:
+        if settings.PDF_STORAGE_BACKEND == "s3":
+            _storage = S3PDFStorage(
+                settings.PDF_S3_BUCKET,
+                settings.PDF_S3_PREFIX,
+                settings.PDF_S3_ENDPOINT_URL,
+                settings.PDF_S3_REGION
+            )
+        else:
+            _storage = LocalPDFStorage()
+    return _storage
+
+
+def open_stored_pdf(path: str, chunk_size: int) -> Tuple[float, Iterator[bytes]]:
+    """(mtime, chunks) of a stored PDF for streamed archives (blocking); FileNotFoundError if absent."""
+    storage = get_pdf_storage()
+    located, stat_result = storage.stat(path)
+    return stat_result.st_mtime, storage.iter_range(located, 0, None, chunk_size)
+
+
+@asynccontextmanager
+async def local_pdf_copy(path: str) -> AsyncIterator[str]:
+    """Local file path for a stored PDF while the block runs; temp copies (S3) are removed afterwards."""
+    local_path, temporary = await asyncio.to_thread(get_pdf_storage().fetch_local, path)
+    try:
+        yield local_path
+    finally:
+        if temporary:
+            await asyncio.to_thread(Path(local_path).unlink, True)
+
+
+def remove_written_file(path: str) -> None:
+    """
+    Undo a file written before a failed transaction (blocking): staged copies
+    sit on local disk, files already stored under their final name go through the backend.
+    """
+    if Path(path).parent == Path(settings.PDF_UPLOAD_PATH) / STAGING_DIR_NAME:
+        os.remove(path)
+    else:
+        get_pdf_storage().delete(path)
@@ -0,0 +1,68 @@
+import html
+import re
+from typing import Iterable, Tuple
+
+try:
+    import pymupdf  # PyMuPDF, optional: pip install PyMuPDF
+except ImportError:  # pragma: no cover - depends on the deployment
+    pymupdf = None
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def text_extraction_available() -> bool:
+    return pymupdf is not None
+
+
+def extract_text(pdf_path: str, max_chars: int) -> Tuple[str, int]:
+    """
+    Read the text layer of a PDF, page by page, with whitespace collapsed.
+
+    Stops once max_chars are collected. Scanned PDFs without a text layer
+    give "" (no OCR here). Runs in a worker process.
+
+    Returns:
+        Tuple[str, int]: Text and the document's page count.
+    """
+    if pymupdf is None:
+        raise RuntimeError("PyMuPDF is not installed")
+
+    parts = []
+    length = 0
+    with pymupdf.open(pdf_path) as document:
+        for page in document:
+            text = _WHITESPACE.sub(" ", page.get_text("text")).strip()
+            if not text:
+                continue
+            parts.append(text)
+            length += len(text) + 1
+            if length >= max_chars:
+                break
+        return " ".join(parts)[:max_chars], document.page_count
+
+
+def make_snippet(text: str, terms: Iterable[str], width: int = 160) -> str:
+    """
+    Cut a window of about `width` characters around the first matching term.
+
+    Returns HTML: the text is escaped and every match is wrapped in <mark>.
+    """
+    alternatives = [re.escape(term) for term in terms if term]
+    match = None
+    if alternatives:
+        pattern = re.compile("|".join(alternatives), re.IGNORECASE)
+        match = pattern.search(text)
+    if match is None:
+        return html.escape(text[:width])
+
+    start = max(0, match.start() - width // 2)
+    end = min(len(text), start + width)
+    window = text[start:end]
+    pieces = []
+    position = 0
+    for found in pattern.finditer(window):
+        pieces.append(html.escape(window[position:found.start()]))
+        pieces.append(f"<mark>{html.escape(found.group(0))}</mark>")
+        position = found.end()
+    pieces.append(html.escape(window[position:]))
+    return f"{'…' if start > 0 else ''}{''.join(pieces)}{'…' if end < len(text) else ''}"
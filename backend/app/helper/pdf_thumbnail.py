@@ -0,0 +1,32 @@
+from typing import Tuple
+
+try:
+    import pymupdf  # PyMuPDF, optional: pip install PyMuPDF
+except ImportError:  # pragma: no cover - depends on the deployment
+    pymupdf = None
+
+
+def thumbnails_available() -> bool:
+    return pymupdf is not None
+
+
+def render_first_page(pdf_path: str, width: int) -> Tuple[bytes, int]:
+    """
+    Render page 1 of a PDF as a PNG scaled to the given width.
+
+    Runs in a worker process (CPU bound, and PyMuPDF holds the GIL while rendering).
+
+    Returns:
+        Tuple[bytes, int]: PNG bytes and the document's page count.
+    """
+    if pymupdf is None:
+        raise RuntimeError("PyMuPDF is not installed")
+
+    with pymupdf.open(pdf_path) as document:
+        if document.page_count == 0:
+            raise ValueError("PDF has no pages")
+
+        page = document.load_page(0)
+        zoom = width / page.rect.width
+        pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+        return pixmap.tobytes("png"), document.page_count
@@ -1,68 +1,378 @@
 import os  # For path operations like join, exists
-import shutil  # For copying file-like objects efficiently
 from datetime import datetime  # For getting current timestamp
-from typing import BinaryIO  # Type hint for file-like object
+from typing import AsyncIterator, BinaryIO, Optional, Tuple  # Type hint for file-like object
 from pathlib import Path
 import asyncio
+import hashlib  # For content hashes while copying
+import logging
+import re
+import uuid  # For unique staging file names
+from fastapi import HTTPException, UploadFile
+from app.database.config import settings
 
-def save_pdf_to_server(source_file: BinaryIO,committeeNo: str,committeeDate: str,count: int,dest_dir: str) -> str:
+logger = logging.getLogger(__name__)
+
+def build_pdf_destination(committeeNo: str, committeeDate: str, count: int, dest_dir: str, unique: Optional[str] = None) -> Path:
     """
-    Save uploaded PDF file into a dynamic directory structure (base_dir/year),
-    ensuring unique filenames and preventing overwrites.
+    Build the destination path for a committee PDF (base_dir/year/MM/ab/cd/filename,
+    or base_dir/year/filename with PDF_STORAGE_LAYOUT=flat), creating folders when needed.
 
     Args:
-        source_file (BinaryIO): The uploaded file (from request).
         committeeNo (str): Committee number (part of filename).
         committeeDate (str): Committee date in format 'YYYY-MM-DD'.
         count (int): Current count of PDFs (used to increment filename).
         dest_dir (str): Base upload directory (from settings).
+        unique (Optional[str]): Extra name part (uuid) for writers that may race on the same
+            committeeNo, count and second (bulk requests).
 
     Returns:
-        str: Final saved file path.
+        Path: Destination path that does not exist yet.
     """
 
     #  Extract year from committeeDate (must be YYYY-MM-DD)
     year = datetime.strptime(committeeDate, "%Y-%m-%d").year
     directoyYear = datetime.now().year
 
-
-    print("year",directoyYear)
-
-    #  Create year subdirectory dynamically
+    #  Year subdirectory
     year_dir = Path(dest_dir) / str(directoyYear)
-    year_dir.mkdir(parents=True, exist_ok=True)
 
     #  Generate timestamp for unique filenames
     now = datetime.now()
     timestamp = now.strftime("%Y-%m-%d_%I-%M-%S-%p")
 
-    #  Construct filename: committeeNo.year.count+1-timestamp.pdf
-    filename = f"{committeeNo}.{year}.{count + 1}-{timestamp}.pdf"
+    #  Construct filename: committeeNo.year.count+1[-unique]-timestamp.pdf (timestamp last, see sharded_pdf_path)
+    suffix = f"-{unique}" if unique else ""
+    filename = f"{committeeNo}.{year}.{count + 1}{suffix}-{timestamp}.pdf"
 
-    #  Final destination path
-    dest_path = year_dir / filename
-    print(f"Saving PDF to: {dest_path}")
+    #  Final destination path (year/month/hash shards keep every folder small)
+    if settings.PDF_STORAGE_LAYOUT == "sharded":
+        dest_path = sharded_pdf_path(year_dir, filename)
+    else:
+        dest_path = year_dir / filename
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
 
-    #  Check if file already exists
-    if dest_path.exists():
+    #  Check if file already exists (in either layout while a migration is running)
+    alternate = alternate_pdf_path(str(dest_path))
+    if dest_path.exists() or (alternate is not None and alternate.exists()):
         raise FileExistsError(f"PDF already exists at {dest_path}")
 
-    #  Write uploaded file to destination
-    with open(dest_path, "wb") as buffer:
-        shutil.copyfileobj(source_file, buffer)
+    return dest_path
+
+
+_NAME_TIMESTAMP = re.compile(r"-\d{4}-(?P<month>\d{2})-\d{2}_\d{2}-\d{2}-\d{2}-[AP]M\.pdf$")
+
+
+def sharded_pdf_path(year_dir: Path, filename: str) -> Path:
+    """
+    Sharded location of a PDF: <year>/<MM>/<ab>/<cd>/<filename>.
+
+    MM is the upload month from the timestamp in the name ("00" for names without one),
+    ab/cd are the first bytes of the SHA-1 of the name. Both parts derive from the
+    name alone, so the flat and sharded locations can always be computed from each other.
+    """
+    match = _NAME_TIMESTAMP.search(filename)
+    month = match.group("month") if match else "00"
+    digest = hashlib.sha1(filename.encode("utf-8")).hexdigest()
+    return year_dir / month / digest[:2] / digest[2:4] / filename
+
+
+def alternate_pdf_path(path: str) -> Optional[Path]:
+    """
+    The same PDF in the other layout (flat <-> sharded), for rows not yet
+    rewritten by migrate_storage_layout.py; None for paths in neither layout (e.g. blobs).
+    """
+    stored = Path(path)
+    parents = stored.parents
+    if len(parents) > 4 and _is_shard_dir(stored.parent) and _is_year_dir(parents[3]):
+        return parents[3] / stored.name
+    if len(parents) > 1 and _is_year_dir(stored.parent):
+        return sharded_pdf_path(stored.parent, stored.name)
+    return None
+
+
+def locate_pdf(path: str) -> Tuple[str, os.stat_result]:
+    """
+    Stat a stored PDF, falling back to its other-layout location (blocking, run in a thread).
+
+    Raises:
+        FileNotFoundError: In neither location.
+    """
+    try:
+        return path, os.stat(path)
+    except FileNotFoundError:
+        alternate = alternate_pdf_path(path)
+        if alternate is None:
+            raise
+        try:
+            return str(alternate), os.stat(alternate)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"PDF not found: {path}") from None
+
+
+def _is_year_dir(directory: Path) -> bool:
+    return len(directory.name) == 4 and directory.name.isdigit()
+
+
+def _is_shard_dir(directory: Path) -> bool:
+    month, first, second = directory.parent.parent.name, directory.parent.name, directory.name
+    return (
+        len(month) == 2 and month.isdigit()
+        and len(first) == 2 and len(second) == 2
+        and all(c in "0123456789abcdef" for c in first + second)
+    )
+
+
+def save_pdf_to_server(source_file: BinaryIO,committeeNo: str,committeeDate: str,count: int,dest_dir: str,unique: Optional[str] = None) -> str:
+    """
+    Save uploaded PDF file into a dynamic directory structure (base_dir/year),
+    ensuring unique filenames and preventing overwrites.
+
+    Args:
+        source_file (BinaryIO): The uploaded file (from request).
+        committeeNo (str): Committee number (part of filename).
+        committeeDate (str): Committee date in format 'YYYY-MM-DD'.
+        count (int): Current count of PDFs (used to increment filename).
+        dest_dir (str): Base upload directory (from settings).
+        unique (Optional[str]): Extra name part, see build_pdf_destination.
+
+    Returns:
+        str: Final saved file path.
+    """
+
+    from app.helper.pdf_storage import get_pdf_storage  # pdf_storage builds on this module
+
+    dest_path = build_pdf_destination(committeeNo, committeeDate, count, dest_dir, unique)
+    logger.debug(f"Saving PDF to: {dest_path}")
+
+    #  Write uploaded file to destination (local disk or the S3 bucket, PDF_STORAGE_BACKEND)
+    get_pdf_storage().put_stream(source_file, str(dest_path))
 
     #  Return saved file path as string
     return str(dest_path)
 
 
-async def async_delayed_delete(file_path: str, delay_sec: int = 3):
-    await asyncio.sleep(delay_sec)
+def copy_pdf_with_hash(source_path: str, dest_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Copy a PDF in chunks and compute its SHA-256 in the same pass.
+
+    Returns:
+        str: Hex SHA-256 digest of the copied bytes.
+    """
+    digest = hashlib.sha256()
+    with open(source_path, "rb") as source, open(dest_path, "xb") as buffer:
+        while chunk := source.read(chunk_size):
+            digest.update(chunk)
+            buffer.write(chunk)
+    return digest.hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    SHA-256 of a file, read in chunks (blocking, run in a thread).
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        while chunk := source.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+STAGING_DIR_NAME = ".staging"
+
+
+_upload_slots = asyncio.Semaphore(settings.MAX_CONCURRENT_UPLOADS)
+
+PDF_MAGIC = b"%PDF-"
+PDF_HEADER_WINDOW = 1024  # Readers accept the header anywhere in the first 1 KB (some scanners prepend junk)
+
+
+async def write_upload_to_path(upload: UploadFile, dest_path: Path) -> Tuple[int, str]:
+    """
+    Stream an upload to dest_path without blocking the event loop.
+
+    Chunks are hashed and written to a temp file next to dest_path from a worker
+    thread, fsynced, then renamed into place, so a partial PDF is never visible.
+    At most MAX_CONCURRENT_UPLOADS uploads are written at the same time.
+
+    The upload is validated in the same pass: the first chunk must carry the
+    %PDF- header and the running size must stay within PDF_MAX_UPLOAD_MB;
+    otherwise writing stops and the temp file is removed.
+
+    Returns:
+        Tuple[int, str]: Bytes written and their SHA-256 hex digest.
+
+    Raises:
+        HTTPException: 400 empty upload, 413 too large, 415 not a PDF.
+    """
+    max_bytes = settings.PDF_MAX_UPLOAD_MB * 1024 * 1024
+    #  Multipart uploads know their size up front, reject those without touching the disk
+    if max_bytes and upload.size is not None and upload.size > max_bytes:
+        raise _upload_too_large()
+
+    tmp_path = dest_path.with_name(f".{dest_path.name}.{uuid.uuid4().hex}.tmp")
+    digest = hashlib.sha256()
+
+    async with _upload_slots:
+        buffer = await asyncio.to_thread(open, tmp_path, "xb")
+        written = 0
+        try:
+            while chunk := await upload.read(settings.UPLOAD_CHUNK_SIZE):
+                if written == 0 and not is_pdf_header(chunk):
+                    raise HTTPException(status_code=415, detail="Only PDF files are allowed")
+                written += len(chunk)
+                if max_bytes and written > max_bytes:
+                    raise _upload_too_large()
+                await asyncio.to_thread(_hash_and_write, buffer, digest, chunk)
+            if written == 0:
+                raise HTTPException(status_code=400, detail="Uploaded file is empty")
+            await asyncio.to_thread(_flush_and_close, buffer)
+            await asyncio.to_thread(os.replace, tmp_path, dest_path)
+        except BaseException:
+            #  Also runs on client disconnect (cancellation), keep it synchronous
+            buffer.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    return written, digest.hexdigest()
+
+
+async def write_stream_at(chunks: AsyncIterator[bytes], path: Path, offset: int, max_bytes: int) -> int:
+    """
+    Write a request body into an existing file starting at offset (resumable upload ranges).
+
+    Each chunk is handed to the OS as soon as it arrives, so an interrupted request
+    keeps everything it delivered and the client only resends the rest. No upload
+    slot is held: the body arrives at network speed, not disk speed.
+
+    Returns:
+        int: Bytes written.
+
+    Raises:
+        HTTPException: 400 when the body is longer than max_bytes.
+    """
+    buffer = await asyncio.to_thread(open, path, "r+b")
+    written = 0
+    try:
+        await asyncio.to_thread(buffer.seek, offset)
+        async for chunk in chunks:
+            if written + len(chunk) > max_bytes:
+                raise HTTPException(status_code=400, detail="Request body is longer than its Content-Range")
+            await asyncio.to_thread(_write_and_flush, buffer, chunk)
+            written += len(chunk)
+    finally:
+        #  Also runs on client disconnect (cancellation), keep it synchronous
+        buffer.close()
+    return written
+
+
+def is_pdf_header(head: bytes) -> bool:
+    """True when the first bytes of a file carry the %PDF- header."""
+    return PDF_MAGIC in head[:PDF_HEADER_WINDOW]
+
+
+async def save_upload_to_server(upload: UploadFile, committeeNo: str, committeeDate: str, count: int, dest_dir: str) -> str:
+    """
+    Async counterpart of save_pdf_to_server for request handlers.
+
+    Returns:
+        str: Final saved file path.
+    """
+    dest_path = await asyncio.to_thread(build_pdf_destination, committeeNo, committeeDate, count, dest_dir)
+    await write_upload_to_path(upload, dest_path)
+    return str(dest_path)
+
+
+async def stage_upload(upload: UploadFile, dest_dir: str) -> Tuple[Path, str, int]:
+    """
+    Write an upload to a temporary file under dest_dir/.staging.
+
+    The staging folder sits on the same volume as the final folders, so
+    finalize_staged_pdf / place_blob is a single atomic rename.
+
+    Returns:
+        Tuple[Path, str, int]: Staged file path, SHA-256 hex digest, size in bytes.
+    """
+    staging_dir = Path(dest_dir) / STAGING_DIR_NAME
+    await asyncio.to_thread(staging_dir.mkdir, parents=True, exist_ok=True)
+
+    staged_path = staging_dir / f"{uuid.uuid4().hex}.part"
+    size, digest = await write_upload_to_path(upload, staged_path)
+    return staged_path, digest, size
+
+
+def stage_file_copy(source_path: str, dest_dir: str) -> Tuple[Path, str, int]:
+    """
+    Copy a local file into dest_dir/.staging, hashing it in the same pass (blocking, run in a thread).
+
+    Returns:
+        Tuple[Path, str, int]: Staged file path, SHA-256 hex digest, size in bytes.
+    """
+    staging_dir = Path(dest_dir) / STAGING_DIR_NAME
+    staging_dir.mkdir(parents=True, exist_ok=True)
+
+    staged_path = staging_dir / f"{uuid.uuid4().hex}.part"
     try:
-        os.remove(file_path)
-        print(f" Async deleted: {file_path}")
-    except Exception as e:
-        print(f" Async deletion failed: {e}")
+        digest = copy_pdf_with_hash(source_path, str(staged_path))
+    except Exception:
+        staged_path.unlink(missing_ok=True)
+        raise
+    return staged_path, digest, staged_path.stat().st_size
+
+
+BLOB_DIR_NAME = "blobs"
+
+
+def blob_relative_path(digest: str) -> Path:
+    """Content-addressed location of a PDF: blobs/ab/cd/<sha256>.pdf (two levels keep folders small)."""
+    return Path(BLOB_DIR_NAME) / digest[:2] / digest[2:4] / f"{digest}.pdf"
 
 
+def place_blob(staged_path: Path, blob_path: Path) -> str:
+    """
+    Move a staged file to its blob location (call only after the DB commit).
+
+    Overwriting an existing blob is fine: same hash means same bytes, and
+    always renaming keeps a concurrently re-referenced blob from going missing.
+    """
+    blob_path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(staged_path, blob_path)
+    return str(blob_path)
+
+
+def _upload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"PDF is larger than the {settings.PDF_MAX_UPLOAD_MB} MB upload limit"
+    )
+
+
+def _hash_and_write(buffer: BinaryIO, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+def _write_and_flush(buffer: BinaryIO, chunk: bytes) -> None:
+    buffer.write(chunk)
+    buffer.flush()
+
+
+def _flush_and_close(buffer: BinaryIO) -> None:
+    buffer.flush()
+    os.fsync(buffer.fileno())  #  Data is on disk before the rename makes it visible
+    buffer.close()
+
+
+def finalize_staged_pdf(staged_path: Path, dest_path: Path) -> str:
+    """Move a staged upload to its final name (call only after the DB commit)."""
+    if dest_path.exists():
+        raise FileExistsError(f"PDF already exists at {dest_path}")
+    os.replace(staged_path, dest_path)
+    return str(dest_path)
 
 
+def discard_staged_pdf(staged_path: Path) -> None:
+    """Remove a staged upload whose transaction did not commit."""
+    Path(staged_path).unlink(missing_ok=True)
@@ -0,0 +1,86 @@
+import csv  # For streaming CSV parsing
+import io  # For wrapping binary uploads as text
+from itertools import islice
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx", ".xlsm")
+
+
+def iter_tabular_rows(source: BinaryIO, filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Stream rows from a CSV or XLSX file one at a time (never loads the whole sheet).
+
+    Args:
+        source (BinaryIO): Open binary file (upload stream or local file).
+        filename (str): Original filename, used to pick the parser by extension.
+
+    Yields:
+        Tuple[int, Dict[str, Any]]: (row number in the sheet, {header: value})
+    """
+    suffix = Path(filename).suffix.lower()
+
+    if suffix == ".csv":
+        yield from _iter_csv_rows(source)
+    elif suffix in (".xlsx", ".xlsm"):
+        yield from _iter_xlsx_rows(source)
+    else:
+        raise ValueError(f"Unsupported file type '{suffix}', expected one of {SUPPORTED_EXTENSIONS}")
+
+
+def iter_chunks(rows: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Group any iterable into lists of at most chunk_size items."""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_csv_rows(source: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    #  utf-8-sig drops the BOM Excel adds when saving "CSV UTF-8"
+    text_stream = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text_stream)
+        if reader.fieldnames:
+            reader.fieldnames = [name.strip() for name in reader.fieldnames]
+
+        for row in reader:
+            yield reader.line_num, {key: _clean_cell(value) for key, value in row.items() if key}
+    finally:
+        #  Detach so closing the wrapper does not close the caller's stream
+        text_stream.detach()
+
+
+def _iter_xlsx_rows(source: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    from openpyxl import load_workbook  # Imported lazily, only needed for Excel files
+
+    #  read_only mode streams rows from the XML instead of building the whole sheet in memory
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        headers = [str(cell).strip() if cell is not None else "" for cell in header_row]
+
+        for row_number, values in enumerate(rows, start=2):
+            if values is None or all(cell is None for cell in values):
+                continue  # Skip empty trailing rows Excel keeps around
+            yield row_number, {
+                header: _clean_cell(value)
+                for header, value in zip(headers, values)
+                if header
+            }
+    finally:
+        workbook.close()
+
+
+def _clean_cell(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
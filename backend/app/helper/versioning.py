@@ -0,0 +1,37 @@
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+
+def format_etag(version: Optional[bytes]) -> Optional[str]:
+    """
+    Turn a SQL Server rowversion (8 bytes) into a strong ETag value.
+
+    Returns:
+        Optional[str]: '"00000000000007d1"' style ETag, or None when the row has no version.
+    """
+    if not version:
+        return None
+    return f'"{bytes(version).hex()}"'
+
+
+def parse_if_match(header: Optional[str]) -> Optional[List[bytes]]:
+    """
+    Parse an If-Match header into the rowversions the client is allowed to overwrite.
+
+    Returns:
+        Optional[List[bytes]]: None when the header is missing or "*" (no precondition).
+    """
+    if header is None or header.strip() in ("", "*"):
+        return None
+
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]  # rowversion is exact, a weak tag still names one version
+        try:
+            versions.append(bytes.fromhex(tag.strip('"')))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid If-Match value: {tag}")
+    return versions
@@ -0,0 +1,91 @@
+import io
+import os
+import time
+import zipfile
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+ZIP_COMPRESSION = {
+    "stored": zipfile.ZIP_STORED,  # PDFs are compressed already, this is the fast default
+    "deflated": zipfile.ZIP_DEFLATED,
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable target: zipfile falls back to data descriptors and never seeks back."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _open_local(path: str, chunk_size: int) -> Tuple[float, Iterator[bytes]]:
+    source = open(path, "rb")
+    mtime = os.fstat(source.fileno()).st_mtime
+
+    def chunks() -> Iterator[bytes]:
+        with source:
+            while chunk := source.read(chunk_size):
+                yield chunk
+
+    return mtime, chunks()
+
+
+def iter_zip(
+    entries: Iterable[Tuple[str, str]],
+    compression: str = "stored",
+    chunk_size: int = 1024 * 1024,
+    open_source: Optional[Callable[[str, int], Tuple[float, Iterator[bytes]]]] = None
+) -> Iterator[bytes]:
+    """
+    Build a ZIP on the fly, yielding it piece by piece (no temp file, no full archive in memory).
+
+    Each source file is read chunk_size bytes at a time, so memory stays flat however
+    large the archive gets. Blocking generator: StreamingResponse runs each step in
+    the thread pool. Files that cannot be opened are listed in MISSING.txt at the end.
+
+    Args:
+        entries (Iterable[Tuple[str, str]]): (path on disk, name inside the archive).
+        compression (str): "stored" or "deflated".
+        chunk_size (int): Bytes read per step.
+        open_source (Optional[Callable]): (path, chunk_size) -> (mtime, chunk iterator) for a stored
+            file, may raise OSError; defaults to reading the local file.
+    """
+    open_source = open_source or _open_local
+    sink = _ChunkSink()
+    missing = []
+
+    with zipfile.ZipFile(sink, "w", compression=ZIP_COMPRESSION[compression], allowZip64=True) as archive:
+        for source_path, arcname in entries:
+            try:
+                mtime, chunks = open_source(source_path, chunk_size)
+            except OSError:
+                missing.append(f"{arcname}\t{source_path}")
+                continue
+
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime(mtime)[:6])
+            info.compress_type = ZIP_COMPRESSION[compression]
+            info.external_attr = 0o644 << 16
+            with archive.open(info, "w") as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+
+        if missing:
+            archive.writestr("MISSING.txt", "\n".join(missing))
+
+    #  Central directory, written when the archive closes
+    yield sink.drain()
@@ -6,6 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 #  Context manager to define startup/shutdown behavior
 from contextlib import asynccontextmanager
+import asyncio
 
 #  SQLAlchemy engine and base (used to create tables)
 from app.database.database import engine, Base
@@ -20,6 +21,11 @@ from app.routes.authentication import router
 
 from app.routes.employees import employeesRouter  
 
+from app.services.pdfDeleteQueue import PDFDeleteQueueService
+from app.services.pdfOptimize import PDFOptimizeService
+from app.services.pdfPreview import PDFPreviewService
+from app.services.pdfText import PDFTextService
+
 
 
 
@@ -35,8 +41,17 @@ async def lifespan(app: FastAPI):
         print("🚀 PRODUCTION mode: skipping table creation.")
         print(f"{app.title}...")
 
+    #  One worker per process drains the durable PDF delete queue
+    delete_worker = asyncio.create_task(PDFDeleteQueueService.runWorker())
+
     yield  #  Allows the application to continue startup
 
+    delete_worker.cancel()
+
+    PDFPreviewService.shutdown()  #  Stop thumbnail worker processes
+    PDFOptimizeService.shutdown()  #  Stop optimization worker processes
+    PDFTextService.shutdown()  #  Stop text extraction worker processes
+
 
 def create_app() -> FastAPI:              #create_app() just defines a factory function returning a FastAPI app.
 
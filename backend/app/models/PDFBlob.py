@@ -0,0 +1,14 @@
+from sqlalchemy import Column, BigInteger, DateTime, Integer, String
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+
+class PDFBlob(Base):
+    __tablename__ = "PDFBlob"
+
+    # One row per distinct PDF content; PDFTable rows point here through blobHash
+    hash = Column(String(64), primary_key=True)  # SHA-256 hex of the file bytes
+    path = Column(String, nullable=False)  # Where the single stored copy lives
+    size = Column(BigInteger, nullable=True)
+    refCount = Column(Integer, nullable=False, default=0)  # Number of PDFTable rows using this blob
+    createdDate = Column(DateTime, default=func.now())
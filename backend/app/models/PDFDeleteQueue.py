@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Integer, String, Unicode
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+
+class PDFDeleteQueue(Base):
+    __tablename__ = "PDFDeleteQueue"
+
+    # Files to unlink once their rows are gone; written in the same transaction as the delete
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String, nullable=False)
+    blobHash = Column(String(64), nullable=True)  # Set for shared blobs: skipped if the blob was re-created meanwhile
+    notBefore = Column(DateTime, nullable=False, index=True)  # Grace period / retry backoff
+    attempts = Column(Integer, nullable=False, default=0)
+    lastError = Column(Unicode(500), nullable=True)
+    createdDate = Column(DateTime, default=func.now())
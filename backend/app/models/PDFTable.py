@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import BigInteger, Column, Integer, String, Date
 from app.database.database import Base
 from pydantic import BaseModel
 from typing import Optional
@@ -14,6 +14,9 @@ class PDFTable(Base):
     pdf = Column(String, nullable=True)  # Stores PDF file path or URL
     userID = Column(Integer, nullable=True)
     currentDate = Column(Date, nullable=True)
+    blobHash = Column(String(64), nullable=True, index=True)  # PDFBlob.hash when stored content-addressed
+    originalSize = Column(BigInteger, nullable=True)  # Bytes as uploaded, set by the optimization stage
+    optimizedSize = Column(BigInteger, nullable=True)  # Bytes on disk after optimization (== originalSize when it did not help)
 
 
 
@@ -27,6 +30,7 @@ class PDFCreate(BaseModel):
     pdf: Optional[str]
     userID: Optional[int]
     currentDate: Optional[date]
+    blobHash: Optional[str] = None
 
 class PDFResponse(BaseModel):
     id: int
@@ -42,4 +46,10 @@ class PDFResponse(BaseModel):
 # Pydantic model for request body
 class DeletePDFRequest(BaseModel):
     id: int
-    pdf: str  # Matches frontend 'pdf' field        
\ No newline at end of file
+    pdf: str  # Matches frontend 'pdf' field        
+
+
+# Body of POST /api/committees/uploads (resumable upload session)
+class UploadSessionCreate(BaseModel):
+    size: int  # Total bytes the client will send
+    filename: Optional[str] = None
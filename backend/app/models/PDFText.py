@@ -0,0 +1,14 @@
+from sqlalchemy import Column, DateTime, Integer, UnicodeText
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+
+class PDFText(Base):
+    __tablename__ = "PDFText"
+
+    # Text layer of one stored PDF, written by the extraction stage (PDFTextService)
+    pdfID = Column(Integer, primary_key=True, autoincrement=False)  # PDFTable.id
+    committeeID = Column(Integer, nullable=True, index=True)
+    pageCount = Column(Integer, nullable=True)
+    textContent = Column(UnicodeText, nullable=True)  # Whitespace-collapsed, capped at PDF_TEXT_MAX_CHARS; "" for scans without a text layer
+    extractedDate = Column(DateTime, default=func.now())
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Date,Unicode,BigInteger
+from sqlalchemy import Column, FetchedValue, Integer, String, Date,Unicode,BigInteger
+from sqlalchemy.dialects.mssql import ROWVERSION
 from app.database.database import Base
 from pydantic import BaseModel, field_validator, validator
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import relationship
 
 
@@ -19,6 +20,8 @@ class Committee(Base):
     notes = Column(Unicode(500), nullable=True)
     currentDate = Column(Date, nullable=True)
     userID = Column(Integer,  nullable=True)
+    # SQL Server bumps this on every UPDATE; used as the ETag for If-Match checks
+    rowVersion = Column(ROWVERSION, nullable=False, server_default=FetchedValue(), server_onupdate=FetchedValue())
     
     
     #Relationship to junction table (committee members)
@@ -63,6 +66,28 @@ class CommitteeCreate(BaseModel):
         from_attributes = True
 
 
+class CommitteeBulkItem(CommitteeCreate):
+    pdfFiles: Optional[List[str]] = []  # paths relative to PDF_SOURCE_PATH, e.g. "ali/scan-001.pdf"
+
+
+class CommitteeBulkCreateRequest(BaseModel):
+    userID: int
+    committees: List[Dict[str, Any]]  # validated one by one so each item gets its own result
+
+
+
+class CommitteeBulkDeleteRequest(BaseModel):
+    ids: List[int]  # committee IDs, deleted together in one transaction
+
+
+
+class CommitteeMembershipPatch(BaseModel):
+    add: List[int] = []        # employee IDs to link
+    remove: List[int] = []     # employee IDs to unlink
+    userID: Optional[int] = None  # stored as createdBy on new links
+
+
+
 class PDFResponse(BaseModel):
     id: int
     committeeID: int
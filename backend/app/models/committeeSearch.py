@@ -27,6 +27,7 @@ class CommitteeSearchRequest(BaseModel):
     committeeDate_to: Optional[str] = Field(None, description="End date (YYYY-MM-DD)")
     committeeTitle: Optional[str] = Field(None, min_length=1, description="Committee title (partial match)")
     committeeBossName: Optional[str] = Field(None, min_length=1, description="Boss name (partial match)")
+    q: Optional[str] = Field(None, min_length=2, max_length=200, description="Words inside the committee's PDFs")
     
     # Pagination 
     page: int = Field(1, ge=1, description="Page number")
@@ -59,6 +60,11 @@ class AutoSuggestionRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=100, description="Search query")
     limit: int = Field(5, ge=1, le=20, description="Maximum suggestions")
 
+class PDFTextSnippet(BaseModel):
+    """Where a q= search matched inside one PDF"""
+    pdfID: int
+    snippet: str  # HTML: escaped text with <mark> around the matched words
+
 class CommitteeSearchResponse(BaseModel):
     """Search response with pagination"""
     data: List[CommitteeResponse]
@@ -68,6 +74,7 @@ class CommitteeSearchResponse(BaseModel):
     total_pages: int
     has_next: bool
     has_previous: bool
+    snippets: Dict[int, List[PDFTextSnippet]] = {}  # committee id -> matching PDFs (q= searches only)
 
 class AutoSuggestionResponse(BaseModel):
     """Auto-suggestion response"""
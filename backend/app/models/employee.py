@@ -55,6 +55,12 @@ class EmployeeSearchParams(BaseModel):
 
 
 
+class EmployeeBatchRequest(BaseModel):
+    """Request body for fetching many employees in one call"""
+    ids: List[int] = Field(..., min_length=1, max_length=500, description="Employee IDs (order is preserved)")
+
+
+
 #  Updated Response Model
 class EmployeeInCommitteeResponse(BaseModel):
     empID: int
@@ -75,6 +81,7 @@ class CommitteeResponseWithEmployees(BaseModel):
     currentDate: Optional[str] = None
     userID: Optional[int] = None
     username: Optional[str] = None
+    version: Optional[str] = None  # rowversion hex, send back as If-Match when updating
     pdfFiles: List[PDFResponse] = []
     employees: List[EmployeeInCommitteeResponse] = []  # ✅ NEW
 
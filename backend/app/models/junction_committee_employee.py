@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, BigInteger, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.database import Base
@@ -26,6 +26,11 @@ class JunctionCommitteeEmployee(Base):
     # Step 2: Define relationships (only committee and employee)
     committee = relationship("Committee", back_populates="committee_members")
     employee = relationship("Employee", back_populates="committee_memberships")
+
+    # Step 3: Covering index for employee -> committees lookups (seek on empID, ordered by committeeID)
+    __table_args__ = (
+        Index('ix_junction_emp_committee', 'empID', 'committeeID'),
+    )
        
     
     
\ No newline at end of file
@@ -1,10 +1,11 @@
 from datetime import datetime,date
 import logging
-import os
 import traceback
+from pathlib import Path
 from typing import Any, Dict, List, Optional
-from fastapi import APIRouter, Body, File, HTTPException, Query, Request, UploadFile, Form, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Body, File, Header, HTTPException, Query, Request, Response, UploadFile, Form, Depends
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 import pydantic
 from sqlalchemy import select,extract, desc
 from sqlalchemy.ext.asyncio import AsyncSession  
@@ -12,14 +13,26 @@ from app.database.database import get_async_db
 from pydantic import BaseModel, Field
 from fastapi import APIRouter
 from app.database.config import settings
-from app.helper.save_pdf import save_pdf_to_server
-from app.models.PDFTable import DeletePDFRequest, PDFCreate, PDFResponse, PDFTable
-from app.models.committee import Committee, CommitteeCreate, CommitteeListResponse, CommitteeResponse
+from app.helper.pdf_response import build_pdf_response, build_thumbnail_response
+from app.helper.pdf_storage import open_stored_pdf
+from app.helper.tabular_reader import iter_tabular_rows
+from app.helper.versioning import parse_if_match
+from app.helper.zip_stream import iter_zip
+from app.models.PDFTable import DeletePDFRequest, PDFResponse, PDFTable, UploadSessionCreate
+from app.models.committee import Committee, CommitteeBulkCreateRequest, CommitteeBulkDeleteRequest, CommitteeCreate, CommitteeListResponse, CommitteeMembershipPatch, CommitteeResponse
 from app.models.committeeSearch import AutoSuggestionRequest, AutoSuggestionResponse, CommitteeBossNameResponse, CommitteeNoResponse, CommitteeSearchRequest, CommitteeSearchResponse, CommitteeTitleResponse
 from app.models.users import Users
+from app.services.archiveImport import ArchiveImportService
 from app.services.committee import CommitteeResponseWithEmployees, CommitteeService
+from app.services.committeeBulk import CommitteeBulkService
+from app.services.committeeMembers import CommitteeMembersService
 from app.services.committeeSearch import CommitteeSearchService, get_committee_search_service
 from app.services.pdf import PDFService
+from app.services.pdfBundle import PDFBundleService
+from app.services.pdfDeleteQueue import PDFDeleteQueueService
+from app.services.pdfPreview import PDFPreviewService
+from app.services.storageReconcile import StorageReconcileService
+from app.services.uploadSession import UploadSessionService
 from urllib.parse import unquote
 import json
 
@@ -30,6 +43,8 @@ committeesRouter = APIRouter(prefix="/api/committees", tags=["COMMITTEES"])
 # Configure logging
 logger = logging.getLogger(__name__)
 
+MAX_BULK_DELETE = 1000  # Committees per bulk delete request
+
 
 @committeesRouter.get("/test-health")
 async def test_path():
@@ -53,7 +68,8 @@ async def addCommitteeDoc(
     userID: str = Form(...),
     #  NEW: Receive employee IDs as JSON string
     employeeIDs: Optional[str] = Form("[]"),  # Default empty array as string
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    uploadID: Optional[str] = Form(None, description="Completed resumable upload (POST /uploads), instead of file"),
     db: AsyncSession = Depends(get_async_db)
 ):
     """
@@ -61,13 +77,11 @@ async def addCommitteeDoc(
     
     Steps:
     1. Validate and parse input data
-    2. Create committee record
-    3. Link employees to committee
-    4. Save PDF file
-    5. Create PDF record
-    6. Return success response
+    2. Build committee data
+    3. Create committee, members and PDF record in one transaction
+    4. Return success response
     
-    Required fields: committeeNo, committeeDate, committeeTitle, committeeBossName, userID, file
+    Required fields: committeeNo, committeeDate, committeeTitle, committeeBossName, userID, file or uploadID
     Optional fields: sex, committeeCount, notes, employeeIDs
     
     employeeIDs format: JSON array string, e.g., "[1, 2, 3]"
@@ -75,6 +89,9 @@ async def addCommitteeDoc(
     try:
         # Step 1: Parse employee IDs from JSON string
         logger.info(f"Creating committee {committeeNo} with members")
+
+        if (file is None) == (uploadID is None):
+            raise HTTPException(status_code=400, detail="Send either file or uploadID")
         
         try:
             employee_id_list = json.loads(employeeIDs) if employeeIDs else []
@@ -102,55 +119,33 @@ async def addCommitteeDoc(
             employeeIDs=employee_id_list  #  Include employee IDs
         )
         
-        # Step 3: Insert committee record and link employees
-        new_committee_id = await CommitteeService.insertCommitteesDocsData(
-            db, 
-            committee_data,
-            userID=int(userID)
-        )
-        logger.info(f"Created committee with ID: {new_committee_id}")
-        
-        # Step 4: Count existing PDFs for this committee
-        pdf_count = await PDFService.get_pdf_count(db, new_committee_id)
-        logger.info(f"PDF count for committee {new_committee_id}: {pdf_count}")
-        
-        # Step 5: Save PDF file to server
-        upload_dir = settings.PDF_UPLOAD_PATH
-        with file.file as f:
-            pdf_path = save_pdf_to_server(
-                f, 
-                committeeNo, 
-                committeeDate, 
-                pdf_count, 
-                upload_dir
+        # Step 3: Committee, members and PDF in one transaction (file renamed into place after commit)
+        try:
+            insert_result = await CommitteeService.createCommitteeWithPdf(
+                db,
+                committee_data,
+                userID=int(userID),
+                file=file,
+                upload_id=uploadID
             )
-        logger.info(f"Saved PDF to: {pdf_path}")
-        
-        # Close upload stream
-        file.file.close()
-        
-        # Step 6: Insert PDF record to database
-        pdf_data = PDFCreate(
-            committeeID=new_committee_id,
-            committeeNo=committeeNo,
-            committeeDate=committeeDate,
-            countPdf=pdf_count + 1,
-            pdf=pdf_path,
-            userID=int(userID),
-            currentDate=datetime.now().date().isoformat()
-        )
-        await PDFService.insert_pdf(db, pdf_data)
-        logger.info(f"PDF record inserted successfully")
+        finally:
+            if file is not None:
+                await file.close()
+
+        new_committee_id = insert_result["committeeID"]
+        member_count = len(insert_result["memberIDs"])
+        logger.info(f"Created committee with ID: {new_committee_id}, PDF: {insert_result['pdf']}")
         
-        # Step 7: Return success response
+        # Step 4: Return success response
         return {
             "success": True,
-            "message": f"تم إضافة اللجنة '{committeeTitle}' بنجاح مع {len(employee_id_list)} عضو",
+            "message": f"تم إضافة اللجنة '{committeeTitle}' بنجاح مع {member_count} عضو",
             "data": {
                 "committeeID": new_committee_id,
                 "committeeNo": committeeNo,
-                "pdfCount": pdf_count + 1,
-                "memberCount": len(employee_id_list)
+                "pdfCount": insert_result["pdfCount"],
+                "memberCount": member_count,
+                "skippedEmployeeIDs": insert_result["skippedEmployeeIDs"]
             }
         }
         
@@ -163,6 +158,236 @@ async def addCommitteeDoc(
             detail=f"Server error: {str(e)}"
         )
 
+@committeesRouter.post("/uploads", response_model=dict, status_code=201)
+async def createUploadSession(request: UploadSessionCreate, response: Response):
+    """
+    Start a resumable PDF upload (large scans over unreliable links)
+
+    Protocol:
+    1. POST /uploads {"size": <bytes>, "filename": "..."} -> uploadID
+    2. PUT /uploads/{uploadID} with Content-Range: bytes <start>-<end>/<size> and the raw bytes,
+       repeated until "complete"; each response carries the received offset
+    3. After a failure, GET /uploads/{uploadID} (or the 409 detail) gives the offset to resume from
+    4. POST /post or PATCH /{id} with uploadID=<uploadID> instead of file
+
+    Sessions idle for PDF_UPLOAD_SESSION_HOURS are removed
+    """
+    try:
+        session = await UploadSessionService.createSession(request.size, request.filename)
+        response.headers["Location"] = f"{committeesRouter.prefix}/uploads/{session['uploadID']}"
+        response.headers["Upload-Offset"] = "0"
+        return {"success": True, "message": "Upload session created", "data": session}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in createUploadSession: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+
+@committeesRouter.get("/uploads/{upload_id}", response_model=dict)
+async def getUploadSession(upload_id: str, response: Response):
+    """Received offset of a resumable upload; resume with the next PUT at that byte"""
+    try:
+        session = await UploadSessionService.getSession(upload_id)
+        response.headers["Upload-Offset"] = str(session["offset"])
+        return {"success": True, "message": f"{session['offset']} of {session['size']} bytes received", "data": session}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in getUploadSession: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+
+@committeesRouter.put("/uploads/{upload_id}", response_model=dict)
+async def putUploadRange(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    content_range: Optional[str] = Header(None, alias="Content-Range")
+):
+    """
+    Write one byte range of a resumable upload (raw body, not multipart)
+
+    Example: curl -X PUT --data-binary @part2 -H "Content-Range: bytes 8388608-16777215/52428800" .../uploads/<id>
+    """
+    try:
+        session = await UploadSessionService.writeRange(upload_id, content_range, request.stream())
+        response.headers["Upload-Offset"] = str(session["offset"])
+        return {
+            "success": True,
+            "message": "Upload complete" if session["complete"] else f"{session['offset']} of {session['size']} bytes received",
+            "data": session
+        }
+    except HTTPException:
+        raise
+    except ClientDisconnect:
+        #  The bytes that arrived are kept; the client resumes from GET /uploads/{upload_id}
+        logger.info(f"Upload session {upload_id}: client disconnected mid-range")
+        raise HTTPException(status_code=400, detail="Client disconnected")
+    except Exception as e:
+        logger.error(f"Error in putUploadRange: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+
+@committeesRouter.delete("/uploads/{upload_id}", response_model=dict)
+async def cancelUploadSession(upload_id: str):
+    """Abandon a resumable upload and free its disk space"""
+    try:
+        if not await UploadSessionService.deleteSession(upload_id):
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return {"success": True, "message": "Upload session removed"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in cancelUploadSession: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+
+@committeesRouter.post("/bulk", response_model=dict)
+async def addCommitteesBulk(
+    request: CommitteeBulkCreateRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create many committees in one request and one transaction
+    Content-Type: application/json
+
+    Body:
+    {
+      "userID": 3,
+      "committees": [
+        {"committeeNo": "12", "committeeDate": "2025-01-05", "committeeTitle": "...",
+         "committeeBossName": "...", "employeeIDs": [8504, 8505], "pdfFiles": ["ali/scan-001.pdf"]}
+      ]
+    }
+
+    pdfFiles are paths relative to PDF_SOURCE_PATH; they are copied into PDF_UPLOAD_PATH
+    Returns one result per item (committeeID on success, error otherwise)
+    """
+    try:
+        logger.info(f"Bulk creating {len(request.committees)} committees")
+
+        result = await CommitteeBulkService.createCommitteesBulk(db, request.committees, request.userID)
+
+        return {
+            "success": result["failed"] == 0,
+            "message": f"تم إضافة {result['created']} لجنة",
+            "data": result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in addCommitteesBulk: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+
+@committeesRouter.post("/import/archive", response_model=dict)
+async def importCommitteeArchive(
+    # Step 1: Accept the legacy sheet and the folder holding its scans
+    file: UploadFile = File(...),
+    pdfDir: str = Form(..., description="Folder of scanned PDFs, relative to PDF_SOURCE_PATH"),
+    userID: int = Form(...),
+    resume: bool = Form(True, description="Skip rows committed by a previous run of the same sheet"),
+    chunkSize: int = Query(ArchiveImportService.CHUNK_SIZE, ge=10, le=1000, description="Committees per batch"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import paper-era committees and their scanned PDFs (CSV or XLSX)
+
+    Columns: committeeNo, committeeDate, committeeTitle, committeeBossName, sex, committeeCount,
+    notes, members (employee numbers separated by ; or ,), pdf (optional, paths inside pdfDir)
+    Rows without a pdf column are matched to scans named "<committeeNo>.<year>..." or "<committeeNo>-<year>..."
+
+    Progress is checkpointed in pdfDir after every committed batch; posting the same sheet again resumes
+
+    Example: curl -F "file=@archive.xlsx" -F "pdfDir=archive/2015" -F "userID=1" /api/committees/import/archive
+    """
+    try:
+        # Step 2: Keep the scan folder inside PDF_SOURCE_PATH
+        pdf_root = Path(settings.PDF_SOURCE_PATH) / pdfDir
+        if not PDFService.is_safe_path(settings.PDF_SOURCE_PATH, str(pdf_root)) or not pdf_root.is_dir():
+            raise HTTPException(status_code=400, detail=f"PDF folder not found: {pdfDir}")
+
+        source_name = Path(file.filename or "archive").name
+        checkpoint_path = pdf_root / f".import-{Path(source_name).stem}.checkpoint.json"
+        if not resume:
+            checkpoint_path.unlink(missing_ok=True)
+
+        logger.info(f"Importing committee archive {source_name} with scans from {pdf_root}")
+
+        # Step 3: Stream rows into the batched importer
+        report = await ArchiveImportService.importArchive(
+            db,
+            iter_tabular_rows(file.file, source_name),
+            source_name=source_name,
+            pdf_root=pdf_root,
+            userID=userID,
+            checkpoint_path=checkpoint_path,
+            chunk_size=chunkSize
+        )
+
+        # Step 4: Return import summary with per-row errors
+        return {
+            "success": report["failed"] == 0 and not report["aborted"],
+            "message": f"تم استيراد {report['committeesCreated']} لجنة و {report['pdfsCopied']} ملف",
+            "data": report
+        }
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in importCommitteeArchive: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+    finally:
+        await file.close()
+
+
+@committeesRouter.get("/admin/storage/reconcile", response_model=dict)
+async def reconcileStorage(
+    unit: Optional[List[str]] = Query(None, description="Year folder (e.g. 2024), blob shard (blobs/ab) or .staging; all when omitted"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Report how PDF_UPLOAD_PATH and PDFTable differ: files without rows (orphans) and rows without files (missing)
+
+    Read-only, unit by unit. Quarantining or deleting orphans is left to the CLI
+    (reconcile_storage.py --mode quarantine|delete), run by someone with access to the server.
+
+    Example: GET /api/committees/admin/storage/reconcile?unit=2024
+    """
+    try:
+        reports = await StorageReconcileService.reconcileAll(db, unit, "report")
+        return {
+            "success": True,
+            "message": f"{sum(r['orphanCount'] for r in reports)} orphaned files, {sum(r['missingCount'] for r in reports)} missing files",
+            "data": reports
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in reconcileStorage: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+
+@committeesRouter.get("/admin/storage/delete-queue", response_model=dict)
+async def getDeleteQueueBacklog(db: AsyncSession = Depends(get_async_db)):
+    """Files waiting to be unlinked, and the ones that keep failing (e.g. locked by a viewer on Windows)"""
+    try:
+        backlog = await PDFDeleteQueueService.getBacklog(db)
+        return {
+            "success": True,
+            "message": f"{backlog['pending']} file(s) waiting, {backlog['failedPermanently']} given up",
+            "data": backlog
+        }
+    except Exception as e:
+        logger.error(f"Error in getDeleteQueueBacklog: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+
 @committeesRouter.get("/lastCommitteeNo")
 async def getLastCommitteeNo(db: AsyncSession = Depends(get_async_db)):
     """Get the last inserted committee number"""
@@ -194,6 +419,7 @@ async def search_committees_get(
     committeeDate_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     committeeTitle: Optional[str] = Query(None, description="Committee title"),
     committeeBossName: Optional[str] = Query(None, description="Boss name"),
+    q: Optional[str] = Query(None, min_length=2, max_length=200, description="Words inside the committee's PDFs"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
     sort_by: str = Query("id", description="Sort field"),
@@ -202,6 +428,9 @@ async def search_committees_get(
 ):
     """
     Search committees using GET method (alternative to POST)
+
+    q= searches the text extracted from the committees' PDFs (all words must occur);
+    the response's snippets map each returned committee to highlighted excerpts
     """
     try:
         logger.error(f"Search committees GET committeeDate_from: {committeeDate_from}")
@@ -211,6 +440,7 @@ async def search_committees_get(
             committeeDate_to=committeeDate_to,
             committeeTitle=committeeTitle,
             committeeBossName=committeeBossName,
+            q=q,
             page=page,
             page_size=limit,
             sort_by=sort_by,
@@ -336,6 +566,42 @@ async def getByFilterBooksNo(
     )
 
 
+#  Must stay above /pdf/{committeeNo}, which would otherwise match "bundle"
+@committeesRouter.get("/pdf/bundle", description='download matching pdfs as one streamed zip')
+async def getPdfBundle(
+    committeeID: Optional[int] = Query(None),
+    committeeBossName: Optional[str] = Query(None),
+    committeeDate_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    committeeDate_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    compression: str = Query("stored", pattern="^(stored|deflated)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    All PDFs of a committee, a boss or a date range as a ZIP.
+
+    The archive is streamed while it is built: files are read in chunks in the
+    thread pool, nothing is buffered in memory or written to a temp file.
+
+    Example: GET /api/committees/pdf/bundle?committeeDate_from=2024-01-01&committeeDate_to=2024-12-31
+    """
+    try:
+        entries = await PDFBundleService.getBundleFiles(
+            db, committeeID, committeeBossName, committeeDate_from, committeeDate_to
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in getPdfBundle: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+    filename = f"committee-pdfs-{datetime.now().strftime('%Y%m%d-%H%M%S')}.zip"
+    return StreamingResponse(
+        iter_zip(entries, compression, settings.UPLOAD_CHUNK_SIZE, open_source=open_stored_pdf),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 # check this what do
 @committeesRouter.get("/pdf/{committeeNo}", response_model=List[PDFResponse])
 async def get_pdfs_by_book_no(committeeNo: str, db: AsyncSession = Depends(get_async_db)):
@@ -386,44 +652,69 @@ async def get_pdfs_by_book_no(committeeNo: str, db: AsyncSession = Depends(get_a
 
 
 @committeesRouter.get("/pdf/file/{pdf_id}" ,description='serve/show pdf by pdf id')
-async def get_pdf_file(pdf_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_pdf_file(pdf_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
 
     """
     Retrieve a single PDF file by its ID from PDFTable.
     Returns the PDF file if found and accessible.
+
+    Supports Range requests (206), If-Range, and conditional GET (ETag /
+    Last-Modified -> 304); files are immutable, so browsers cache them for a year.
     """
     print(f"Fetching PDF file with id: {pdf_id}")
     try:
-        query = select(
-            PDFTable.pdf,
-            PDFTable.committeeNo,
-            PDFTable.userID
-        ).filter(PDFTable.id == pdf_id)
-
-        result = await db.execute(query)
-        pdf_record = result.first()
-
-        print(f"Fetching pdf_record file with id: {pdf_record}")
+        #  Path lookup is cached per worker; one stat (off the event loop) answers
+        #  "exists?" and feeds the validators, a stale cached path is looked up again
+        try:
+            pdf_file = await PDFService.locate_pdf_file(db, pdf_id)
+        except FileNotFoundError:
+            print(f"PDF file does not exist for id: {pdf_id}")
+            raise HTTPException(status_code=404, detail="PDF file not found on server")
         
-        if not pdf_record:
+        if not pdf_file:
             print(f"No PDF found for id: {pdf_id}")
             raise HTTPException(status_code=404, detail="PDF record not found in database")
         
-        pdf_path, book_no, user_id = pdf_record
-        print(f"Queried PDF path: {pdf_path}, bookNo: {book_no}, userID: {user_id}")
-        
-        if not os.path.exists(pdf_path):
-            print(f"PDF file does not exist at: {pdf_path}")
-            raise HTTPException(status_code=404, detail="PDF file not found on server")
+        pdf_path, stat_result, blob_hash = pdf_file
         
-        print(f"Serving PDF file: {pdf_path} for bookNo: {book_no}, userID: {user_id}")
-        return FileResponse(pdf_path, media_type="application/pdf")
+        print(f"Serving PDF file: {pdf_path}")
+        return build_pdf_response(request, pdf_path, stat_result, blob_hash)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching PDF file with id {pdf_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
     
 
 
+@committeesRouter.get("/pdf/thumb/{pdf_id}" ,description='first page thumbnail (PNG) of a pdf, page count in X-Page-Count')
+async def get_pdf_thumbnail(pdf_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+
+    """
+    Small PNG of the first page, rendered once in a worker process and cached
+    under PDF_UPLOAD_PATH/.thumbs, so lists can show previews without downloading PDFs.
+    """
+    try:
+        try:
+            pdf_file = await PDFService.locate_pdf_file(db, pdf_id)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="PDF file not found on server")
+
+        if not pdf_file:
+            raise HTTPException(status_code=404, detail="PDF record not found in database")
+
+        pdf_path, stat_result, blob_hash = pdf_file
+
+        png, page_count, cache_key = await PDFPreviewService.getThumbnail(pdf_id, pdf_path, stat_result, blob_hash)
+        return build_thumbnail_response(request, png, cache_key, page_count)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error building thumbnail for PDF {pdf_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+
+
 @committeesRouter.delete("/delete_pdf", response_model=dict)
 async def delete_pdf(request: DeletePDFRequest, db: AsyncSession = Depends(get_async_db)):
     """
@@ -472,13 +763,17 @@ async def committeeReportFunction(
 @committeesRouter.get("/getCommitteeWithPdfsByID/{id}", response_model=CommitteeResponseWithEmployees)
 async def getCommitteeWithPdfsByIDFunction(
     id: int,
+    response: Response,
     db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get committee by ID with all PDFs and employees
+    The ETag header (also returned as "version") is the value to send as If-Match when updating
     """
     try:
         committee_data = await CommitteeService.getCommitteeWithPdfsByIDMethod(db, id)
+        if committee_data.version:
+            response.headers["ETag"] = committee_data.version
         return committee_data
     except HTTPException:
         raise
@@ -495,7 +790,9 @@ async def getCommitteeWithPdfsByIDFunction(
 @committeesRouter.patch("/{id}/json", response_model=Dict[str, Any])
 async def updateRecordWithoutFile(
     id: int,
+    response: Response,
     data: Dict[str, Any] = Body(...),
+    if_match: Optional[str] = Header(None, alias="If-Match"),
     db: AsyncSession = Depends(get_async_db)
 ):
     """
@@ -508,8 +805,11 @@ async def updateRecordWithoutFile(
     
     If employeeIDs is provided:
     - Pass empty array [] to remove all employees
-    - Pass array of IDs [1, 2, 3] to replace with new employees
+    - Pass array of IDs [1, 2, 3] to set the members (only the difference is written)
     - Omit employeeIDs field to leave employees unchanged
+    
+    Send the committee's ETag as If-Match to reject the update (412) when
+    someone else changed the committee after it was loaded
     """
     try:
         print(f"Route (No File) - Updating committee ID: {id}")
@@ -583,8 +883,10 @@ async def updateRecordWithoutFile(
             db=db,
             id=id,
             update_data=update_data,
-            employee_ids=employee_ids  # ✅ Pass employee IDs
+            employee_ids=employee_ids,  # ✅ Pass employee IDs
+            expected_versions=parse_if_match(if_match)
         )
+        response.headers["ETag"] = updated_record["version"]
         
         return {
             "success": True,
@@ -606,10 +908,46 @@ async def updateRecordWithoutFile(
 
 
 
+@committeesRouter.patch("/{id}/members", response_model=Dict[str, Any])
+async def updateCommitteeMembers(
+    id: int,
+    changes: CommitteeMembershipPatch,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Add and/or remove committee members without resending the whole list
+    Content-Type: application/json
+
+    Body: {"add": [8504], "remove": [9001], "userID": 3}
+    Only the listed links are inserted/deleted; other members are untouched
+    """
+    try:
+        if not changes.add and not changes.remove:
+            raise HTTPException(status_code=400, detail="Nothing to add or remove")
+
+        result = await CommitteeMembersService.applyMembershipChanges(
+            db, id, changes.add, changes.remove, changes.userID
+        )
+
+        return {
+            "success": True,
+            "message": f"Added {len(result['added'])} and removed {len(result['removed'])} members",
+            "data": result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in update members route: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+
+
+
 # with file
 @committeesRouter.patch("/{id}", response_model=Dict[str, Any])
 async def updateRecordWithFile(
     id: int,
+    response: Response,
     committeeNo: Optional[str] = Form(None),
     committeeDate: Optional[date] = Form(None),
     committeeTitle: Optional[str] = Form(None),
@@ -622,7 +960,9 @@ async def updateRecordWithFile(
     username: Optional[str] = Form(None),
     
     employeeIDs: Optional[str] = Form(None), #  NEW: Optional employee IDs as JSON string
-    file: UploadFile = File(...),  # File is REQUIRED in this route
+    file: Optional[UploadFile] = File(None),  # File (or uploadID) is REQUIRED in this route
+    uploadID: Optional[str] = Form(None),  # Completed resumable upload (POST /uploads)
+    if_match: Optional[str] = Header(None, alias="If-Match"),
     db: AsyncSession = Depends(get_async_db)
 ):
     """
@@ -635,23 +975,24 @@ async def updateRecordWithFile(
       * If provided: Replace all employees with new list
       * If "[]": Remove all employees
       * If None/omitted: Leave employees unchanged
-    - file: Required PDF file
+    - file: Required PDF file, or
+    - uploadID: a completed resumable upload (for large scans, see POST /uploads)
+    
+    Optional If-Match header: the committee's ETag; 412 if it changed since it was loaded
     """
     try:
         print(f"Route (With File) - Updating committee ID: {id}")
         
         # Validate file
-        if not file or file.size == 0:
+        if file is not None and uploadID is not None:
+            raise HTTPException(status_code=400, detail="Send either file or uploadID")
+        if uploadID is None and (not file or file.size == 0):
             raise HTTPException(
                 status_code=400,
                 detail="File is required for this endpoint"
             )
         
-        if file.content_type != 'application/pdf':
-            raise HTTPException(
-                status_code=400,
-                detail="Only PDF files are allowed"
-            )
+        #  PDF header and size limit are checked while the file is staged (415 / 413)
         
         # Build update dictionary for committee fields
         update_data = {
@@ -704,8 +1045,11 @@ async def updateRecordWithFile(
             update_data=update_data,
             file=file,
             username=username,
-            employee_ids=employee_ids  #  Pass employee IDs
+            employee_ids=employee_ids,  #  Pass employee IDs
+            expected_versions=parse_if_match(if_match),
+            upload_id=uploadID
         )
+        response.headers["ETag"] = updated_record["version"]
         
         return {
             "success": True,
@@ -803,6 +1147,39 @@ async def getCommitteesDetailsByBossNameReport(
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
     
 
+@committeesRouter.post("/bulk-delete", response_model=Dict[str, Any], description='delete many committees with their pdf files')
+async def deleteCommitteesWithPdfs(
+    request: CommitteeBulkDeleteRequest,
+    db: AsyncSession = Depends(get_async_db)
+) -> Dict[str, Any]:
+    """
+    Delete many committees, their PDFs and member links in one transaction;
+    files are removed by the delete queue after the commit
+
+    Example: POST /api/committees/bulk-delete  {"ids": [31, 32, 40]}
+    """
+    try:
+        if not request.ids:
+            raise HTTPException(status_code=400, detail="ids must not be empty")
+        if len(request.ids) > MAX_BULK_DELETE:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_DELETE} committees per request")
+
+        logger.info(f"Attempting to delete {len(request.ids)} committees")
+        result = await PDFService.deleteCommitteesWithPdfsMethod(db, request.ids)
+
+        return {
+            "success": True,
+            "message": f"{len(result['committees'])} committees deleted, {len(result['notFound'])} not found",
+            "data": result
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in deleteCommitteesWithPdfs endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+
 @committeesRouter.delete("/{id}", response_model=Dict[str, Any], description='delete all pdf file by committee id')
 async def deleteCommitteeWithPdfs(
     id: int,
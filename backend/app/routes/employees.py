@@ -1,11 +1,13 @@
 # routes/employees.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, Dict, Optional, List
 import logging
-from app.models.employee import EmployeeSearchParams
+from app.helper.tabular_reader import iter_tabular_rows
+from app.models.employee import EmployeeBatchRequest, EmployeeSearchParams
 from app.services.committee import CommitteeService
 from app.services.employee import EmployeeService
+from app.services.employeeImport import EmployeeImportService
 from app.database.database import get_async_db
 
 
@@ -109,6 +111,134 @@ async def getAllEmployees(
     
 
 
+@employeesRouter.post("/import", response_model=dict)
+async def importEmployees(
+    # Step 1: Accept CSV/XLSX upload
+    file: UploadFile = File(...),
+    chunkSize: int = Query(EmployeeImportService.CHUNK_SIZE, ge=100, le=2000, description="Rows per batch"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Bulk import / refresh employees from an HR extract (CSV or XLSX)
+
+    Columns: name, employee_desc, gender (1/2 or ذكر/أنثى)
+    Rows are upserted on employee_desc; invalid rows are reported, not fatal
+
+    Example: curl -F "file=@employees.xlsx" /api/employees/import
+    """
+    try:
+        logger.info(f"Importing employees from {file.filename}")
+
+        # Step 2: Stream rows into the batched upsert
+        report = await EmployeeImportService.importEmployees(
+            db,
+            iter_tabular_rows(file.file, file.filename or ""),
+            chunk_size=chunkSize
+        )
+
+        # Step 3: Return import summary with per-row errors
+        return {
+            "success": report["failed"] == 0,
+            "message": f"Imported {report['inserted'] + report['updated']} employees in {report['elapsedSeconds']}s",
+            "data": report
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing employees: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await file.close()
+
+
+
+MAX_BATCH_IDS = 500
+
+
+@employeesRouter.get("/batch", response_model=dict)
+async def getEmployeesBatch(
+    # Step 1: Accept comma separated IDs
+    ids: str = Query(..., description="Comma separated employee IDs, e.g. 8504,8505,9001"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get many employees in one request (order preserved, missing IDs reported)
+
+    Example: /api/employees/batch?ids=8504,8505,9001
+    """
+    try:
+        emp_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma separated integers")
+
+    return await _employeesBatchResponse(emp_ids, db)
+
+
+@employeesRouter.post("/batch", response_model=dict)
+async def postEmployeesBatch(
+    # Step 1: Accept JSON body {"ids": [...]}
+    request: EmployeeBatchRequest = Body(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Same as GET /batch for ID lists too long for a query string
+
+    Body: {"ids": [8504, 8505, 9001]}
+    """
+    return await _employeesBatchResponse(request.ids, db)
+
+
+async def _employeesBatchResponse(emp_ids: List[int], db: AsyncSession) -> dict:
+    if not emp_ids:
+        raise HTTPException(status_code=400, detail="At least one employee ID is required")
+    if len(emp_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} IDs per request")
+
+    try:
+        # Step 2: Single IN query for the whole list
+        result = await EmployeeService.getEmployeesByIds(db, emp_ids)
+
+        # Step 3: Return employees plus IDs that were not found
+        return {
+            "success": True,
+            "count": len(result["data"]),
+            "data": result["data"],
+            "missing": result["missing"]
+        }
+
+    except Exception as e:
+        logger.error(f"Error in batch employee fetch: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+@employeesRouter.get("/workload", response_model=dict)
+async def getEmployeesWorkload(
+    date_from: Optional[str] = Query(None, description="Start committeeDate (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="End committeeDate (YYYY-MM-DD)"),
+    top: int = Query(10, ge=1, le=100, description="Number of busiest employees to return"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Committee workload per employee over a date window
+
+    Example: /api/employees/workload?date_from=2025-01-01&date_to=2025-12-31&top=20
+    """
+    try:
+        workload = await EmployeeService.getEmployeesWorkloadMethod(db, date_from, date_to, top)
+        return {
+            "success": True,
+            "data": workload
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting employee workload: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
 @employeesRouter.get("/{emp_id}", response_model=dict)
 async def getEmployee(
     # Step 1: Accept employee ID
@@ -161,4 +291,30 @@ async def getCommitteeEmployees(
         raise
     except Exception as e:
         logger.error(f"Error fetching employees for committee {committee_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+
+
+@employeesRouter.get("/{emp_id}/committees", response_model=Dict[str, Any], description='committees an employee is a member of (keyset paginated)')
+async def getEmployeeCommittees(
+    emp_id: int,
+    cursor: Optional[int] = Query(None, description="nextCursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Items per page"),
+    date_from: Optional[str] = Query(None, description="Start committeeDate (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="End committeeDate (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get all committees for a specific employee, newest first
+
+    Example: /api/employees/8504/committees?limit=20&cursor=1532
+    """
+    try:
+        return await EmployeeService.getEmployeeCommitteesMethod(
+            db, emp_id, cursor, limit, date_from, date_to
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching committees for employee {emp_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
@@ -0,0 +1,452 @@
+# services/archiveImport.py
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.config import settings
+from app.helper.pdf_storage import get_pdf_storage, remove_written_file
+from app.helper.save_pdf import build_pdf_destination, stage_file_copy
+from app.helper.tabular_reader import iter_chunks
+from app.models.PDFTable import PDFTable
+from app.models.committee import Committee
+from app.models.employee import Employee
+from app.models.junction_committee_employee import JunctionCommitteeEmployee
+from app.services.pdf import PDFService
+from app.services.pdfBlob import PDFBlobService
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveImportService:
+    CHUNK_SIZE = 200             # Committees copied, inserted and committed together
+    COPY_WORKERS = 4             # Threads hashing and copying scanned PDFs
+    IN_CLAUSE_SIZE = 2000        # SQL Server allows 2100 parameters per statement
+    MAX_REPORTED_ERRORS = 500
+
+    DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d", "%d-%m-%Y")
+    LIST_SEPARATORS = re.compile(r"[;,،|]")
+    # Scans are named "<committeeNo>.<year>..." (the app's own naming) or "<committeeNo>-<year>" / "<committeeNo>_<year>"
+    PDF_NAME_PATTERN = re.compile(r"^(?P<no>[^.\-_\s]+)[.\-_\s](?P<year>\d{4})(?!\d)")
+
+    @staticmethod
+    def parseArchiveRow(row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate one legacy sheet row
+
+        Expected headers: committeeNo, committeeDate, committeeTitle, committeeBossName,
+        sex, committeeCount, notes (optional), members (employee_desc list, optional),
+        pdf (file paths relative to the PDF folder, optional)
+        Raises ValueError with a readable message for invalid rows
+        """
+        committee_no = row.get("committeeNo")
+        if committee_no is None or str(committee_no).strip() == "":
+            raise ValueError("committeeNo is required")
+        committee_no = str(committee_no).strip().removesuffix(".0")  # Excel gives 15.0
+
+        committee_date = ArchiveImportService._parseDate(row.get("committeeDate"))
+        if committee_date is None:
+            raise ValueError("committeeDate is required")
+
+        for field in ("committeeTitle", "committeeBossName"):
+            if not row.get(field):
+                raise ValueError(f"{field} is required")
+
+        committee_count = row.get("committeeCount")
+        if committee_count is not None:
+            try:
+                committee_count = int(float(str(committee_count)))
+            except ValueError:
+                raise ValueError(f"committeeCount '{committee_count}' is not a number")
+
+        members = []
+        for value in ArchiveImportService._splitList(row.get("members")):
+            try:
+                members.append(int(float(value)))
+            except ValueError:
+                raise ValueError(f"member '{value}' is not an employee number")
+
+        return {
+            "committeeNo": committee_no,
+            "committeeDate": committee_date,
+            "committeeTitle": str(row["committeeTitle"]),
+            "committeeBossName": str(row["committeeBossName"]),
+            "sex": str(row["sex"]) if row.get("sex") is not None else None,
+            "committeeCount": committee_count,
+            "notes": str(row["notes"]) if row.get("notes") is not None else None,
+            "members": list(dict.fromkeys(members)),
+            "pdfFiles": ArchiveImportService._splitList(row.get("pdf"))
+        }
+
+
+    @staticmethod
+    def indexPdfTree(pdf_root: Path) -> Dict[Tuple[str, str], List[Path]]:
+        """
+        Walk the scanned-PDF folder once and index files by (committeeNo, year)
+
+        Files in each bucket are sorted by path so page/part order is stable
+        """
+        index: Dict[Tuple[str, str], List[Path]] = {}
+        for directory, _, filenames in os.walk(pdf_root):
+            for filename in filenames:
+                if not filename.lower().endswith(".pdf"):
+                    continue
+                match = ArchiveImportService.PDF_NAME_PATTERN.match(filename)
+                if match:
+                    index.setdefault((match["no"], match["year"]), []).append(Path(directory) / filename)
+
+        for paths in index.values():
+            paths.sort()
+        return index
+
+
+    @staticmethod
+    def loadCheckpoint(checkpoint_path: Optional[Path], source_name: str) -> int:
+        """Last committed sheet row for this source file (0 when there is nothing to resume)"""
+        if not checkpoint_path or not checkpoint_path.is_file():
+            return 0
+        with open(checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("source") != source_name:
+            logger.warning(f"Checkpoint {checkpoint_path} belongs to {checkpoint.get('source')}, starting over")
+            return 0
+        return int(checkpoint.get("lastRow", 0))
+
+
+    @staticmethod
+    def saveCheckpoint(checkpoint_path: Optional[Path], source_name: str, last_row: int, report: Dict[str, Any]) -> None:
+        """Atomically record progress, so a crash never leaves a half-written checkpoint"""
+        if not checkpoint_path:
+            return
+        checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = checkpoint_path.with_name(checkpoint_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "source": source_name,
+                "lastRow": last_row,
+                "committeesCreated": report["committeesCreated"],
+                "pdfsCopied": report["pdfsCopied"],
+                "updatedAt": datetime.now().isoformat(timespec="seconds")
+            }, f)
+        os.replace(tmp_path, checkpoint_path)
+
+
+    @staticmethod
+    async def importArchive(
+        db: AsyncSession,
+        rows: Iterator[Tuple[int, Dict[str, Any]]],
+        source_name: str,
+        pdf_root: Path,
+        userID: Optional[int],
+        checkpoint_path: Optional[Path] = None,
+        chunk_size: int = CHUNK_SIZE,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Import legacy committees and their scanned PDFs from a stream of (row number, row dict) tuples
+
+        Steps:
+        1. Index the PDF folder once and read the checkpoint
+        2. Pull the next chunk of rows (off the event loop), skipping rows already imported
+        3. Validate rows and resolve member employee numbers with one IN query
+        4. Hash and copy matched PDFs in a thread pool
+        5. Insert committees, junction rows and PDF rows as batched statements
+        6. Commit the chunk, move staged blobs into place (committees whose blob could not
+           be stored are deleted again and reported as failed rows), move the checkpoint forward
+
+        A database failure stops the import; files copied for that chunk are removed
+        and the checkpoint still points at the last committed chunk, so the run can be resumed.
+        """
+        started = time.perf_counter()
+        report = {
+            "rowsRead": 0,
+            "skippedByCheckpoint": 0,
+            "committeesCreated": 0,
+            "membersLinked": 0,
+            "pdfsCopied": 0,
+            "duplicatePdfs": 0,
+            "unknownEmployees": 0,
+            "failed": 0,
+            "errors": [],
+            "aborted": None
+        }
+
+        def add_error(row_number: int, message: str):
+            report["failed"] += 1
+            if len(report["errors"]) < ArchiveImportService.MAX_REPORTED_ERRORS:
+                report["errors"].append({"row": row_number, "error": message})
+
+        # Step 1: One walk of the folder tree, one checkpoint read
+        pdf_index = await asyncio.to_thread(ArchiveImportService.indexPdfTree, pdf_root)
+        resume_after = ArchiveImportService.loadCheckpoint(checkpoint_path, source_name)
+        if resume_after:
+            logger.info(f"Resuming archive import of {source_name} after row {resume_after}")
+
+        current_date = datetime.today().strftime('%Y-%m-%d')
+        seen_hashes: Dict[str, str] = {}
+        chunks = iter_chunks(rows, chunk_size)
+
+        with ThreadPoolExecutor(max_workers=ArchiveImportService.COPY_WORKERS) as executor:
+            while True:
+                # Step 2: Parsing is CPU work, keep it in a worker thread
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                report["rowsRead"] += len(chunk)
+                last_row = chunk[-1][0]
+
+                pending = [(row_number, row) for row_number, row in chunk if row_number > resume_after]
+                report["skippedByCheckpoint"] += len(chunk) - len(pending)
+                if not pending:
+                    continue
+
+                # Step 3: Validate rows and locate their files
+                records: List[Tuple[int, Dict[str, Any], List[Path]]] = []
+                for row_number, row in pending:
+                    try:
+                        record = ArchiveImportService.parseArchiveRow(row)
+                        sources = ArchiveImportService._matchPdfFiles(record, pdf_root, pdf_index)
+                    except ValueError as e:
+                        add_error(row_number, str(e))
+                        continue
+                    records.append((row_number, record, sources))
+
+                copied_paths: List[str] = []
+                try:
+                    employee_ids = await ArchiveImportService._resolveEmployeeNumbers(
+                        db, [number for _, record, _ in records for number in record["members"]]
+                    )
+
+                    # Step 4: Hash and copy files for the whole chunk concurrently
+                    loop = asyncio.get_running_loop()
+                    copy_jobs = [
+                        loop.run_in_executor(
+                            executor, ArchiveImportService._copyScan,
+                            source, record["committeeNo"], record["committeeDate"], count
+                        )
+                        for _, record, sources in records
+                        for count, source in enumerate(sources)
+                    ]
+                    copy_results = await asyncio.gather(*copy_jobs, return_exceptions=True)
+                    copied_paths.extend(result["written"] for result in copy_results if not isinstance(result, Exception))
+
+                    results_iter = iter(copy_results)
+                    ready = []
+                    for row_number, record, sources in records:
+                        file_results = [next(results_iter) for _ in sources]
+                        failures = [result for result in file_results if isinstance(result, Exception)]
+                        if failures:
+                            add_error(row_number, f"File error: {str(failures[0])}")
+                            await asyncio.to_thread(
+                                ArchiveImportService._removeFiles,
+                                [result["written"] for result in file_results if not isinstance(result, Exception)]
+                            )
+                            continue
+                        ready.append((row_number, record, file_results))
+
+                    # Content-addressed scans: identical files share one blob
+                    staged_blobs = [f for _, _, file_results in ready for f in file_results if "staged" in f]
+                    if staged_blobs:
+                        blob_paths = await PDFBlobService.addReferences(db, [(f["hash"], f["size"]) for f in staged_blobs])
+                        for f in staged_blobs:
+                            f["path"] = blob_paths[f["hash"]]
+
+                    # Step 5: Batched inserts for the chunk
+                    if ready:
+                        inserted = await db.execute(
+                            insert(Committee).returning(Committee.id, sort_by_parameter_order=True),
+                            [
+                                {
+                                    **{key: value for key, value in record.items() if key not in ("members", "pdfFiles")},
+                                    "currentDate": current_date,
+                                    "userID": userID
+                                }
+                                for _, record, _ in ready
+                            ]
+                        )
+                        committee_ids = list(inserted.scalars().all())
+
+                        junction_rows = []
+                        pdf_rows = []
+                        duplicates = 0
+                        unknown = 0
+                        for (_, record, file_results), committee_id in zip(ready, committee_ids):
+                            for number in record["members"]:
+                                if number in employee_ids:
+                                    junction_rows.append(
+                                        {"committeeID": committee_id, "empID": employee_ids[number], "createdBy": userID}
+                                    )
+                                else:
+                                    unknown += 1
+                            for count, f in enumerate(file_results):
+                                if f["hash"] in seen_hashes:
+                                    duplicates += 1
+                                    logger.info(f"Scan for committee {record['committeeNo']} has the same content as {seen_hashes[f['hash']]}")
+                                pdf_rows.append({
+                                    "committeeID": committee_id,
+                                    "committeeNo": record["committeeNo"],
+                                    "countPdf": count + 1,
+                                    "pdf": f["path"],
+                                    "userID": userID,
+                                    "currentDate": current_date,
+                                    "blobHash": f["hash"] if "staged" in f else None
+                                })
+
+                        if junction_rows:
+                            await db.execute(insert(JunctionCommitteeEmployee), junction_rows)
+                        if pdf_rows:
+                            await db.execute(insert(PDFTable), pdf_rows)
+
+                    # Step 6: Commit, then move the checkpoint forward
+                    await db.commit()
+
+                except Exception as e:
+                    await db.rollback()
+                    logger.error(f"Archive import chunk ending at row {last_row} failed: {str(e)}", exc_info=True)
+                    await asyncio.to_thread(ArchiveImportService._removeFiles, copied_paths)
+                    report["aborted"] = f"Database error near row {pending[0][0]}: {str(e)}"
+                    break
+
+                unplaced = await asyncio.to_thread(PDFBlobService.publishStagedFiles, staged_blobs)
+                links_undone = pdfs_undone = 0
+                if unplaced:
+                    #  Their rows point at a missing file: delete those committees again and report the rows
+                    unplaced_ids = {id(f) for f in unplaced}
+                    undo = {
+                        committee_id: (row_number, record, file_results)
+                        for (row_number, record, file_results), committee_id in zip(ready, committee_ids)
+                        if any(id(f) in unplaced_ids for f in file_results)
+                    }
+                    undo_error = None
+                    try:
+                        await PDFService.deleteCommitteesWithPdfsMethod(db, list(undo))
+                    except Exception as e:
+                        logger.error(f"Could not remove committees {list(undo)} after their PDFs failed to store: {str(e)}", exc_info=True)
+                        undo_error = str(e)
+                    for committee_id, (row_number, record, file_results) in undo.items():
+                        if undo_error:
+                            add_error(row_number, f"PDF could not be stored and committee {committee_id} could not be removed: {undo_error}")
+                        else:
+                            add_error(row_number, "PDF could not be stored, the committee was not created")
+                        links_undone += sum(1 for number in record["members"] if number in employee_ids)
+                        pdfs_undone += len(file_results)
+                    undone_rows = {row_number for row_number, _, _ in undo.values()}
+                    ready = [entry for entry in ready if entry[0] not in undone_rows]
+
+                if ready:
+                    report["committeesCreated"] += len(ready)
+                    report["membersLinked"] += len(junction_rows) - links_undone
+                    report["pdfsCopied"] += len(pdf_rows) - pdfs_undone
+                    report["duplicatePdfs"] += duplicates
+                    report["unknownEmployees"] += unknown
+                    for f in (result for _, _, file_results in ready for result in file_results):
+                        seen_hashes.setdefault(f["hash"], f["path"])
+
+                await asyncio.to_thread(
+                    ArchiveImportService.saveCheckpoint, checkpoint_path, source_name, last_row, report
+                )
+
+                logger.info(
+                    f"Archive import progress: read={report['rowsRead']} created={report['committeesCreated']} "
+                    f"pdfs={report['pdfsCopied']} failed={report['failed']}"
+                )
+                if on_progress:
+                    on_progress({k: v for k, v in report.items() if k != "errors"})
+
+        report["elapsedSeconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+
+    @staticmethod
+    def _parseDate(value: Any) -> Optional[str]:
+        if value is None:
+            return None
+        if isinstance(value, (datetime, date)):  # openpyxl returns real dates for date cells
+            return value.strftime("%Y-%m-%d")
+        text = str(value).strip()
+        for date_format in ArchiveImportService.DATE_FORMATS:
+            try:
+                return datetime.strptime(text, date_format).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+        raise ValueError(f"committeeDate '{value}' is not a valid date")
+
+
+    @staticmethod
+    def _splitList(value: Any) -> List[str]:
+        if value is None:
+            return []
+        return [part.strip() for part in ArchiveImportService.LIST_SEPARATORS.split(str(value)) if part.strip()]
+
+
+    @staticmethod
+    def _matchPdfFiles(
+        record: Dict[str, Any],
+        pdf_root: Path,
+        pdf_index: Dict[Tuple[str, str], List[Path]]
+    ) -> List[Path]:
+        """Explicit pdf column wins; otherwise match scans by committee number and year"""
+        if record["pdfFiles"]:
+            root = pdf_root.resolve()
+            sources = []
+            for name in record["pdfFiles"]:
+                source = (pdf_root / name).resolve()
+                if not source.is_relative_to(root):
+                    raise ValueError(f"Invalid file path: {name}")
+                if not source.is_file():
+                    raise ValueError(f"PDF file not found: {name}")
+                sources.append(source)
+            return sources
+
+        return pdf_index.get((record["committeeNo"], record["committeeDate"][:4]), [])
+
+
+    @staticmethod
+    async def _resolveEmployeeNumbers(db: AsyncSession, numbers: List[int]) -> Dict[int, int]:
+        """Map employee numbers (employee_desc) to empID with one IN query per 2000 numbers"""
+        mapping: Dict[int, int] = {}
+        for batch in iter_chunks(list(dict.fromkeys(numbers)), ArchiveImportService.IN_CLAUSE_SIZE):
+            result = await db.execute(
+                select(Employee.employee_desc, Employee.empID).where(Employee.employee_desc.in_(batch))
+            )
+            for employee_desc, emp_id in result.fetchall():
+                mapping.setdefault(employee_desc, emp_id)
+        return mapping
+
+
+    @staticmethod
+    def _copyScan(source: Path, committee_no: str, committee_date: str, count: int) -> Dict[str, Any]:
+        """
+        Copy one scan into the upload folder, hashing it on the way
+        With PDF_DEDUP_ENABLED it is staged and its blob path decided in the transaction;
+        "written" is the file to remove if the chunk fails
+        """
+        if settings.PDF_DEDUP_ENABLED:
+            staged_path, digest, size = stage_file_copy(str(source), settings.PDF_UPLOAD_PATH)
+            return {"written": str(staged_path), "staged": staged_path, "hash": digest, "size": size}
+
+        dest_path = build_pdf_destination(committee_no, committee_date, count, settings.PDF_UPLOAD_PATH)
+        staged_path, digest, _ = stage_file_copy(str(source), settings.PDF_UPLOAD_PATH)
+        try:
+            #  FileExistsError: another row claimed the same name in the same second; never delete its file
+            get_pdf_storage().put_file(staged_path, str(dest_path), overwrite=False)
+        except BaseException:
+            staged_path.unlink(missing_ok=True)
+            raise
+        return {"written": str(dest_path), "path": str(dest_path), "hash": digest}
+
+
+    @staticmethod
+    def _removeFiles(paths: List[str]) -> None:
+        for path in paths:
+            try:
+                remove_written_file(path)
+            except Exception as e:
+                logger.warning(f"Could not remove {path} after failed archive import: {str(e)}")
@@ -1,12 +1,14 @@
+import asyncio
 from datetime import date, datetime
 import os
 from typing import Any, Dict, List, Optional
 from fastapi import HTTPException, Request, UploadFile
 from pydantic import BaseModel
-from sqlalchemy import delete, desc, func, select
+from sqlalchemy import delete, desc, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from urllib.parse import unquote
-from app.helper.save_pdf import save_pdf_to_server
+from app.helper.save_pdf import discard_staged_pdf, stage_upload
+from app.helper.versioning import format_etag
 from app.models.PDFTable import PDFCreate, PDFResponse, PDFTable
 from app.models.committee import Committee, CommitteeCreate, CommitteeResponse
 from app.models.employee import CommitteeResponseWithEmployees, Employee, EmployeeInCommitteeResponse
@@ -14,7 +16,12 @@ from app.models.junction_committee_employee import JunctionCommitteeEmployee
 from app.models.users import Users
 import logging
 from app.database.config import settings
+from app.services.committeeMembers import CommitteeMembersService
 from app.services.pdf import PDFService
+from app.services.pdfBlob import PDFBlobService
+from app.services.pdfOptimize import PDFOptimizeService
+from app.services.pdfText import PDFTextService
+from app.services.uploadSession import UploadSessionService
 
 
 
@@ -29,72 +36,134 @@ if not logger.handlers:  # Avoid duplicate handlers
 
 class CommitteeService:
     @staticmethod
-    async def insertCommitteesDocsData(
-        db: AsyncSession, 
+    async def createCommitteeWithPdf(
+        db: AsyncSession,
         committeeCreateArgs: CommitteeCreate,
-        userID: int
-    ) -> int:
+        userID: int,
+        file: Optional[UploadFile] = None,
+        upload_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Insert new committee and link employees as members
+        Create a committee, its members and its first PDF as one unit of work
         
         Steps:
-        1. Create committee record
-        2. Link employees to committee via junction table
-        3. Return new committee ID
+        1. Stage the upload (or the completed resumable upload_id) under PDF_UPLOAD_PATH
+           before the transaction starts
+        2. Create committee record and link its members (flush only)
+        3. Add the PDF record; a new committee has no PDFs yet, so this is file number 1
+        4. Commit once
+        5. Rename the staged file to its final name
+        6. Queue the optional optimization stage (PDF_OPTIMIZE_ENABLED) and text extraction
+        
+        Any failure before the commit rolls back and discards the staged file,
+        so no committee is left without its PDF
         """
+        upload_dir = settings.PDF_UPLOAD_PATH
+
+        # Step 1: Disk write (and content hash) happens off the event loop and outside the transaction
+        if upload_id:
+            staged_path, digest, size = await UploadSessionService.stageSession(upload_id, upload_dir)
+        else:
+            staged_path, digest, size = await stage_upload(file, upload_dir)
+
         try:
-            # Step 1: Create committee record
-            logger.info(f"Creating committee: {committeeCreateArgs.committeeNo}")
-            
-            # Extract employee IDs before creating committee
-            employee_ids = committeeCreateArgs.employeeIDs or []
-            
-            # Create committee dict without employeeIDs
-            committee_data = committeeCreateArgs.model_dump(exclude={'employeeIDs'})
-            new_committee = Committee(**committee_data)
-            
-            db.add(new_committee)
-            await db.flush()  #  Flush to get ID without committing
-            
-            logger.info(f"Committee created with ID: {new_committee.id}")
-            
-            # Step 2: Link employees to committee
-            if employee_ids:
-                logger.info(f"Adding {len(employee_ids)} employees to committee {new_committee.id}")
-                
-                for emp_id in employee_ids:
-                    # Verify employee exists
-                    emp_stmt = select(Employee).where(Employee.empID == emp_id)
-                    emp_result = await db.execute(emp_stmt)
-                    employee = emp_result.scalar_one_or_none()
-                    
-                    if not employee:
-                        logger.warning(f"Employee ID {emp_id} not found, skipping")
-                        continue
-                    
-                    # Create junction record
-                    junction_record = JunctionCommitteeEmployee(
-                        committeeID=new_committee.id,
-                        empID=emp_id,
-                        createdBy=userID
-                    )
-                    db.add(junction_record)
-                    logger.info(f"Added employee {employee.name} (ID: {emp_id}) to committee")
-            
-            # Step 3: Commit transaction
+            # Step 2: Committee plus members
+            insert_result = await CommitteeService._addCommitteeWithMembers(db, committeeCreateArgs, userID)
+            new_committee_id = insert_result["committeeID"]
+
+            # Step 3: Final path is known up front, no count query for a committee that was just created
+            pdf_count = 0
+            dest_path, blob_hash = await PDFService.reserve_pdf_path(
+                db,
+                committeeCreateArgs.committeeNo,
+                committeeCreateArgs.committeeDate,
+                pdf_count,
+                digest,
+                size
+            )
+            pdf_row = PDFService.stage_pdf(db, PDFCreate(
+                committeeID=new_committee_id,
+                committeeNo=committeeCreateArgs.committeeNo,
+                countPdf=pdf_count + 1,
+                pdf=str(dest_path),
+                userID=userID,
+                currentDate=datetime.now().date(),
+                blobHash=blob_hash
+            ))
+
+            # Step 4: One commit for committee, members and PDF row
             await db.commit()
-            await db.refresh(new_committee)
-            
-            logger.info(f"Successfully created committee {new_committee.id} with {len(employee_ids)} members")
-            
-            return new_committee.id
-            
+
         except Exception as e:
             await db.rollback()
+            await asyncio.to_thread(discard_staged_pdf, staged_path)
             logger.error(f"Error creating committee: {str(e)}", exc_info=True)
             raise
-    
 
+        # Step 5: Publish the file under its final name
+        try:
+            await asyncio.to_thread(PDFService.publish_staged_pdf, staged_path, dest_path, blob_hash)
+        except Exception as e:
+            # Undo the committed rows so the committee is not left pointing at a missing file
+            logger.error(f"Could not finalize PDF for committee {new_committee_id}: {str(e)}", exc_info=True)
+            await PDFBlobService.releaseReferences(db, [blob_hash])
+            await db.execute(delete(PDFTable).where(PDFTable.committeeID == new_committee_id))
+            await db.execute(delete(JunctionCommitteeEmployee).where(JunctionCommitteeEmployee.committeeID == new_committee_id))
+            await db.execute(delete(Committee).where(Committee.id == new_committee_id))
+            await db.commit()
+            await asyncio.to_thread(discard_staged_pdf, staged_path)
+            raise
+
+        logger.info(
+            f"Created committee {new_committee_id} with {len(insert_result['memberIDs'])} members "
+            f"and PDF {dest_path}"
+        )
+        PDFOptimizeService.schedule(pdf_row.id)
+        PDFTextService.schedule(pdf_row.id)
+        if upload_id:
+            await UploadSessionService.deleteSession(upload_id)
+
+        return {
+            **insert_result,
+            "pdfCount": pdf_count + 1,
+            "pdf": str(dest_path)
+        }
+
+
+    @staticmethod
+    async def _addCommitteeWithMembers(
+        db: AsyncSession,
+        committeeCreateArgs: CommitteeCreate,
+        userID: int
+    ) -> Dict[str, Any]:
+        """Add the committee row and its member links to the current transaction (no commit)"""
+        logger.info(f"Creating committee: {committeeCreateArgs.committeeNo}")
+        
+        # Extract employee IDs before creating committee
+        employee_ids = committeeCreateArgs.employeeIDs or []
+        
+        # Create committee dict without employeeIDs
+        committee_data = committeeCreateArgs.model_dump(exclude={'employeeIDs'})
+        new_committee = Committee(**committee_data)
+        
+        db.add(new_committee)
+        await db.flush()  #  Flush to get ID without committing
+        
+        logger.info(f"Committee created with ID: {new_committee.id}")
+        
+        # Validate all employee IDs at once (duplicates collapsed)
+        member_ids, skipped_ids = await CommitteeMembersService.resolveEmployeeIDs(db, employee_ids)
+        if skipped_ids:
+            logger.warning(f"Employee IDs {skipped_ids} not found, skipping")
+        
+        # Link employees to committee
+        await CommitteeMembersService.insertMembers(db, new_committee.id, member_ids, userID)
+        
+        return {
+            "committeeID": new_committee.id,
+            "memberIDs": member_ids,
+            "skippedEmployeeIDs": skipped_ids
+        }
     
 
     @staticmethod
@@ -546,6 +615,9 @@ class CommitteeService:
                 for pdf, user in pdfs
             ]
 
+            #  The viewer opens these next, serve them without another lookup
+            PDFService.cache_pdf_files((pdf.id, pdf.pdf, pdf.blobHash) for pdf, _ in pdfs)
+
             # Fetch committee owner's username
             committee_user = None
             if committee.userID:
@@ -593,6 +665,7 @@ class CommitteeService:
                 currentDate=converted_current_date,
                 userID=committee.userID,
                 username=committee_user.username if committee_user else None,
+                version=format_etag(committee.rowVersion),
                 pdfFiles=pdf_responses,
                 employees=employee_responses  # ✅ Include employees
             )
@@ -611,7 +684,8 @@ class CommitteeService:
         db: AsyncSession,
         id: int,
         update_data: Dict[str, Any],
-        employee_ids: Optional[List[int]] = None  #  Optional employee IDs
+        employee_ids: Optional[List[int]] = None,  #  Optional employee IDs
+        expected_versions: Optional[List[bytes]] = None  #  From If-Match
     ) -> Dict[str, Any]:
         """
         Update a committee record without file upload
@@ -621,9 +695,12 @@ class CommitteeService:
             id: Committee ID
             update_data: Dictionary of committee fields to update
             employee_ids: Optional list of employee IDs
-                - If provided: Update junction table (replace all employees)
+                - If provided: Update junction table to exactly these employees
+                  (only added/removed members are written)
                 - If None: Leave employees unchanged
                 - If empty list []: Remove all employees
+            expected_versions: rowversions from If-Match; 412 if the row changed since
+            upload_id: Resumable upload session to attach; kept until the update commits
         
         Returns:
             Dictionary with updated committee data and employee count
@@ -633,71 +710,19 @@ class CommitteeService:
             print(f"Update data: {update_data}")
             print(f"Employee IDs: {employee_ids}")
             
-            # Step 1: Check if committee exists
-            stmt = select(Committee).where(Committee.id == id)
-            result = await db.execute(stmt)
-            existing_record = result.scalar_one_or_none()
-            
-            if not existing_record:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Committee with ID {id} not found"
-                )
-            
-            # Step 2: Update committee fields
-            if update_data:
-                for key, value in update_data.items():
-                    if hasattr(existing_record, key):
-                        setattr(existing_record, key, value)
-                        logger.info(f"Updated {key} = {value}")
+            # Step 1 & 2: Version check, update and read-back in one statement
+            updated_row = await CommitteeService._updateCommitteeRow(db, id, update_data, expected_versions)
             
-            #  Step 3: Update employee associations if provided
+            #  Step 3: Update employee associations if provided (diff against current members)
             employee_count = None
+            membership_changes = None
             if employee_ids is not None:
                 logger.info(f"Updating employees for committee {id}")
-                
-                # Step 3a: Delete all existing employee associations
-                delete_stmt = delete(JunctionCommitteeEmployee).where(
-                    JunctionCommitteeEmployee.committeeID == id
+                userID = updated_row.userID
+                membership_changes = await CommitteeMembersService.syncMembers(
+                    db, id, employee_ids, userID
                 )
-                delete_result = await db.execute(delete_stmt)
-                deleted_count = delete_result.rowcount
-                logger.info(f"Deleted {deleted_count} existing employee associations")
-                
-                # Step 3b: Insert new employee associations
-                if employee_ids:  # Only if list is not empty
-                    # Validate that all employee IDs exist
-                    valid_emp_stmt = select(Employee.empID).where(
-                        Employee.empID.in_(employee_ids)
-                    )
-                    valid_emp_result = await db.execute(valid_emp_stmt)
-                    valid_emp_ids = [row[0] for row in valid_emp_result.fetchall()]
-                    
-                    # Check for invalid IDs
-                    invalid_ids = set(employee_ids) - set(valid_emp_ids)
-                    if invalid_ids:
-                        await db.rollback()
-                        raise HTTPException(
-                            status_code=400,
-                            detail=f"Invalid employee IDs: {list(invalid_ids)}"
-                        )
-
-                    userID = update_data.get('userID') or existing_record.userID
-
-                    # Insert new associations
-                    for emp_id in employee_ids:
-                        junction_entry = JunctionCommitteeEmployee(
-                            committeeID=id,
-                            empID=emp_id,
-                            createdBy=userID
-                        )
-                        db.add(junction_entry)
-                    
-                    logger.info(f"Added {len(employee_ids)} new employee associations")
-                    employee_count = len(employee_ids)
-                else:
-                    logger.info("Removed all employee associations (empty array provided)")
-                    employee_count = 0
+                employee_count = membership_changes["memberCount"]
             else:
                 # Step 3c: If employee_ids is None, count existing employees
                 count_stmt = select(JunctionCommitteeEmployee).where(
@@ -707,26 +732,17 @@ class CommitteeService:
                 employee_count = len(count_result.scalars().all())
                 logger.info(f"Employee associations unchanged, current count: {employee_count}")
             
-            # Step 4: Commit all changes
+            # Step 4: Commit all changes (no refresh, OUTPUT already returned the new values)
             await db.commit()
-            await db.refresh(existing_record)
             
             logger.info(f"Successfully updated committee ID {id}")
             
             # Step 5: Return updated data
-            response_data = {
-                "id": existing_record.id,
-                "committeeNo": existing_record.committeeNo,
-                "committeeDate": existing_record.committeeDate.isoformat() if existing_record.committeeDate else None,
-                "committeeTitle": existing_record.committeeTitle,
-                "committeeBossName": existing_record.committeeBossName,
-                "sex": existing_record.sex,
-                "committeeCount": existing_record.committeeCount,
-                "notes": existing_record.notes,
-                "currentDate": existing_record.currentDate.isoformat() if existing_record.currentDate else None,
-                "userID": existing_record.userID,
-                "employeeCount": employee_count  #  Include employee count
-            }
+            response_data = CommitteeService._committeeRowToDict(updated_row)
+            response_data.update({
+                "employeeCount": employee_count,  #  Include employee count
+                "membershipChanges": membership_changes
+            })
             
             return response_data
             
@@ -750,9 +766,11 @@ class CommitteeService:
         db: AsyncSession,
         id: int,
         update_data: Dict[str, Any],
-        file: UploadFile,
+        file: Optional[UploadFile],
         username: Optional[str] = None,
-        employee_ids: Optional[List[int]] = None  #  NEW: Optional employee IDs
+        employee_ids: Optional[List[int]] = None,  #  NEW: Optional employee IDs
+        expected_versions: Optional[List[bytes]] = None,  #  From If-Match
+        upload_id: Optional[str] = None  #  Completed resumable upload, used instead of file
     ) -> Dict[str, Any]:
         """
         Update a committee record with file upload
@@ -761,12 +779,15 @@ class CommitteeService:
             db: Database session
             id: Committee ID
             update_data: Dictionary of committee fields to update
-            file: PDF file to upload
+            file: PDF file to upload (None when upload_id is given)
             username: Username for file saving
             employee_ids: Optional list of employee IDs
-                - If provided: Update junction table (replace all employees)
+                - If provided: Update junction table to exactly these employees
+                  (only added/removed members are written)
                 - If None: Leave employees unchanged
                 - If empty list []: Remove all employees
+            expected_versions: rowversions from If-Match; 412 if the row changed since
+            upload_id: Resumable upload session to attach; kept until the update commits
         
         Returns:
             Dictionary with updated committee data, file info, and employee count
@@ -776,53 +797,44 @@ class CommitteeService:
             print(f"Update data: {update_data}")
             print(f"Employee IDs: {employee_ids}")
             
-            # Step 1: Check if committee exists
-            stmt = select(Committee).where(Committee.id == id)
-            result = await db.execute(stmt)
-            existing_record = result.scalar_one_or_none()
-            
-            if not existing_record:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Committee with ID {id} not found"
-                )
-            
-            # Step 2: Get userID
-            userID = update_data.get('userID') or existing_record.userID
-            
-            # Step 3: Get committeeNo and committeeDate (for file naming)
-            committee_no = update_data.get('committeeNo') or existing_record.committeeNo
-            committee_date = update_data.get('committeeDate') or existing_record.committeeDate
-            
-            # Validate required fields for file upload
-            if not committee_no:
-                raise HTTPException(
-                    status_code=400,
-                    detail="committeeNo is required for file upload"
-                )
-            if not committee_date:
-                raise HTTPException(
-                    status_code=400,
-                    detail="committeeDate is required for file upload"
-                )
-            
-            # Convert date to string format YYYY-MM-DD
-            if isinstance(committee_date, date):
-                committee_date_str = committee_date.isoformat()
+            # Step 1: Stage and hash the file before any row is locked (a slow client holds no locks)
+            if upload_id:
+                staged_path, digest, size = await UploadSessionService.stageSession(upload_id, settings.PDF_UPLOAD_PATH)
             else:
-                committee_date_str = str(committee_date)
-            
-            # Step 4: Save the file
-            file_path = None
+                staged_path, digest, size = await stage_upload(file, settings.PDF_UPLOAD_PATH)
             try:
+                # Step 2: Version check, update and read-back in one statement (404 / 412 discard the staged file)
+                updated_row = await CommitteeService._updateCommitteeRow(db, id, update_data, expected_versions)
+                
+                # Step 3: Get userID, committeeNo and committeeDate (for file naming)
+                userID = updated_row.userID
+                committee_no = updated_row.committeeNo
+                committee_date = updated_row.committeeDate
+                
+                # Validate required fields for file upload
+                if not committee_no:
+                    raise HTTPException(
+                        status_code=400,
+                        detail="committeeNo is required for file upload"
+                    )
+                if not committee_date:
+                    raise HTTPException(
+                        status_code=400,
+                        detail="committeeDate is required for file upload"
+                    )
+                
+                # Convert date to string format YYYY-MM-DD
+                if isinstance(committee_date, date):
+                    committee_date_str = committee_date.isoformat()
+                else:
+                    committee_date_str = str(committee_date)
+                
+                # Step 4: Add the PDF record (the staged file is published after the commit)
                 count = await PDFService.get_pdf_count(db, id)
-                file_path = save_pdf_to_server(
-                    source_file=file.file,
-                    committeeNo=committee_no,
-                    committeeDate=committee_date_str,
-                    count=count,
-                    dest_dir=settings.PDF_UPLOAD_PATH
+                dest_path, blob_hash = await PDFService.reserve_pdf_path(
+                    db, committee_no, committee_date_str, count, digest, size
                 )
+                file_path = str(dest_path)
                 
                 # Insert PDF record
                 pdf_data = PDFCreate(
@@ -831,107 +843,74 @@ class CommitteeService:
                     countPdf=count + 1,
                     pdf=file_path,
                     userID=userID,
-                    currentDate=datetime.now().date().isoformat()
+                    currentDate=datetime.now().date().isoformat(),
+                    blobHash=blob_hash
                 )
-                await PDFService.insert_pdf(db, pdf_data)
-                logger.info(f"Successfully saved PDF for committee ID {id}")
+                pdf_row = PDFService.stage_pdf(db, pdf_data)
+                logger.info(f"PDF for committee ID {id} will be stored at {file_path}")
+                
+                #  Step 5 (committee fields) already ran in Step 2
+                
+                #  Step 6: Update employee associations if provided (diff against current members)
+                employee_count = None
+                membership_changes = None
+                if employee_ids is not None:
+                    logger.info(f"Updating employees for committee {id}")
+                    membership_changes = await CommitteeMembersService.syncMembers(
+                        db, id, employee_ids, userID
+                    )
+                    employee_count = membership_changes["memberCount"]
+                else:
+                    # Step 6c: If employee_ids is None, count existing employees
+                    count_stmt = select(JunctionCommitteeEmployee).where(
+                        JunctionCommitteeEmployee.committeeID == id
+                    )
+                    count_result = await db.execute(count_stmt)
+                    employee_count = len(count_result.scalars().all())
+                    logger.info(f"Employee associations unchanged, current count: {employee_count}")
+                
+                # Step 7: Commit all changes (no refresh, OUTPUT already returned the new values)
+                await db.commit()
                 
             except FileExistsError as e:
+                await asyncio.to_thread(discard_staged_pdf, staged_path)
                 raise HTTPException(
                     status_code=409,
                     detail=str(e)
                 )
+            except BaseException:
+                await asyncio.to_thread(discard_staged_pdf, staged_path)
+                raise
+            
+            # Step 7b: Publish the staged file; if that fails, drop the PDF row that points at it
+            try:
+                await asyncio.to_thread(PDFService.publish_staged_pdf, staged_path, dest_path, blob_hash)
             except Exception as e:
                 logger.error(f"Error saving file: {str(e)}")
+                await db.execute(delete(PDFTable).where(PDFTable.id == pdf_row.id))
+                await PDFBlobService.releaseReferences(db, [blob_hash])
+                await db.commit()
+                PDFService.forget_pdf_files([pdf_row.id])
+                await asyncio.to_thread(discard_staged_pdf, staged_path)
                 raise HTTPException(
-                    status_code=500,
-                    detail=f"Error saving file: {str(e)}"
-                )
-            
-            # Step 5: Update committee fields
-            if update_data:
-                for key, value in update_data.items():
-                    if hasattr(existing_record, key):
-                        setattr(existing_record, key, value)
-                        logger.info(f"Updated {key} = {value}")
-            
-            #  Step 6: Update employee associations if provided
-            employee_count = None
-            if employee_ids is not None:
-                logger.info(f"Updating employees for committee {id}")
-                
-                # Step 6a: Delete all existing employee associations
-                delete_stmt = delete(JunctionCommitteeEmployee).where(
-                    JunctionCommitteeEmployee.committeeID == id
-                )
-                delete_result = await db.execute(delete_stmt)
-                deleted_count = delete_result.rowcount
-                logger.info(f"Deleted {deleted_count} existing employee associations")
-                
-                # Step 6b: Insert new employee associations
-                if employee_ids:  # Only if list is not empty
-                    # Validate that all employee IDs exist
-                    valid_emp_stmt = select(Employee.empID).where(
-                        Employee.empID.in_(employee_ids)
-                    )
-                    valid_emp_result = await db.execute(valid_emp_stmt)
-                    valid_emp_ids = [row[0] for row in valid_emp_result.fetchall()]
-                    
-                    # Check for invalid IDs
-                    invalid_ids = set(employee_ids) - set(valid_emp_ids)
-                    if invalid_ids:
-                        await db.rollback()
-                        raise HTTPException(
-                            status_code=400,
-                            detail=f"Invalid employee IDs: {list(invalid_ids)}"
-                        )
-                    
-                    # Insert new associations
-                    for emp_id in employee_ids:
-                        junction_entry = JunctionCommitteeEmployee(
-                            committeeID=id,
-                            empID=emp_id,
-                            createdBy=userID
-                            
-                        )
-                        db.add(junction_entry)
-                    
-                    logger.info(f"Added {len(employee_ids)} new employee associations")
-                    employee_count = len(employee_ids)
-                else:
-                    logger.info("Removed all employee associations (empty array provided)")
-                    employee_count = 0
-            else:
-                # Step 6c: If employee_ids is None, count existing employees
-                count_stmt = select(JunctionCommitteeEmployee).where(
-                    JunctionCommitteeEmployee.committeeID == id
+                    status_code=409 if isinstance(e, FileExistsError) else 500,
+                    detail=str(e) if isinstance(e, FileExistsError) else f"Error saving file: {str(e)}"
                 )
-                count_result = await db.execute(count_stmt)
-                employee_count = len(count_result.scalars().all())
-                logger.info(f"Employee associations unchanged, current count: {employee_count}")
-            
-            # Step 7: Commit all changes
-            await db.commit()
-            await db.refresh(existing_record)
             
             logger.info(f"Successfully updated committee ID {id} with file")
+            PDFOptimizeService.schedule(pdf_row.id)
+            PDFTextService.schedule(pdf_row.id)
+            if upload_id:
+                await UploadSessionService.deleteSession(upload_id)
             
             # Step 8: Return updated data
-            response_data = {
-                "id": existing_record.id,
-                "committeeNo": existing_record.committeeNo,
-                "committeeDate": existing_record.committeeDate.isoformat() if existing_record.committeeDate else None,
-                "committeeTitle": existing_record.committeeTitle,
-                "committeeBossName": existing_record.committeeBossName,
-                "sex": existing_record.sex,
-                "committeeCount": existing_record.committeeCount,
-                "notes": existing_record.notes,
-                "currentDate": existing_record.currentDate.isoformat() if existing_record.currentDate else None,
-                "userID": existing_record.userID,
+            response_data = CommitteeService._committeeRowToDict(updated_row)
+            response_data.update({
                 "file_saved": True,
                 "file_path": file_path,
-                "employeeCount": employee_count  #   employee count
-            }
+                "employeeCount": employee_count,  #   employee count
+                "membershipChanges": membership_changes
+            })
             
             return response_data
             
@@ -950,6 +929,71 @@ class CommitteeService:
 
 
         
+    @staticmethod
+    async def _updateCommitteeRow(
+        db: AsyncSession,
+        id: int,
+        update_data: Dict[str, Any],
+        expected_versions: Optional[List[bytes]] = None
+    ) -> Any:
+        """
+        UPDATE the committee and get its new values back in the same round trip (OUTPUT inserted.*)
+
+        With expected_versions the row is only written while its rowversion still matches,
+        so two users editing the same committee cannot overwrite each other silently
+        Raises 404 if the committee does not exist, 412 if it was changed by someone else
+        """
+        values = {key: value for key, value in update_data.items() if key in Committee.__table__.c}
+        if not values:
+            # Membership-only edits still touch the row, so they get a new version too
+            values = {"committeeNo": Committee.committeeNo}
+
+        stmt = (
+            update(Committee)
+            .where(Committee.id == id)
+            .values(**values)
+            .returning(*Committee.__table__.c)
+            .execution_options(synchronize_session=False)
+        )
+        if expected_versions:
+            stmt = stmt.where(Committee.rowVersion.in_(expected_versions))
+
+        result = await db.execute(stmt)
+        updated_row = result.first()
+
+        if updated_row is None:
+            exists = await db.execute(select(Committee.id).where(Committee.id == id))
+            if exists.first() is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Committee with ID {id} not found"
+                )
+            raise HTTPException(
+                status_code=412,
+                detail="Committee was changed by another user; reload it and try again"
+            )
+
+        logger.info(f"Updated committee {id}: {list(values)}")
+        return updated_row
+
+
+    @staticmethod
+    def _committeeRowToDict(row: Any) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "committeeNo": row.committeeNo,
+            "committeeDate": row.committeeDate.isoformat() if row.committeeDate else None,
+            "committeeTitle": row.committeeTitle,
+            "committeeBossName": row.committeeBossName,
+            "sex": row.sex,
+            "committeeCount": row.committeeCount,
+            "notes": row.notes,
+            "currentDate": row.currentDate.isoformat() if row.currentDate else None,
+            "userID": row.userID,
+            "version": format_etag(row.rowVersion)
+        }
+
+
     @staticmethod
     async def getBossNameSuggestions(
         db: AsyncSession,
@@ -0,0 +1,258 @@
+# services/committeeBulk.py
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.config import settings
+from app.helper.pdf_storage import remove_written_file
+from app.helper.save_pdf import save_pdf_to_server, stage_file_copy
+from app.models.PDFTable import PDFTable
+from app.models.committee import Committee, CommitteeBulkItem
+from app.models.junction_committee_employee import JunctionCommitteeEmployee
+from app.services.committeeMembers import CommitteeMembersService
+from app.services.pdf import PDFService
+from app.services.pdfBlob import PDFBlobService
+
+logger = logging.getLogger(__name__)
+
+
+class CommitteeBulkService:
+    MAX_ITEMS = 500
+    COPY_CONCURRENCY = 4
+    REQUIRED_FIELDS = ("committeeNo", "committeeDate", "committeeTitle", "committeeBossName")
+
+    @staticmethod
+    async def createCommitteesBulk(
+        db: AsyncSession,
+        items: List[Dict[str, Any]],
+        userID: int
+    ) -> Dict[str, Any]:
+        """
+        Create many committees (members and PDFs included) in one transaction
+
+        Steps:
+        1. Validate every item, collecting per-item errors
+        2. Validate all employee IDs with one set-based query
+        3. Copy referenced source PDFs into the upload directory (thread pool)
+        4. Insert committees, junction rows and PDFTable rows as three batched statements
+        5. Commit once; remove copied files if the transaction fails
+        6. Move staged (content-addressed) PDFs to their blob paths
+        7. Delete the committees whose blob could not be stored (their rows point at a missing file)
+        """
+        if not items:
+            raise HTTPException(status_code=400, detail="No committees provided")
+        if len(items) > CommitteeBulkService.MAX_ITEMS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {CommitteeBulkService.MAX_ITEMS} committees per request"
+            )
+
+        results: List[Dict[str, Any]] = [{"index": i, "success": False} for i in range(len(items))]
+        current_date = datetime.today().strftime('%Y-%m-%d')
+
+        # Step 1: Validate items
+        valid: List[tuple] = []  # (index, CommitteeBulkItem, [source paths])
+        for index, raw_item in enumerate(items):
+            try:
+                item = CommitteeBulkItem.model_validate(raw_item)
+                missing = [field for field in CommitteeBulkService.REQUIRED_FIELDS if not getattr(item, field)]
+                if missing:
+                    raise ValueError(f"Missing required fields: {missing}")
+                sources = [CommitteeBulkService._resolveSourceFile(name) for name in item.pdfFiles or []]
+            except (ValidationError, ValueError) as e:
+                results[index]["error"] = str(e)
+                continue
+
+            item.userID = item.userID or userID
+            item.currentDate = item.currentDate or current_date
+            valid.append((index, item, sources))
+
+        saved_files: List[str] = []
+        committee_ids: List[int] = []
+        try:
+            # Step 2: One membership validation query for the whole request
+            all_employee_ids = [emp_id for _, item, _ in valid for emp_id in item.employeeIDs or []]
+            valid_ids, _ = await CommitteeMembersService.resolveEmployeeIDs(db, all_employee_ids)
+            valid_id_set = set(valid_ids)
+
+            # Step 3: Copy source PDFs before touching the database
+            semaphore = asyncio.Semaphore(CommitteeBulkService.COPY_CONCURRENCY)
+
+            async def copy_item_files(item: CommitteeBulkItem, sources: List[Path]) -> List[Dict[str, Any]]:
+                files = []
+                try:
+                    for count, source in enumerate(sources):
+                        async with semaphore:
+                            files.append(await asyncio.to_thread(
+                                CommitteeBulkService._copySourceFile,
+                                source, item.committeeNo, item.committeeDate, count
+                            ))
+                except Exception:
+                    # The item is dropped, so do not leave its partial copies behind
+                    await asyncio.to_thread(CommitteeBulkService._removeFiles, [f["written"] for f in files])
+                    raise
+                saved_files.extend(f["written"] for f in files)
+                return files
+
+            copied = await asyncio.gather(
+                *(copy_item_files(item, sources) for _, item, sources in valid),
+                return_exceptions=True
+            )
+
+            ready = []
+            for (index, item, _), pdf_files in zip(valid, copied):
+                if isinstance(pdf_files, Exception):
+                    results[index]["error"] = f"File error: {str(pdf_files)}"
+                    continue
+                ready.append((index, item, pdf_files))
+
+            # Content-addressed files: count blob references, identical scans share one blob
+            staged_blobs = [f for _, _, pdf_files in ready for f in pdf_files if f.get("hash")]
+            if staged_blobs:
+                blob_paths = await PDFBlobService.addReferences(db, [(f["hash"], f["size"]) for f in staged_blobs])
+                for f in staged_blobs:
+                    f["path"] = blob_paths[f["hash"]]
+
+            if ready:
+                # Step 4a: Committees in one INSERT ... OUTPUT inserted.id (ids come back in input order)
+                committee_rows = [item.model_dump(exclude={'employeeIDs', 'pdfFiles'}) for _, item, _ in ready]
+                inserted = await db.execute(
+                    insert(Committee).returning(Committee.id, sort_by_parameter_order=True),
+                    committee_rows
+                )
+                committee_ids = list(inserted.scalars().all())
+
+                # Step 4b: Junction rows and PDF rows, one batched insert each
+                junction_rows = []
+                pdf_rows = []
+                for (index, item, pdf_files), committee_id in zip(ready, committee_ids):
+                    member_ids = [emp_id for emp_id in dict.fromkeys(item.employeeIDs or []) if emp_id in valid_id_set]
+                    skipped_ids = [emp_id for emp_id in dict.fromkeys(item.employeeIDs or []) if emp_id not in valid_id_set]
+
+                    junction_rows.extend(
+                        {"committeeID": committee_id, "empID": emp_id, "createdBy": item.userID}
+                        for emp_id in member_ids
+                    )
+                    pdf_rows.extend(
+                        {
+                            "committeeID": committee_id,
+                            "committeeNo": item.committeeNo,
+                            "countPdf": count + 1,
+                            "pdf": f["path"],
+                            "userID": item.userID,
+                            "currentDate": current_date,
+                            "blobHash": f.get("hash")
+                        }
+                        for count, f in enumerate(pdf_files)
+                    )
+
+                    results[index].update({
+                        "success": True,
+                        "committeeID": committee_id,
+                        "committeeNo": item.committeeNo,
+                        "memberCount": len(member_ids),
+                        "skippedEmployeeIDs": skipped_ids,
+                        "pdfCount": len(pdf_files)
+                    })
+
+                if junction_rows:
+                    await db.execute(insert(JunctionCommitteeEmployee), junction_rows)
+                if pdf_rows:
+                    await db.execute(insert(PDFTable), pdf_rows)
+
+            # Step 5: Single commit for the whole batch
+            await db.commit()
+
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Bulk committee creation failed: {str(e)}", exc_info=True)
+            await asyncio.to_thread(CommitteeBulkService._removeFiles, saved_files)
+            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+        # Step 6: Move staged blobs into place now that their rows are committed
+        unplaced = await asyncio.to_thread(PDFBlobService.publishStagedFiles, staged_blobs)
+
+        # Step 7: Undo committees left pointing at a missing file
+        if unplaced:
+            await CommitteeBulkService._undoUnplaced(db, ready, committee_ids, unplaced, results)
+
+        created = sum(1 for result in results if result["success"])
+        logger.info(f"Bulk created {created} of {len(items)} committees")
+
+        return {
+            "created": created,
+            "failed": len(items) - created,
+            "results": results
+        }
+
+
+    @staticmethod
+    async def _undoUnplaced(
+        db: AsyncSession,
+        ready: List[tuple],
+        committee_ids: List[int],
+        unplaced: List[Dict[str, Any]],
+        results: List[Dict[str, Any]]
+    ) -> None:
+        """Delete the committed committees that own an unplaced blob (releasing their references) and mark them failed"""
+        unplaced_ids = {id(f) for f in unplaced}
+        undo: Dict[int, int] = {
+            committee_id: index
+            for (index, _, pdf_files), committee_id in zip(ready, committee_ids)
+            if any(id(f) in unplaced_ids for f in pdf_files)
+        }
+        undo_error = None
+        try:
+            await PDFService.deleteCommitteesWithPdfsMethod(db, list(undo))
+        except Exception as e:
+            logger.error(f"Could not remove committees {list(undo)} after their PDFs failed to store: {str(e)}", exc_info=True)
+            undo_error = str(e)
+        for committee_id, index in undo.items():
+            results[index] = {"index": index, "success": False, "committeeNo": results[index].get("committeeNo")}
+            if undo_error:
+                results[index].update(committeeID=committee_id, error=f"PDF could not be stored and the committee could not be removed: {undo_error}")
+            else:
+                results[index]["error"] = "PDF could not be stored, the committee was not created"
+
+
+    @staticmethod
+    def _resolveSourceFile(relative_path: str) -> Path:
+        """Resolve a file reference inside PDF_SOURCE_PATH, rejecting traversal and missing files"""
+        source = Path(settings.PDF_SOURCE_PATH) / relative_path
+        if not PDFService.is_safe_path(settings.PDF_SOURCE_PATH, str(source)):
+            raise ValueError(f"Invalid file path: {relative_path}")
+        if source.suffix.lower() != ".pdf" or not source.is_file():
+            raise ValueError(f"PDF file not found: {relative_path}")
+        return source.resolve()
+
+
+    @staticmethod
+    def _copySourceFile(source: Path, committee_no: str, committee_date: str, count: int) -> Dict[str, Any]:
+        """
+        Copy one source PDF. With PDF_DEDUP_ENABLED it is staged and hashed (its blob path is
+        decided in the transaction); otherwise it is written under its final name right away.
+        "written" is the file to remove if the batch fails.
+        """
+        if settings.PDF_DEDUP_ENABLED:
+            staged_path, digest, size = stage_file_copy(str(source), settings.PDF_UPLOAD_PATH)
+            return {"written": str(staged_path), "staged": staged_path, "hash": digest, "size": size}
+
+        #  Same committeeNo twice in one request (or two concurrent requests) must not share a name
+        with open(source, "rb") as f:
+            path = save_pdf_to_server(f, committee_no, committee_date, count, settings.PDF_UPLOAD_PATH, uuid.uuid4().hex[:12])
+        return {"written": path, "path": path}
+
+
+    @staticmethod
+    def _removeFiles(paths: List[str]) -> None:
+        for path in paths:
+            try:
+                remove_written_file(path)
+            except Exception as e:
+                logger.warning(f"Could not remove {path} after failed bulk insert: {str(e)}")
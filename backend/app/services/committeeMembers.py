@@ -0,0 +1,215 @@
+# services/committeeMembers.py
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.helper.tabular_reader import iter_chunks
+from app.models.committee import Committee
+from app.models.employee import Employee
+from app.models.junction_committee_employee import JunctionCommitteeEmployee
+
+logger = logging.getLogger(__name__)
+
+
+class CommitteeMembersService:
+    IN_CLAUSE_SIZE = 2000  # SQL Server allows 2100 parameters per statement
+
+    @staticmethod
+    async def resolveEmployeeIDs(
+        db: AsyncSession,
+        employee_ids: Iterable[int]
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Validate employee IDs with set-based queries
+
+        Returns:
+            (valid IDs in input order without duplicates, IDs that do not exist)
+        """
+        # Step 1: De-duplicate while keeping the caller's order
+        unique_ids = list(dict.fromkeys(employee_ids))
+        if not unique_ids:
+            return [], []
+
+        # Step 2: One IN query per 2000 IDs (a single query for any real committee)
+        existing = set()
+        for batch in iter_chunks(unique_ids, CommitteeMembersService.IN_CLAUSE_SIZE):
+            result = await db.execute(select(Employee.empID).where(Employee.empID.in_(batch)))
+            existing.update(result.scalars().all())
+
+        valid = [emp_id for emp_id in unique_ids if emp_id in existing]
+        skipped = [emp_id for emp_id in unique_ids if emp_id not in existing]
+        return valid, skipped
+
+
+    @staticmethod
+    async def insertMembers(
+        db: AsyncSession,
+        committee_id: int,
+        employee_ids: List[int],
+        created_by: Optional[int]
+    ) -> int:
+        """
+        Link employees to a committee with one batched INSERT (no commit)
+
+        employee_ids must already be validated and de-duplicated
+        """
+        if not employee_ids:
+            return 0
+
+        await db.execute(
+            insert(JunctionCommitteeEmployee),
+            [
+                {"committeeID": committee_id, "empID": emp_id, "createdBy": created_by}
+                for emp_id in employee_ids
+            ]
+        )
+        logger.info(f"Linked {len(employee_ids)} employees to committee {committee_id}")
+        return len(employee_ids)
+
+
+    @staticmethod
+    async def getMemberIDs(db: AsyncSession, committee_id: int) -> List[int]:
+        """Current member empIDs of a committee"""
+        result = await db.execute(
+            select(JunctionCommitteeEmployee.empID)
+            .where(JunctionCommitteeEmployee.committeeID == committee_id)
+        )
+        return list(result.scalars().all())
+
+
+    @staticmethod
+    async def removeMembers(db: AsyncSession, committee_id: int, employee_ids: List[int]) -> int:
+        """Unlink employees from a committee with one DELETE per 2000 IDs (no commit)"""
+        removed = 0
+        for batch in iter_chunks(employee_ids, CommitteeMembersService.IN_CLAUSE_SIZE):
+            result = await db.execute(
+                delete(JunctionCommitteeEmployee)
+                .where(JunctionCommitteeEmployee.committeeID == committee_id)
+                .where(JunctionCommitteeEmployee.empID.in_(batch))
+            )
+            removed += result.rowcount
+        if removed:
+            logger.info(f"Unlinked {removed} employees from committee {committee_id}")
+        return removed
+
+
+    @staticmethod
+    async def _addValidatedMembers(
+        db: AsyncSession,
+        committee_id: int,
+        employee_ids: List[int],
+        created_by: Optional[int]
+    ) -> None:
+        """Validate IDs that are about to be linked; 400 if any does not exist"""
+        valid_ids, invalid_ids = await CommitteeMembersService.resolveEmployeeIDs(db, employee_ids)
+        if invalid_ids:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid employee IDs: {invalid_ids}"
+            )
+        await CommitteeMembersService.insertMembers(db, committee_id, valid_ids, created_by)
+
+
+    @staticmethod
+    async def syncMembers(
+        db: AsyncSession,
+        committee_id: int,
+        employee_ids: List[int],
+        created_by: Optional[int]
+    ) -> Dict[str, Any]:
+        """
+        Make the committee's members equal to employee_ids, touching only the difference (no commit)
+
+        Members that stay keep their junction row, createdDate and createdBy;
+        new IDs are validated and inserted in one batch, dropped IDs deleted in one statement
+        """
+        # Step 1: Diff desired members against current rows
+        desired = list(dict.fromkeys(employee_ids))
+        current = set(await CommitteeMembersService.getMemberIDs(db, committee_id))
+        to_add = [emp_id for emp_id in desired if emp_id not in current]
+        to_remove = sorted(current - set(desired))
+
+        # Step 2: Apply only the changes
+        if to_add:
+            await CommitteeMembersService._addValidatedMembers(db, committee_id, to_add, created_by)
+        if to_remove:
+            await CommitteeMembersService.removeMembers(db, committee_id, to_remove)
+
+        logger.info(
+            f"Committee {committee_id} members: +{len(to_add)} -{len(to_remove)} "
+            f"(unchanged {len(current) - len(to_remove)})"
+        )
+
+        return {
+            "added": to_add,
+            "removed": to_remove,
+            "memberCount": len(desired)
+        }
+
+
+    @staticmethod
+    async def applyMembershipChanges(
+        db: AsyncSession,
+        committee_id: int,
+        add: List[int],
+        remove: List[int],
+        created_by: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        PATCH-style membership update: link the "add" IDs and unlink the "remove" IDs
+
+        IDs already in the requested state are ignored, so the call is idempotent
+        """
+        try:
+            # Step 1: Check if committee exists
+            committee_result = await db.execute(
+                select(Committee.id, Committee.userID).where(Committee.id == committee_id)
+            )
+            committee = committee_result.first()
+
+            if not committee:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Committee with ID {committee_id} not found"
+                )
+
+            conflicting = set(add) & set(remove)
+            if conflicting:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Employee IDs in both add and remove: {sorted(conflicting)}"
+                )
+
+            # Step 2: Diff the request against current rows
+            current = set(await CommitteeMembersService.getMemberIDs(db, committee_id))
+            to_add = [emp_id for emp_id in dict.fromkeys(add) if emp_id not in current]
+            to_remove = [emp_id for emp_id in dict.fromkeys(remove) if emp_id in current]
+
+            # Step 3: Apply in batched statements
+            if to_add:
+                await CommitteeMembersService._addValidatedMembers(
+                    db, committee_id, to_add, created_by or committee.userID
+                )
+            if to_remove:
+                await CommitteeMembersService.removeMembers(db, committee_id, to_remove)
+
+            # Step 4: Commit
+            await db.commit()
+
+            return {
+                "added": to_add,
+                "removed": to_remove,
+                "memberCount": len(current) + len(to_add) - len(to_remove)
+            }
+
+        except HTTPException:
+            await db.rollback()
+            raise
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error updating members of committee {committee_id}: {str(e)}", exc_info=True)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Database error: {str(e)}"
+            )
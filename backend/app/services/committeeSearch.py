@@ -10,6 +10,7 @@ import logging
 from app.database.database import get_async_db
 from app.models.committee import Committee, CommitteeResponse
 from app.models.committeeSearch import AutoSuggestionRequest, AutoSuggestionResponse, CommitteeSearchRequest, CommitteeSearchResponse
+from app.services.pdfText import PDFTextService
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -59,6 +60,12 @@ class CommitteeSearchService:
             committees = result.scalars().all()
             logger.info(f"Retrieved {len(committees)} records")
             
+            # Where the PDF text matched, for this page only
+            snippets = {}
+            terms = PDFTextService.searchTerms(search_request.q)
+            if terms and committees:
+                snippets = await PDFTextService.getSnippets(self.db, [c.id for c in committees], terms)
+            
             # Calculate pagination info
             total_pages = (total + search_request.page_size - 1) // search_request.page_size
             has_next = search_request.page < total_pages
@@ -71,7 +78,8 @@ class CommitteeSearchService:
                 page_size=search_request.page_size,
                 total_pages=total_pages,
                 has_next=has_next,
-                has_previous=has_previous
+                has_previous=has_previous,
+                snippets=snippets
             )
             
             logger.info(f"Returning response with {len(response.data)} items")
@@ -115,6 +123,12 @@ class CommitteeSearchService:
             filters.append(boss_filter)
             logger.info(f"Added committeeBossName filter: {search_request.committeeBossName.strip()}")
         
+        # Full text of the committee's PDFs (PDFText, filled by the extraction stage)
+        terms = PDFTextService.searchTerms(search_request.q)
+        if terms:
+            filters.append(Committee.id.in_(PDFTextService.matchingCommitteeIDs(terms)))
+            logger.info(f"Added PDF text filter: {terms}")
+        
         logger.info(f"Total filters applied: {len(filters)}")
         return filters
 
@@ -1,11 +1,12 @@
 # services/employee_service.py
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_, and_, cast, String
+from sqlalchemy import select, func, or_, and_, cast, String, desc
 from app.models.committee import Committee
 from app.models.employee import EmployeeSearchParams
 from  app.models.employee import Employee
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date, datetime
 import logging
 
 from app.models.junction_committee_employee import JunctionCommitteeEmployee
@@ -139,6 +140,46 @@ class EmployeeService:
             raise
     
     
+    @staticmethod
+    async def getEmployeesByIds(db: AsyncSession, emp_ids: List[int]) -> Dict[str, Any]:
+        """
+        Get many employees with a single IN query
+
+        Results follow the order of emp_ids (duplicates collapsed);
+        IDs that do not exist are returned in "missing"
+        """
+        try:
+            # Step 1: De-duplicate while keeping the caller's order
+            unique_ids = list(dict.fromkeys(emp_ids))
+
+            # Step 2: One query for the whole batch
+            stmt = select(Employee).where(Employee.empID.in_(unique_ids))
+            result = await db.execute(stmt)
+            employees_by_id = {emp.empID: emp for emp in result.scalars().all()}
+
+            # Step 3: Format response in input order
+            data = [
+                {
+                    "empID": emp.empID,
+                    "name": emp.name,
+                    "employee_desc": emp.employee_desc,
+                    "gender": emp.gender,
+                    "genderName": "ذكر" if emp.gender == 1 else "أنثى" if emp.gender == 2 else None
+                }
+                for emp in (employees_by_id.get(emp_id) for emp_id in unique_ids)
+                if emp is not None
+            ]
+            missing = [emp_id for emp_id in unique_ids if emp_id not in employees_by_id]
+
+            logger.info(f"Batch fetch: {len(data)} found, {len(missing)} missing")
+
+            return {"data": data, "missing": missing}
+
+        except Exception as e:
+            logger.error(f"Error getting employees {emp_ids}: {str(e)}", exc_info=True)
+            raise
+    
+    
     @staticmethod
     async def autocompleteEmployeeName(
         db: AsyncSession,
@@ -315,3 +356,207 @@ class EmployeeService:
                 status_code=500,
                 detail=f"Database error: {str(e)}"
             )
+
+
+
+    @staticmethod
+    def _parseDateWindow(
+        date_from: Optional[str],
+        date_to: Optional[str]
+    ) -> Tuple[Optional[date], Optional[date]]:
+        """Parse optional YYYY-MM-DD window bounds, raising 400 on bad input"""
+        try:
+            start_date = datetime.strptime(date_from, "%Y-%m-%d").date() if date_from else None
+            end_date = datetime.strptime(date_to, "%Y-%m-%d").date() if date_to else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+        if start_date and end_date and start_date > end_date:
+            raise HTTPException(status_code=400, detail="date_from cannot be after date_to")
+
+        return start_date, end_date
+
+
+
+    @staticmethod
+    async def getEmployeeCommitteesMethod(
+        db: AsyncSession,
+        emp_id: int,
+        cursor: Optional[int] = None,
+        limit: int = 20,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch the committees an employee belongs to, newest committee first
+
+        Uses keyset pagination on committeeID (served by ix_junction_emp_committee):
+        pass the returned nextCursor as cursor to get the following page
+        """
+        try:
+            start_date, end_date = EmployeeService._parseDateWindow(date_from, date_to)
+
+            # Step 1: Check if employee exists
+            employee_result = await db.execute(select(Employee).where(Employee.empID == emp_id))
+            employee = employee_result.scalar_one_or_none()
+
+            if not employee:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Employee with ID {emp_id} not found"
+                )
+
+            # Step 2: Seek into the junction index after the cursor
+            stmt = (
+                select(
+                    Committee.id,
+                    Committee.committeeNo,
+                    Committee.committeeDate,
+                    Committee.committeeTitle,
+                    Committee.committeeBossName,
+                    JunctionCommitteeEmployee.createdDate
+                )
+                .join(Committee, Committee.id == JunctionCommitteeEmployee.committeeID)
+                .where(JunctionCommitteeEmployee.empID == emp_id)
+            )
+            if cursor is not None:
+                stmt = stmt.where(JunctionCommitteeEmployee.committeeID < cursor)
+            if start_date:
+                stmt = stmt.where(Committee.committeeDate >= start_date)
+            if end_date:
+                stmt = stmt.where(Committee.committeeDate <= end_date)
+
+            # Fetch one extra row to know whether another page exists
+            stmt = stmt.order_by(desc(JunctionCommitteeEmployee.committeeID)).limit(limit + 1)
+            result = await db.execute(stmt)
+            rows = result.fetchall()
+
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            logger.info(f"Found {len(rows)} committees for employee {emp_id} (hasMore={has_more})")
+
+            # Step 3: Format response
+            data = [
+                {
+                    "id": row.id,
+                    "committeeNo": row.committeeNo,
+                    "committeeDate": row.committeeDate.strftime("%Y-%m-%d") if row.committeeDate else None,
+                    "committeeTitle": row.committeeTitle,
+                    "committeeBossName": row.committeeBossName,
+                    "memberSince": row.createdDate.isoformat() if row.createdDate else None
+                }
+                for row in rows
+            ]
+
+            return {
+                "employee": {
+                    "empID": employee.empID,
+                    "name": employee.name,
+                    "employee_desc": employee.employee_desc
+                },
+                "data": data,
+                "count": len(data),
+                "nextCursor": data[-1]["id"] if has_more else None,
+                "hasMore": has_more
+            }
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching committees for employee {emp_id}: {str(e)}", exc_info=True)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Database error: {str(e)}"
+            )
+
+
+
+    @staticmethod
+    async def getEmployeesWorkloadMethod(
+        db: AsyncSession,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        top: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Aggregate committee memberships per employee over a committeeDate window
+
+        Returns overall membership totals plus the top-K busiest employees,
+        all computed in the database with GROUP BY queries
+        """
+        try:
+            start_date, end_date = EmployeeService._parseDateWindow(date_from, date_to)
+
+            # Step 1: Build the date window filter on committee.committeeDate
+            filters = []
+            if start_date:
+                filters.append(Committee.committeeDate >= start_date)
+            if end_date:
+                filters.append(Committee.committeeDate <= end_date)
+
+            # Step 2: Overall active membership counts in the window
+            totals_stmt = (
+                select(
+                    func.count().label("memberships"),
+                    func.count(func.distinct(JunctionCommitteeEmployee.empID)).label("employees"),
+                    func.count(func.distinct(JunctionCommitteeEmployee.committeeID)).label("committees")
+                )
+                .select_from(JunctionCommitteeEmployee)
+                .join(Committee, Committee.id == JunctionCommitteeEmployee.committeeID)
+                .where(*filters)
+            )
+            totals = (await db.execute(totals_stmt)).one()
+
+            # Step 3: Committees per employee, busiest first
+            committee_count = func.count(JunctionCommitteeEmployee.committeeID).label("committeeCount")
+            busiest_stmt = (
+                select(
+                    Employee.empID,
+                    Employee.name,
+                    Employee.employee_desc,
+                    committee_count,
+                    func.min(Committee.committeeDate).label("firstCommitteeDate"),
+                    func.max(Committee.committeeDate).label("lastCommitteeDate")
+                )
+                .select_from(JunctionCommitteeEmployee)
+                .join(Committee, Committee.id == JunctionCommitteeEmployee.committeeID)
+                .join(Employee, Employee.empID == JunctionCommitteeEmployee.empID)
+                .where(*filters)
+                .group_by(Employee.empID, Employee.name, Employee.employee_desc)
+                .order_by(desc(committee_count), Employee.name.asc())
+                .limit(top)
+            )
+            busiest_rows = (await db.execute(busiest_stmt)).fetchall()
+
+            # Step 4: Format response
+            busiest = [
+                {
+                    "empID": row.empID,
+                    "name": row.name,
+                    "employee_desc": row.employee_desc,
+                    "committeeCount": row.committeeCount,
+                    "firstCommitteeDate": row.firstCommitteeDate.strftime("%Y-%m-%d") if row.firstCommitteeDate else None,
+                    "lastCommitteeDate": row.lastCommitteeDate.strftime("%Y-%m-%d") if row.lastCommitteeDate else None
+                }
+                for row in busiest_rows
+            ]
+
+            return {
+                "dateFrom": start_date.isoformat() if start_date else None,
+                "dateTo": end_date.isoformat() if end_date else None,
+                "activeMemberships": totals.memberships,
+                "activeEmployees": totals.employees,
+                "committees": totals.committees,
+                "averageCommitteesPerEmployee": round(totals.memberships / totals.employees, 2) if totals.employees else 0,
+                "busiestEmployees": busiest
+            }
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error computing employee workload: {str(e)}", exc_info=True)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Database error: {str(e)}"
+            )
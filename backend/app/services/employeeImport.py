@@ -0,0 +1,180 @@
+# services/employeeImport.py
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import column, insert, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.helper.tabular_reader import iter_chunks
+from app.models.employee import Employee
+
+logger = logging.getLogger(__name__)
+
+
+class EmployeeImportService:
+    CHUNK_SIZE = 1000            # Rows validated and committed together
+    STATEMENT_ROWS = 600         # 3 params per row, SQL Server caps a statement at 2100 params
+    MAX_REPORTED_ERRORS = 500    # Keep the response small for badly formatted files
+
+    MALE_VALUES = {"1", "ذكر", "m", "male"}
+    FEMALE_VALUES = {"2", "أنثى", "انثى", "f", "female"}
+
+    @staticmethod
+    def parseEmployeeRow(row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate one sheet row and convert it to employee column values
+
+        Expected headers: name, employee_desc, gender (gender optional)
+        Raises ValueError with a readable message for invalid rows
+        """
+        name = row.get("name")
+        if not name:
+            raise ValueError("name is required")
+        name = str(name).strip()
+        if len(name) > 255:
+            raise ValueError("name is longer than 255 characters")
+
+        employee_desc = row.get("employee_desc")
+        if employee_desc is None or str(employee_desc).strip() == "":
+            raise ValueError("employee_desc is required")
+        try:
+            employee_desc = int(float(str(employee_desc).strip()))  # Excel gives 8504.0
+        except ValueError:
+            raise ValueError(f"employee_desc '{employee_desc}' is not a number")
+
+        gender = row.get("gender")
+        if gender is not None:
+            gender_value = str(gender).strip().lower().removesuffix(".0")
+            if gender_value in EmployeeImportService.MALE_VALUES:
+                gender = 1
+            elif gender_value in EmployeeImportService.FEMALE_VALUES:
+                gender = 2
+            else:
+                raise ValueError(f"gender '{gender}' is not valid (expected 1/2 or ذكر/أنثى)")
+
+        return {"name": name, "employee_desc": employee_desc, "gender": gender}
+
+
+    @staticmethod
+    async def importEmployees(
+        db: AsyncSession,
+        rows: Iterator[Tuple[int, Dict[str, Any]]],
+        chunk_size: int = CHUNK_SIZE,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Upsert employees from a stream of (row number, row dict) tuples
+
+        Steps:
+        1. Pull the next chunk of rows from the parser (off the event loop)
+        2. Validate rows, collecting per-row errors
+        3. Upsert the valid rows keyed on employee_desc with set-based statements
+        4. Commit the chunk and report progress
+        """
+        started = time.perf_counter()
+        report = {
+            "rowsRead": 0,
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "failed": 0,
+            "errors": []
+        }
+
+        def add_error(row_number: int, message: str):
+            report["failed"] += 1
+            if len(report["errors"]) < EmployeeImportService.MAX_REPORTED_ERRORS:
+                report["errors"].append({"row": row_number, "error": message})
+
+        chunks = iter_chunks(rows, chunk_size)
+
+        while True:
+            # Step 1: Parsing is CPU work, keep it in a worker thread
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            report["rowsRead"] += len(chunk)
+
+            # Step 2: Validate rows (last row wins when the same employee_desc repeats)
+            records: Dict[int, Tuple[int, Dict[str, Any]]] = {}
+            for row_number, row in chunk:
+                try:
+                    record = EmployeeImportService.parseEmployeeRow(row)
+                except ValueError as e:
+                    add_error(row_number, str(e))
+                    continue
+                records[record["employee_desc"]] = (row_number, record)
+
+            # Step 3 & 4: Upsert and commit the chunk
+            if records:
+                try:
+                    counts = await EmployeeImportService._upsertChunk(
+                        db, [record for _, record in records.values()]
+                    )
+                    await db.commit()
+                    for key in ("inserted", "updated", "unchanged"):
+                        report[key] += counts[key]
+                except Exception as e:
+                    await db.rollback()
+                    logger.error(f"Employee import chunk failed: {str(e)}", exc_info=True)
+                    for row_number, _ in records.values():
+                        add_error(row_number, f"Database error: {str(e)}")
+
+            logger.info(
+                f"Employee import progress: read={report['rowsRead']} inserted={report['inserted']} "
+                f"updated={report['updated']} failed={report['failed']}"
+            )
+            if on_progress:
+                on_progress({k: v for k, v in report.items() if k != "errors"})
+
+        report["elapsedSeconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+
+    @staticmethod
+    async def _upsertChunk(db: AsyncSession, records: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Insert new employees and update changed ones, one round trip per batch"""
+        # Step 1: Load the existing rows for this chunk with one IN query
+        keys = [record["employee_desc"] for record in records]
+        existing_result = await db.execute(
+            select(Employee.empID, Employee.employee_desc, Employee.name, Employee.gender)
+            .where(Employee.employee_desc.in_(keys))
+        )
+        existing_by_desc: Dict[int, List[Any]] = {}
+        for row in existing_result.fetchall():
+            existing_by_desc.setdefault(row.employee_desc, []).append(row)
+
+        # Step 2: Split into inserts, updates and untouched rows
+        to_insert: List[Dict[str, Any]] = []
+        to_update: List[Tuple[int, str, Optional[int]]] = []
+        unchanged = 0
+        for record in records:
+            matches = existing_by_desc.get(record["employee_desc"])
+            if not matches:
+                to_insert.append(record)
+                continue
+            for existing in matches:
+                if existing.name == record["name"] and existing.gender == record["gender"]:
+                    unchanged += 1
+                else:
+                    to_update.append((existing.empID, record["name"], record["gender"]))
+
+        # Step 3: UPDATE ... FROM (VALUES ...) so every changed row costs no extra round trip
+        for batch in iter_chunks(to_update, EmployeeImportService.STATEMENT_ROWS):
+            source = values(
+                column("empID", Employee.empID.type),
+                column("name", Employee.name.type),
+                column("gender", Employee.gender.type),
+                name="source"
+            ).data(batch)
+            await db.execute(
+                update(Employee)
+                .where(Employee.empID == source.c.empID)
+                .values(name=source.c.name, gender=source.c.gender)
+            )
+
+        # Step 4: Multi-row INSERT (SQLAlchemy batches it into INSERT ... VALUES pages)
+        if to_insert:
+            await db.execute(insert(Employee), to_insert)
+
+        return {"inserted": len(to_insert), "updated": len(to_update), "unchanged": unchanged}
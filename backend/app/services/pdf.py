@@ -1,17 +1,24 @@
 import logging
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func,delete
 # from app.helper.save_pdf import async_delayed_delete
-from app.helper.save_pdf import async_delayed_delete
+from app.helper.lru_cache import LRUCache
+from app.helper.tabular_reader import iter_chunks
+from app.helper.pdf_storage import get_pdf_storage
+from app.helper.save_pdf import build_pdf_destination
 from app.models.PDFTable import PDFTable, PDFCreate
+from app.models.PDFText import PDFText
 from pathlib import Path
 from app.database.config import settings
 import asyncio
 import asyncio
 from app.models.committee import Committee
+from app.models.junction_committee_employee import JunctionCommitteeEmployee
+from app.services.pdfBlob import PDFBlobService
+from app.services.pdfDeleteQueue import PDFDeleteQueueService
 
 
 
@@ -19,8 +26,13 @@ from app.models.committee import Committee
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+#  pdf_id -> (path, blobHash); rows never change after insert, only deletes invalidate
+_pdf_file_cache: LRUCache[Tuple[str, Optional[str]]] = LRUCache(settings.PDF_PATH_CACHE_SIZE, settings.PDF_PATH_CACHE_TTL)
+
 
 class PDFService:
+    IN_CLAUSE_SIZE = 2000  # SQL Server allows 2100 parameters per statement
+
     @staticmethod
     async def get_pdf_count(db: AsyncSession, id: int) -> int:
         """
@@ -42,9 +54,126 @@ class PDFService:
         await db.commit()
         await db.refresh(new_pdf)
         return new_pdf
+
+
+    @staticmethod
+    def stage_pdf(db: AsyncSession, pdf: PDFCreate) -> PDFTable:
+        """
+        Adds a PDF record to the current transaction without committing,
+        for callers that commit the whole unit of work themselves.
+        """
+        new_pdf = PDFTable(**pdf.model_dump())
+        db.add(new_pdf)
+        return new_pdf
     
 
 
+    @staticmethod
+    async def reserve_pdf_path(
+        db: AsyncSession,
+        committeeNo: str,
+        committeeDate: str,
+        count: int,
+        digest: str,
+        size: int
+    ) -> Tuple[Path, Optional[str]]:
+        """
+        Decide where a staged PDF will live, inside the caller's transaction.
+
+        With PDF_DEDUP_ENABLED the file is stored once per content hash and a blob
+        reference is counted; otherwise it gets the classic year/committeeNo.year.n name.
+
+        Returns:
+            (final path for PDFTable.pdf, blobHash or None)
+        """
+        if settings.PDF_DEDUP_ENABLED:
+            paths = await PDFBlobService.addReferences(db, [(digest, size)])
+            return Path(paths[digest]), digest
+
+        dest_path = await asyncio.to_thread(
+            build_pdf_destination, committeeNo, committeeDate, count, settings.PDF_UPLOAD_PATH
+        )
+        return dest_path, None
+
+
+    @staticmethod
+    def publish_staged_pdf(staged_path: Path, dest_path: Path, blob_hash: Optional[str]) -> str:
+        """
+        Move a staged PDF to the path chosen by reserve_pdf_path (after commit, blocking).
+
+        Goes through the storage backend: a rename on local disk, an upload with PDF_STORAGE_BACKEND=s3.
+        """
+        #  Blobs may be overwritten (same hash, same bytes), named files never
+        return get_pdf_storage().put_file(staged_path, str(dest_path), overwrite=bool(blob_hash))
+
+
+    @staticmethod
+    async def get_pdf_file_info(db: AsyncSession, pdf_id: int) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Path and blobHash of a PDF, from the in-process cache when possible.
+
+        Returns:
+            Optional[Tuple[str, Optional[str]]]: (path, blobHash), None if the record does not exist.
+        """
+        cached = _pdf_file_cache.get(pdf_id)
+        if cached is not None:
+            return cached
+
+        result = await db.execute(
+            select(PDFTable.pdf, PDFTable.blobHash).filter(PDFTable.id == pdf_id)
+        )
+        row = result.first()
+        if not row or not row.pdf:
+            return None
+
+        info = (row.pdf, row.blobHash)
+        _pdf_file_cache.set(pdf_id, info)
+        return info
+
+
+    @staticmethod
+    def cache_pdf_files(rows: Iterable[Tuple[int, str, Optional[str]]]) -> None:
+        """Warm the path cache with (id, path, blobHash) rows already loaded for another response."""
+        for pdf_id, path, blob_hash in rows:
+            if path:
+                _pdf_file_cache.set(pdf_id, (path, blob_hash))
+
+
+    @staticmethod
+    def forget_pdf_files(pdf_ids: Iterable[int]) -> None:
+        """Drop deleted PDFs from the path cache (call after the delete committed)."""
+        _pdf_file_cache.pop_many(pdf_ids)
+
+
+    @staticmethod
+    async def locate_pdf_file(db: AsyncSession, pdf_id: int) -> Optional[Tuple[str, os.stat_result, Optional[str]]]:
+        """
+        Located path, stat and blobHash of a PDF (rows not yet rewritten by the layout
+        migration are found in the other layout).
+
+        The path cache is per worker: another worker may have moved the row (e.g. to an
+        optimized blob) and the delete queue removed the old file, so a miss drops the
+        cached entry and reads the row once more before giving up.
+
+        Returns:
+            None if the record does not exist.
+        Raises:
+            FileNotFoundError: The record exists but its file does not.
+        """
+        for attempt in range(2):
+            pdf_record = await PDFService.get_pdf_file_info(db, pdf_id)
+            if not pdf_record:
+                return None
+            pdf_path, blob_hash = pdf_record
+            try:
+                located, stat_result = await asyncio.to_thread(get_pdf_storage().stat, pdf_path)
+                return located, stat_result, blob_hash
+            except FileNotFoundError:
+                PDFService.forget_pdf_files([pdf_id])
+                if attempt:
+                    raise
+
+
     @staticmethod
     async def delete_pdf_record(db: AsyncSession, id: int, pdf_path: str) -> bool:
         """
@@ -75,8 +204,10 @@ class PDFService:
 
             #print(f"pdf path... {pdf_path}")
 
-            if not os.path.exists(pdf_path):
-                logger.warning(f"No PDF file system directory: {pdf_path}")   # check for path in file system directory
+            try:
+                await asyncio.to_thread(get_pdf_storage().stat, pdf_path)
+            except FileNotFoundError:
+                logger.warning(f"No PDF file system directory: {pdf_path}")   # check for path in storage (disk or bucket)
                 return False
 
             if not pdf_record:
@@ -92,21 +223,24 @@ class PDFService:
                 logger.warning(f"PDF path mismatch: requested {requested_path}, found {stored_path}")
                 return False
 
-            # Step 4: Delete the record from PDFTable
+            # Step 4: Delete the record (and its blob reference) and queue the file in the same transaction
             delete_stmt = delete(PDFTable).filter(PDFTable.id == id)
             await db.execute(delete_stmt)
+            await db.execute(delete(PDFText).where(PDFText.pdfID == id))
+            if pdf_record.blobHash:
+                # Shared content: only the last reference removes the file
+                unreferenced = await PDFBlobService.releaseReferences(db, [pdf_record.blobHash])
+                await PDFDeleteQueueService.enqueue(db, blobs=unreferenced)
+                if not unreferenced:
+                    logger.debug(f"PDF blob {pdf_record.blobHash} still referenced, file kept")
+            else:
+                await PDFDeleteQueueService.enqueue(db, paths=[pdf_record.pdf])
             await db.commit()
+            PDFService.forget_pdf_files([id])
             logger.debug(f"Deleted PDFTable record with ID: {id}")
 
-            # Step 5: Delete the file from the filesystem
-            if os.path.exists(pdf_path):
-                # os.remove(pdf_path)
-                asyncio.create_task(async_delayed_delete(pdf_path, delay_sec=3))
-                logger.debug(f"Deleted PDF file from filesystem: {pdf_path}")
-            else:
-                logger.warning(f"PDF file not found on filesystem: {pdf_path}")
-                # Return True since DB deletion succeeded
-                return True
+            # Step 5: The delete queue worker unlinks the file after a short grace period
+            PDFDeleteQueueService.notify()
 
             return True
 
@@ -145,87 +279,21 @@ class PDFService:
         try:
             logger.info(f"Starting deletion process for committee ID: {committee_id}")
             
-            #  Step 1: Check if committee exists
-            committee_stmt = select(Committee).where(Committee.id == committee_id)
-            committee_result = await db.execute(committee_stmt)
-            committee = committee_result.scalar_one_or_none()
+            result = await PDFService.deleteCommitteesWithPdfsMethod(db, [committee_id])
             
-            if not committee:
+            #  Step 1: Check if committee existed
+            if committee_id in result["notFound"]:
                 logger.error(f"Committee ID {committee_id} not found")
                 raise HTTPException(status_code=404, detail="Committee not found")
             
-            # Store committee info for response
-            committee_no = committee.committeeNo
-            committee_title = committee.committeeTitle
-            
-            #  Step 2: Fetch all PDFs associated with this committee
-            pdf_stmt = select(PDFTable).where(PDFTable.committeeID == committee_id)
-            pdf_result = await db.execute(pdf_stmt)
-            pdfs = pdf_result.scalars().all()
-            
-            pdf_count = len(pdfs)
-            deleted_files = []
-            failed_files = []
-            
-            logger.info(f"Found {pdf_count} PDF files to delete for committee {committee_id}")
-            
-            #  Step 3: Delete PDF files from file system
-            for pdf in pdfs:
-                if pdf.pdf:  # pdf.pdf is the file path
-                    file_path = pdf.pdf
-                    
-                    try:
-                        # Check if file exists
-                        if os.path.exists(file_path):
-                            os.remove(file_path)
-                            deleted_files.append({
-                                "id": pdf.id,
-                                "path": file_path,
-                                "committeeNo": pdf.committeeNo
-                            })
-                            logger.info(f"Successfully deleted file: {file_path}")
-                        else:
-                            logger.warning(f"File not found: {file_path}")
-                            failed_files.append({
-                                "id": pdf.id,
-                                "path": file_path,
-                                "reason": "File not found"
-                            })
-                    except Exception as e:
-                        logger.error(f"Failed to delete file {file_path}: {str(e)}")
-                        failed_files.append({
-                            "id": pdf.id,
-                            "path": file_path,
-                            "reason": str(e)
-                        })
-            
-            #  Step 4: Delete PDF records from database
-            delete_pdf_stmt = delete(PDFTable).where(PDFTable.committeeID == committee_id)
-            await db.execute(delete_pdf_stmt)
-            logger.info(f"Deleted {pdf_count} PDF records from database")
-            
-            #  Step 5: Delete committee record from database
-            await db.delete(committee)
-            
-            #  Step 6: Commit all changes
-            await db.commit()
-            
-            logger.info(f"Successfully deleted committee ID {committee_id} with {pdf_count} PDFs")
+            details = result["committees"][0]
+            logger.info(f"Successfully deleted committee ID {committee_id} with {details['totalPdfs']} PDFs")
             
             #  Prepare response
             return {
                 "success": True,
-                "message": f"Committee '{committee_title}' and all associated PDFs deleted successfully",
-                "details": {
-                    "committeeId": committee_id,
-                    "committeeNo": committee_no,
-                    "committeeTitle": committee_title,
-                    "totalPdfs": pdf_count,
-                    "filesDeleted": len(deleted_files),
-                    "filesFailed": len(failed_files),
-                    "deletedFiles": deleted_files,
-                    "failedFiles": failed_files if failed_files else None
-                }
+                "message": f"Committee '{details['committeeTitle']}' and all associated PDFs deleted successfully",
+                "details": details
             }
             
         except HTTPException:
@@ -236,4 +304,116 @@ class PDFService:
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to delete committee: {str(e)}"
-            )        
\ No newline at end of file
+            )
+
+
+    @staticmethod
+    async def deleteCommitteesWithPdfsMethod(
+        db: AsyncSession,
+        committee_ids: List[int]
+    ) -> Dict[str, Any]:
+        """
+        Delete many committees with their PDFs and member links in one transaction
+
+        Steps:
+        1. Load the committees and their PDF rows
+        2. Set-based deletes: member links, PDF rows (and their extracted text), committees
+        3. Release blob references and queue the files, still in the same transaction
+        4. Commit once, then wake the delete queue (its thread pool unlinks the files)
+
+        Files are touched only after the commit, so a failed commit deletes nothing on disk
+        Returns: {"committees": [details per deleted committee], "notFound": [ids]}
+        """
+        ids = list(dict.fromkeys(committee_ids))
+
+        # Step 1: What exists, and its files
+        committees: Dict[int, Any] = {}
+        pdfs_by_committee: Dict[int, List[Any]] = {committee_id: [] for committee_id in ids}
+        for batch in iter_chunks(ids, PDFService.IN_CLAUSE_SIZE):
+            committee_result = await db.execute(
+                select(Committee.id, Committee.committeeNo, Committee.committeeTitle).where(Committee.id.in_(batch))
+            )
+            committees.update({row.id: row for row in committee_result.fetchall()})
+
+            pdf_result = await db.execute(
+                select(PDFTable.id, PDFTable.committeeID, PDFTable.committeeNo, PDFTable.pdf, PDFTable.blobHash)
+                .where(PDFTable.committeeID.in_(batch))
+            )
+            for pdf in pdf_result.fetchall():
+                pdfs_by_committee[pdf.committeeID].append(pdf)
+
+        found_ids = [committee_id for committee_id in ids if committee_id in committees]
+        not_found = [committee_id for committee_id in ids if committee_id not in committees]
+        pdfs = [pdf for committee_id in found_ids for pdf in pdfs_by_committee[committee_id]]
+        if not found_ids:
+            return {"committees": [], "notFound": not_found}
+
+        try:
+            # Step 2: Set-based deletes (children first)
+            for batch in iter_chunks(found_ids, PDFService.IN_CLAUSE_SIZE):
+                await db.execute(
+                    delete(JunctionCommitteeEmployee)
+                    .where(JunctionCommitteeEmployee.committeeID.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.execute(
+                    delete(PDFTable)
+                    .where(PDFTable.committeeID.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.execute(
+                    delete(PDFText)
+                    .where(PDFText.committeeID.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.execute(
+                    delete(Committee)
+                    .where(Committee.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+
+            # Step 3: Blob references and the delete queue
+            unreferenced = await PDFBlobService.releaseReferences(db, [pdf.blobHash for pdf in pdfs])
+            await PDFDeleteQueueService.enqueue(
+                db,
+                paths=[pdf.pdf for pdf in pdfs if not pdf.blobHash],
+                blobs=unreferenced
+            )
+
+            # Step 4: One commit for everything
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        PDFService.forget_pdf_files(pdf.id for pdf in pdfs)
+        PDFDeleteQueueService.notify()
+        logger.info(f"Deleted {len(found_ids)} committees with {len(pdfs)} PDFs, {len(not_found)} not found")
+
+        # Per committee summary (blobs still used by other committees are kept)
+        unreferenced_paths = {str(PDFBlobService.blobPath(digest)) for digest in unreferenced}
+        details = []
+        for committee_id in found_ids:
+            committee = committees[committee_id]
+            deleted_files = [
+                {
+                    "id": pdf.id,
+                    "path": pdf.pdf,
+                    "committeeNo": pdf.committeeNo,
+                    "shared": bool(pdf.blobHash) and pdf.pdf not in unreferenced_paths
+                }
+                for pdf in pdfs_by_committee[committee_id] if pdf.pdf
+            ]
+            details.append({
+                "committeeId": committee_id,
+                "committeeNo": committee.committeeNo,
+                "committeeTitle": committee.committeeTitle,
+                "totalPdfs": len(pdfs_by_committee[committee_id]),
+                "filesDeleted": len(deleted_files),
+                "filesFailed": 0,
+                "deletedFiles": deleted_files,
+                "failedFiles": None
+            })
+
+        return {"committees": details, "notFound": not_found}
+
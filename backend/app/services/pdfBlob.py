@@ -0,0 +1,171 @@
+# services/pdfBlob.py
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.config import settings
+from app.helper.pdf_storage import get_pdf_storage
+from app.helper.save_pdf import blob_relative_path
+from app.helper.tabular_reader import iter_chunks
+from app.models.PDFBlob import PDFBlob
+
+logger = logging.getLogger(__name__)
+
+
+class PDFBlobService:
+    IN_CLAUSE_SIZE = 2000  # SQL Server allows 2100 parameters per statement
+
+    @staticmethod
+    def blobPath(digest: str) -> Path:
+        return Path(settings.PDF_UPLOAD_PATH) / blob_relative_path(digest)
+
+
+    @staticmethod
+    async def lockBlobs(db: AsyncSession, digests: Iterable[str]) -> Set[str]:
+        """
+        Which of the digests have a PDFBlob row, locking them until the caller's transaction ends
+
+        UPDLOCK, HOLDLOCK also range-locks the hashes that are absent, so no other transaction
+        can delete, insert or re-count these blobs in between (SQL Server; other dialects run unhinted)
+        """
+        existing: Set[str] = set()
+        for batch in iter_chunks(list(digests), PDFBlobService.IN_CLAUSE_SIZE):
+            result = await db.execute(
+                select(PDFBlob.hash)
+                .with_hint(PDFBlob, "WITH (UPDLOCK, HOLDLOCK)", "mssql")
+                .where(PDFBlob.hash.in_(batch))
+            )
+            existing.update(result.scalars().all())
+        return existing
+
+
+    @staticmethod
+    async def addReferences(db: AsyncSession, blobs: Iterable[Tuple[str, int]]) -> Dict[str, str]:
+        """
+        Count one reference per (sha256, size) item, creating blob rows as needed (no commit)
+
+        The blob rows are locked first (lockBlobs), so a concurrent releaseReferences cannot
+        drop a row between the existence check and the increment. Existing blobs get
+        refCount += n with one UPDATE per distinct n, new blobs are inserted in one batch
+        Returns: sha256 -> blob path to store in PDFTable.pdf
+        """
+        counts: Dict[str, int] = {}
+        sizes: Dict[str, int] = {}
+        for digest, size in blobs:
+            counts[digest] = counts.get(digest, 0) + 1
+            sizes[digest] = size
+        if not counts:
+            return {}
+
+        # Step 1: Which blobs are already stored, locked until commit
+        existing = await PDFBlobService.lockBlobs(db, counts)
+
+        # Step 2: Bump counts of existing blobs (grouped by increment, normally all 1)
+        by_increment: Dict[int, List[str]] = {}
+        for digest in existing:
+            by_increment.setdefault(counts[digest], []).append(digest)
+        for increment, digests in by_increment.items():
+            for batch in iter_chunks(digests, PDFBlobService.IN_CLAUSE_SIZE):
+                await db.execute(
+                    update(PDFBlob)
+                    .where(PDFBlob.hash.in_(batch))
+                    .values(refCount=PDFBlob.refCount + increment)
+                    .execution_options(synchronize_session=False)
+                )
+
+        # Step 3: Insert the new ones
+        new_rows = [
+            {
+                "hash": digest,
+                "path": str(PDFBlobService.blobPath(digest)),
+                "size": sizes[digest],
+                "refCount": count
+            }
+            for digest, count in counts.items() if digest not in existing
+        ]
+        if new_rows:
+            await db.execute(insert(PDFBlob), new_rows)
+
+        if existing:
+            logger.info(f"Deduplicated {len(existing)} PDF blob(s), {len(new_rows)} new")
+
+        return {digest: str(PDFBlobService.blobPath(digest)) for digest in counts}
+
+
+    @staticmethod
+    async def releaseReferences(db: AsyncSession, digests: Iterable[str]) -> List[str]:
+        """
+        Drop one reference per digest (no commit); blob rows that reach zero are deleted
+
+        Returns the digests that are no longer referenced; queue their files in the same
+        transaction with PDFDeleteQueueService.enqueue(db, blobs=...)
+        """
+        counts: Dict[str, int] = {}
+        for digest in digests:
+            if digest:
+                counts[digest] = counts.get(digest, 0) + 1
+        if not counts:
+            return []
+
+        by_decrement: Dict[int, List[str]] = {}
+        for digest, count in counts.items():
+            by_decrement.setdefault(count, []).append(digest)
+        for decrement, batch_digests in by_decrement.items():
+            for batch in iter_chunks(batch_digests, PDFBlobService.IN_CLAUSE_SIZE):
+                await db.execute(
+                    update(PDFBlob)
+                    .where(PDFBlob.hash.in_(batch))
+                    .values(refCount=PDFBlob.refCount - decrement)
+                    .execution_options(synchronize_session=False)
+                )
+
+        unreferenced: List[str] = []
+        for batch in iter_chunks(list(counts), PDFBlobService.IN_CLAUSE_SIZE):
+            result = await db.execute(
+                select(PDFBlob.hash).where(PDFBlob.hash.in_(batch)).where(PDFBlob.refCount <= 0)
+            )
+            unreferenced.extend(result.scalars().all())
+
+        for batch in iter_chunks(unreferenced, PDFBlobService.IN_CLAUSE_SIZE):
+            await db.execute(
+                delete(PDFBlob)
+                .where(PDFBlob.hash.in_(batch))
+                .where(PDFBlob.refCount <= 0)
+                .execution_options(synchronize_session=False)
+            )
+
+        return unreferenced
+
+
+    @staticmethod
+    def publishStagedFiles(files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Move staged copies ({"staged": Path, "path": blob path}) into place after their rows
+        were committed (blocking, run in a thread)
+
+        Returns the items whose blob is still not stored (a copy of the same content that was
+        placed, or stored by an earlier upload, covers a failed one). Their rows point at a
+        missing file: the caller must undo them
+        """
+        storage = get_pdf_storage()
+        placed: Set[str] = set()
+        failed: List[Dict[str, Any]] = []
+        for f in files:
+            try:
+                storage.put_file(f["staged"], f["path"], overwrite=True)
+                placed.add(f["path"])
+            except Exception as e:
+                logger.error(f"Could not move staged PDF {f['staged']} to {f['path']}: {str(e)}")
+                Path(f["staged"]).unlink(missing_ok=True)
+                failed.append(f)
+
+        unplaced: List[Dict[str, Any]] = []
+        for f in failed:
+            if f["path"] in placed:
+                continue
+            try:
+                storage.stat(f["path"])
+            except Exception:
+                unplaced.append(f)
+        return unplaced
@@ -0,0 +1,99 @@
+# services/pdfBundle.py
+import logging
+import re
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.PDFTable import PDFTable
+from app.models.committee import Committee
+
+logger = logging.getLogger(__name__)
+
+
+class PDFBundleService:
+    MAX_FILES = 10000  # Larger requests must be narrowed down (a year of committees fits easily)
+    _UNSAFE_NAME_CHARS = re.compile(r'[\\/:*?"<>|]')
+
+    @staticmethod
+    async def getBundleFiles(
+        db: AsyncSession,
+        committeeID: Optional[int] = None,
+        committeeBossName: Optional[str] = None,
+        committeeDate_from: Optional[str] = None,
+        committeeDate_to: Optional[str] = None
+    ) -> List[Tuple[str, str]]:
+        """
+        PDFs selected by committee, boss name and/or committee date range, as
+        (path on disk, name inside the ZIP) ordered by committee date and number
+
+        ZIP layout: <year>/<committeeNo>/<committeeNo>-<countPdf>.pdf
+        """
+        # Step 1: Build filters (at least one, a bundle of everything is never intended)
+        filters = []
+        if committeeID is not None:
+            filters.append(Committee.id == committeeID)
+        if committeeBossName:
+            filters.append(Committee.committeeBossName == committeeBossName.strip())
+        if committeeDate_from or committeeDate_to:
+            try:
+                if committeeDate_from:
+                    filters.append(Committee.committeeDate >= datetime.strptime(committeeDate_from, "%Y-%m-%d").date())
+                if committeeDate_to:
+                    filters.append(Committee.committeeDate <= datetime.strptime(committeeDate_to, "%Y-%m-%d").date())
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+        if not filters:
+            raise HTTPException(
+                status_code=400,
+                detail="Give committeeID, committeeBossName or a committeeDate range"
+            )
+
+        # Step 2: One query for all matching PDFs (MAX_FILES + 1 to detect overflow)
+        result = await db.execute(
+            select(
+                PDFTable.id,
+                PDFTable.pdf,
+                PDFTable.countPdf,
+                Committee.committeeNo,
+                Committee.committeeDate
+            )
+            .join(Committee, PDFTable.committeeID == Committee.id)
+            .where(*filters)
+            .where(PDFTable.pdf.isnot(None))
+            .order_by(Committee.committeeDate, Committee.committeeNo, PDFTable.countPdf, PDFTable.id)
+            .limit(PDFBundleService.MAX_FILES + 1)
+        )
+        rows = result.fetchall()
+
+        if len(rows) > PDFBundleService.MAX_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"More than {PDFBundleService.MAX_FILES} PDFs match, narrow the filter"
+            )
+        if not rows:
+            raise HTTPException(status_code=404, detail="No PDFs match the filter")
+
+        # Step 3: Readable, unique names inside the archive
+        entries = []
+        used_names = set()
+        for row in rows:
+            committee_no = PDFBundleService._safeName(row.committeeNo or "unknown")
+            folder = PurePosixPath(str(row.committeeDate.year) if row.committeeDate else "undated", committee_no)
+            name = f"{committee_no}-{row.countPdf if row.countPdf else row.id}.pdf"
+            if str(folder / name) in used_names:
+                name = f"{committee_no}-{row.countPdf}-{row.id}.pdf"
+            arcname = str(folder / name)
+            used_names.add(arcname)
+            entries.append((row.pdf, arcname))
+
+        logger.info(f"PDF bundle with {len(entries)} file(s)")
+        return entries
+
+
+    @staticmethod
+    def _safeName(value: str) -> str:
+        return PDFBundleService._UNSAFE_NAME_CHARS.sub("_", value.strip()) or "_"
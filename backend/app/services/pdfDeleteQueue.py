@@ -0,0 +1,205 @@
+# services/pdfDeleteQueue.py
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import AsyncSessionLocal
+from app.helper.pdf_storage import get_pdf_storage
+from app.helper.tabular_reader import iter_chunks
+from app.models.PDFDeleteQueue import PDFDeleteQueue
+from app.services.pdfBlob import PDFBlobService
+
+logger = logging.getLogger(__name__)
+
+_wake = asyncio.Event()
+
+
+class PDFDeleteQueueService:
+    GRACE_SECONDS = 3          # Lets open viewers release the file before it is unlinked
+    BATCH_SIZE = 200           # Queue rows handled per round
+    POLL_SECONDS = 5           # Idle wait between rounds
+    UNLINK_WORKERS = 4         # Threads deleting files (os.remove, or DeleteObject with S3)
+    MAX_ATTEMPTS = 8           # After that a row stays in the queue as failed, see getBacklog
+    RETRY_BASE_SECONDS = 10    # Backoff 10s, 20s, 40s ... capped at RETRY_MAX_SECONDS
+    RETRY_MAX_SECONDS = 3600
+    IN_CLAUSE_SIZE = 2000      # SQL Server allows 2100 parameters per statement
+
+    @staticmethod
+    async def enqueue(db: AsyncSession, paths: Iterable[str] = (), blobs: Iterable[str] = ()) -> int:
+        """
+        Queue files for deletion in the caller's transaction (no commit)
+
+        Call notify() after the commit so the worker picks them up without waiting for the next poll
+        Args:
+            paths: Plain PDF files
+            blobs: Digests whose last reference was just released (PDFBlobService.releaseReferences)
+        """
+        not_before = datetime.now() + timedelta(seconds=PDFDeleteQueueService.GRACE_SECONDS)
+        rows = [{"path": path, "blobHash": None, "notBefore": not_before, "attempts": 0} for path in paths if path]
+        rows.extend(
+            {"path": str(PDFBlobService.blobPath(digest)), "blobHash": digest, "notBefore": not_before, "attempts": 0}
+            for digest in blobs if digest
+        )
+        if rows:
+            await db.execute(insert(PDFDeleteQueue), rows)
+        return len(rows)
+
+
+    @staticmethod
+    def notify() -> None:
+        _wake.set()
+
+
+    @staticmethod
+    async def runWorker() -> None:
+        """Single background loop draining the queue (started in the app lifespan)"""
+        logger.info("PDF delete queue worker started")
+        while True:
+            try:
+                handled = await PDFDeleteQueueService.drainOnce()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"PDF delete queue round failed: {str(e)}", exc_info=True)
+                handled = 0
+
+            if handled >= PDFDeleteQueueService.BATCH_SIZE:
+                continue  # More is due right now
+
+            _wake.clear()
+            try:
+                await asyncio.wait_for(_wake.wait(), timeout=PDFDeleteQueueService.POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+    @staticmethod
+    async def drainOnce(db: Optional[AsyncSession] = None) -> int:
+        """
+        Handle one batch of due queue rows
+
+        Steps:
+        1. Load due rows that have attempts left
+        2. Skip blobs that were stored again meanwhile (their file is in use); the check
+           locks their PDFBlob keys (PDFBlobService.lockBlobs) until the commit in step 4,
+           so an upload re-referencing a hash waits until its old file is gone
+        3. Unlink the rest in a thread pool; a file that is already gone counts as done
+        4. Delete finished rows, push failed ones back with a backoff
+
+        Returns the number of queue rows handled
+        """
+        if db is None:
+            async with AsyncSessionLocal() as session:
+                return await PDFDeleteQueueService.drainOnce(session)
+
+        # Step 1: Due rows
+        now = datetime.now()
+        result = await db.execute(
+            select(PDFDeleteQueue.id, PDFDeleteQueue.path, PDFDeleteQueue.blobHash, PDFDeleteQueue.attempts)
+            .where(PDFDeleteQueue.notBefore <= now)
+            .where(PDFDeleteQueue.attempts < PDFDeleteQueueService.MAX_ATTEMPTS)
+            .order_by(PDFDeleteQueue.notBefore)
+            .limit(PDFDeleteQueueService.BATCH_SIZE)
+        )
+        rows = result.fetchall()
+        if not rows:
+            return 0
+
+        # Step 2: Re-created blobs keep their file (locked through the unlink)
+        digests = list({row.blobHash for row in rows if row.blobHash})
+        live_blobs = await PDFBlobService.lockBlobs(db, digests)
+
+        to_unlink = [row for row in rows if row.blobHash not in live_blobs]
+        done_ids = [row.id for row in rows if row.blobHash in live_blobs]
+
+        # Step 3: Unlink off the event loop
+        errors = await asyncio.to_thread(PDFDeleteQueueService._unlinkBatch, [row.path for row in to_unlink])
+
+        # Step 4: Bookkeeping
+        failed = []
+        for row in to_unlink:
+            if row.path in errors:
+                failed.append((row, errors[row.path]))
+            else:
+                done_ids.append(row.id)
+
+        for batch in iter_chunks(done_ids, PDFDeleteQueueService.IN_CLAUSE_SIZE):
+            await db.execute(delete(PDFDeleteQueue).where(PDFDeleteQueue.id.in_(batch)))
+
+        for row, error in failed:
+            backoff = min(
+                PDFDeleteQueueService.RETRY_BASE_SECONDS * 2 ** row.attempts,
+                PDFDeleteQueueService.RETRY_MAX_SECONDS
+            )
+            await db.execute(
+                update(PDFDeleteQueue)
+                .where(PDFDeleteQueue.id == row.id)
+                .values(attempts=row.attempts + 1, lastError=error[:500], notBefore=now + timedelta(seconds=backoff))
+            )
+            logger.warning(f"Could not delete {row.path} (attempt {row.attempts + 1}): {error}")
+
+        await db.commit()
+
+        if done_ids:
+            logger.info(f"PDF delete queue: {len(done_ids)} done, {len(failed)} to retry")
+        return len(rows)
+
+
+    @staticmethod
+    async def getBacklog(db: AsyncSession, limit: int = 50) -> Dict[str, Any]:
+        """Queue size, oldest entry and the rows that keep failing"""
+        result = await db.execute(
+            select(
+                func.count(PDFDeleteQueue.id),
+                func.sum(case((PDFDeleteQueue.attempts >= PDFDeleteQueueService.MAX_ATTEMPTS, 1), else_=0)),
+                func.min(PDFDeleteQueue.createdDate)
+            )
+        )
+        total, given_up, oldest = result.one()
+
+        failing_result = await db.execute(
+            select(PDFDeleteQueue)
+            .where(PDFDeleteQueue.attempts > 0)
+            .order_by(PDFDeleteQueue.attempts.desc(), PDFDeleteQueue.id)
+            .limit(limit)
+        )
+        failing: List[Dict[str, Any]] = [
+            {
+                "id": row.id,
+                "path": row.path,
+                "attempts": row.attempts,
+                "lastError": row.lastError,
+                "nextAttempt": row.notBefore.isoformat() if row.attempts < PDFDeleteQueueService.MAX_ATTEMPTS else None
+            }
+            for row in failing_result.scalars().all()
+        ]
+
+        return {
+            "pending": (total or 0) - (given_up or 0),
+            "failedPermanently": given_up or 0,
+            "oldest": oldest.isoformat() if oldest else None,
+            "failing": failing
+        }
+
+
+    @staticmethod
+    def _unlinkBatch(paths: List[str]) -> Dict[str, str]:
+        """Remove files in parallel; returns {path: error} for the ones to retry"""
+        storage = get_pdf_storage()
+
+        def remove(path: str) -> Optional[str]:
+            try:
+                storage.delete(path)  # False when already gone, nothing left to do
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                #  OSError on disk, botocore errors for S3: retried with backoff
+                return str(e)
+            return None
+
+        with ThreadPoolExecutor(max_workers=PDFDeleteQueueService.UNLINK_WORKERS) as executor:
+            results = executor.map(remove, paths)
+            return {path: error for path, error in zip(paths, results) if error}
@@ -0,0 +1,220 @@
+# services/pdfOptimize.py
+import asyncio
+import logging
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.config import settings
+from app.database.database import AsyncSessionLocal
+from app.helper.pdf_optimize import optimization_available, optimize_pdf
+from app.helper.pdf_storage import get_pdf_storage, local_pdf_copy
+from app.helper.save_pdf import STAGING_DIR_NAME, discard_staged_pdf, hash_file
+from app.models.PDFTable import PDFTable
+from app.services.pdf import PDFService
+from app.services.pdfBlob import PDFBlobService
+from app.services.pdfDeleteQueue import PDFDeleteQueueService
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_tasks: Set[asyncio.Task] = set()  # Keeps scheduled jobs referenced until they finish
+_in_flight: Dict[str, asyncio.Future] = {}  # Blob hashes / paths being optimized right now
+
+
+class PDFOptimizeService:
+
+    @staticmethod
+    def schedule(pdf_id: int) -> None:
+        """Optimize a freshly uploaded PDF in the background (no-op unless PDF_OPTIMIZE_ENABLED and pikepdf is installed)"""
+        if not settings.PDF_OPTIMIZE_ENABLED or not optimization_available():
+            return
+        if not get_pdf_storage().is_local:
+            return  #  The file swap relies on an atomic rename in the upload folder
+        task = asyncio.create_task(PDFOptimizeService.optimizeStoredPdf(pdf_id))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+
+    @staticmethod
+    async def optimizeStoredPdf(pdf_id: int) -> Optional[Dict[str, int]]:
+        """Background variant of optimizePdf with its own session; failures are logged and the original stays"""
+        try:
+            async with AsyncSessionLocal() as db:
+                return await PDFOptimizeService.optimizePdf(db, pdf_id)
+        except Exception as e:
+            logger.error(f"Optimizing PDF {pdf_id} failed, keeping the original: {str(e)}", exc_info=True)
+            return None
+
+
+    @staticmethod
+    async def optimizePdf(db: AsyncSession, pdf_id: int) -> Optional[Dict[str, int]]:
+        """
+        Recompress and linearize one stored PDF, then record both sizes
+
+        Steps:
+        1. Load the row; rows that already have sizes are skipped
+        2. Optimize in a worker process (one job per file, concurrent callers wait for it)
+        3. Content-addressed rows: a smaller copy becomes a new blob (its own hash), and every
+           row of the old blob moves to it in one transaction; the old blob is released and
+           queued for deletion once unreferenced. Blob files are never rewritten in place,
+           so stored bytes always match PDFBlob.hash
+        4. Plain files: a smaller copy is swapped in atomically at the file's location
+        5. Record originalSize / optimizedSize
+
+        Returns: {"originalSize", "optimizedSize"} or None when nothing was done
+        """
+        # Step 1: Row to optimize
+        result = await db.execute(
+            select(PDFTable.pdf, PDFTable.blobHash, PDFTable.optimizedSize).where(PDFTable.id == pdf_id)
+        )
+        row = result.first()
+        if not row or not row.pdf or row.optimizedSize is not None:
+            return None
+        if not row.blobHash and not get_pdf_storage().is_local:
+            return None  #  Plain files are swapped in place, which needs the upload folder on disk
+        path = row.pdf
+
+        # Step 2: Shared files are optimized once
+        job_key = row.blobHash or path
+        running = _in_flight.get(job_key)
+        if running is not None:
+            #  Same file is being optimized for another row: wait, then look again
+            await asyncio.wait([running])
+            return await PDFOptimizeService.optimizePdf(db, pdf_id)
+
+        job = asyncio.ensure_future(PDFOptimizeService._optimizeFile(path, in_place=not row.blobHash))
+        _in_flight[job_key] = job
+        try:
+            original_size, optimized_size, staged = await job
+        finally:
+            _in_flight.pop(job_key, None)
+
+        # Step 3: Smaller blob copy, stored under its own hash
+        if staged is not None:
+            staged_path, digest = staged
+            try:
+                moved = await PDFOptimizeService._moveToBlob(db, row.blobHash, staged_path, digest, original_size, optimized_size)
+            except BaseException:
+                await asyncio.to_thread(discard_staged_pdf, staged_path)
+                raise
+            logger.info(f"Optimized PDF {pdf_id}: {original_size} -> {optimized_size} bytes, {moved} row(s) moved to blob {digest}")
+            return {"originalSize": original_size, "optimizedSize": optimized_size}
+
+        # Step 4 ran in _optimizeFile; Step 5: sizes on the row (or all rows of the unchanged blob)
+        stmt = update(PDFTable).where(PDFTable.optimizedSize.is_(None))
+        stmt = stmt.where(PDFTable.blobHash == row.blobHash) if row.blobHash else stmt.where(PDFTable.id == pdf_id)
+        await db.execute(
+            stmt.values(originalSize=original_size, optimizedSize=optimized_size)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+        logger.info(f"Optimized PDF {pdf_id}: {original_size} -> {optimized_size} bytes")
+        return {"originalSize": original_size, "optimizedSize": optimized_size}
+
+
+    @staticmethod
+    def shutdown() -> None:
+        global _pool
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+    @staticmethod
+    async def _moveToBlob(
+        db: AsyncSession,
+        old_hash: str,
+        staged_path: Path,
+        digest: str,
+        original_size: int,
+        optimized_size: int
+    ) -> int:
+        """
+        Point every row of blob old_hash at the optimized copy (blob digest) and commit
+
+        Both blob rows are locked first (PDFBlobService.lockBlobs), so uploads and deletes
+        of either hash wait; the new file is in place before the rows point at it.
+        If the rows were deleted meanwhile, the placed file is removed again (unless digest
+        is a blob already in use). Returns the number of rows moved
+        """
+        new_path = str(PDFBlobService.blobPath(digest))
+        existing = await PDFBlobService.lockBlobs(db, [old_hash, digest])
+        await asyncio.to_thread(get_pdf_storage().put_file, staged_path, new_path, True)
+
+        result = await db.execute(
+            update(PDFTable)
+            .where(PDFTable.blobHash == old_hash)
+            .values(pdf=new_path, blobHash=digest, originalSize=original_size, optimizedSize=optimized_size)
+            .returning(PDFTable.id)
+            .execution_options(synchronize_session=False)
+        )
+        moved_ids = list(result.scalars().all())
+        released: List[str] = []
+        if moved_ids:
+            await PDFBlobService.addReferences(db, [(digest, optimized_size)] * len(moved_ids))
+            released = await PDFBlobService.releaseReferences(db, [old_hash] * len(moved_ids))
+            await PDFDeleteQueueService.enqueue(db, blobs=released)
+        elif digest not in existing:
+            #  Still under the lock: an upload of the same content waits and places its own copy
+            try:
+                await asyncio.to_thread(get_pdf_storage().delete, new_path)
+            except Exception as e:
+                logger.warning(f"Could not remove unused optimized blob {new_path}: {str(e)}")
+        await db.commit()
+
+        PDFService.forget_pdf_files(moved_ids)
+        if released:
+            PDFDeleteQueueService.notify()
+        return len(moved_ids)
+
+
+    @staticmethod
+    async def _optimizeFile(path: str, in_place: bool) -> Tuple[int, int, Optional[Tuple[Path, str]]]:
+        """
+        Optimize a stored PDF in the worker pool
+
+        in_place (plain files): a smaller copy replaces the file where it actually lives
+        (the layout migration may have moved it). Otherwise (blobs) a smaller copy is left
+        in .staging and returned with its SHA-256 as (staged path, digest)
+        Returns: (original size, optimized size, staged copy or None)
+        """
+        global _pool
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.PDF_OPTIMIZE_WORKERS)
+
+        async with local_pdf_copy(path) as local_path:
+            source = Path(local_path)
+            if in_place:
+                tmp_path = source.with_name(f".{source.name}.{uuid.uuid4().hex}.opt.tmp")
+            else:
+                staging_dir = Path(settings.PDF_UPLOAD_PATH) / STAGING_DIR_NAME
+                await asyncio.to_thread(staging_dir.mkdir, parents=True, exist_ok=True)
+                tmp_path = staging_dir / f"{uuid.uuid4().hex}.part"
+
+            loop = asyncio.get_running_loop()
+            try:
+                original_size, optimized_size = await loop.run_in_executor(_pool, optimize_pdf, local_path, str(tmp_path))
+
+                if optimized_size >= original_size:
+                    await asyncio.to_thread(tmp_path.unlink, True)
+                    return original_size, original_size, None
+
+                if in_place:
+                    #  Atomic swap: readers see either the whole original or the whole optimized file
+                    await asyncio.to_thread(tmp_path.replace, source)
+                    return original_size, optimized_size, None
+
+                digest = await asyncio.to_thread(hash_file, str(tmp_path))
+                return original_size, optimized_size, (tmp_path, digest)
+            except BrokenProcessPool:
+                _pool = None  #  A worker died, start fresh next time
+                tmp_path.unlink(missing_ok=True)
+                raise
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
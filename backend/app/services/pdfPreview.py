@@ -0,0 +1,170 @@
+# services/pdfPreview.py
+import asyncio
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException
+from app.database.config import settings
+from app.helper.pdf_storage import local_pdf_copy
+from app.helper.pdf_thumbnail import render_first_page, thumbnails_available
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_in_flight: Dict[str, asyncio.Task] = {}
+_cache_lock = threading.Lock()
+_cache_bytes: Optional[int] = None  # Lazily counted on the first store
+
+
+class PDFPreviewService:
+    CACHE_DIR_NAME = ".thumbs"
+    PRUNE_TARGET = 0.9  # Evict down to 90% of the limit so every store does not trigger a scan
+
+    @staticmethod
+    def cacheDir() -> Path:
+        return Path(settings.PDF_UPLOAD_PATH) / PDFPreviewService.CACHE_DIR_NAME
+
+
+    @staticmethod
+    def cacheKey(pdf_id: int, stat_result: os.stat_result, blob_hash: Optional[str]) -> str:
+        """Blob rows share one thumbnail per content hash; other files key on id + mtime + size."""
+        if blob_hash:
+            return f"{blob_hash}-{settings.PDF_THUMB_WIDTH}"
+        return f"pdf-{pdf_id}-{stat_result.st_mtime_ns}-{stat_result.st_size}-{settings.PDF_THUMB_WIDTH}"
+
+
+    @staticmethod
+    async def getThumbnail(pdf_id: int, pdf_path: str, stat_result: os.stat_result, blob_hash: Optional[str] = None) -> Tuple[bytes, int, str]:
+        """
+        First-page PNG and page count of a stored PDF, rendered once and cached on disk
+
+        Returns: (png bytes, page count, cache key usable as ETag)
+        """
+        key = PDFPreviewService.cacheKey(pdf_id, stat_result, blob_hash)
+
+        # Step 1: Cache hit
+        cached = await asyncio.to_thread(PDFPreviewService._readCached, key)
+        if cached:
+            return cached[0], cached[1], key
+
+        if not thumbnails_available():
+            raise HTTPException(status_code=503, detail="Thumbnails are not available (PyMuPDF is not installed)")
+
+        # Step 2: Render once per key, concurrent requests wait for the same job
+        task = _in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(PDFPreviewService._renderAndStore(key, pdf_path))
+            _in_flight[key] = task
+            task.add_done_callback(lambda _: _in_flight.pop(key, None))
+
+        try:
+            #  shield: a client going away must not cancel the render for the others
+            png, page_count = await asyncio.shield(task)
+        except ValueError as e:
+            logger.warning(f"Could not render thumbnail for PDF {pdf_id}: {str(e)}")
+            raise HTTPException(status_code=422, detail=f"Could not render PDF preview: {str(e)}")
+
+        return png, page_count, key
+
+
+    @staticmethod
+    def shutdown() -> None:
+        global _pool
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+    @staticmethod
+    async def _renderAndStore(key: str, pdf_path: str) -> Tuple[bytes, int]:
+        global _pool
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.PDF_THUMB_WORKERS)
+
+        loop = asyncio.get_running_loop()
+        async with local_pdf_copy(pdf_path) as local_path:
+            try:
+                png, page_count = await loop.run_in_executor(_pool, render_first_page, local_path, settings.PDF_THUMB_WIDTH)
+            except BrokenProcessPool:
+                _pool = None  #  A worker died (e.g. out of memory on a huge page), start fresh next time
+                raise
+            except Exception as e:
+                #  PyMuPDF errors are not all picklable subclasses of ValueError, normalize them
+                raise ValueError(str(e)) from e
+
+        try:
+            await asyncio.to_thread(PDFPreviewService._storeCached, key, png, page_count)
+        except OSError as e:
+            logger.error(f"Could not cache thumbnail {key}: {str(e)}")
+        return png, page_count
+
+
+    @staticmethod
+    def _readCached(key: str) -> Optional[Tuple[bytes, int]]:
+        png_path = PDFPreviewService.cacheDir() / f"{key}.png"
+        try:
+            page_count = int((PDFPreviewService.cacheDir() / f"{key}.pages").read_text())
+            png = png_path.read_bytes()
+            os.utime(png_path)  #  mtime doubles as "last used" for eviction
+        except (FileNotFoundError, ValueError):
+            return None
+        return png, page_count
+
+
+    @staticmethod
+    def _storeCached(key: str, png: bytes, page_count: int) -> None:
+        global _cache_bytes
+        cache_dir = PDFPreviewService.cacheDir()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+        #  Page count first: a reader that finds the PNG always finds its count
+        for suffix, data in ((".pages", str(page_count).encode()), (".png", png)):
+            tmp_path = cache_dir / f".{key}{suffix}.{uuid.uuid4().hex}.tmp"
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, cache_dir / f"{key}{suffix}")
+
+        with _cache_lock:
+            if _cache_bytes is None:
+                _cache_bytes = PDFPreviewService._scanCache(cache_dir)[0]
+            else:
+                _cache_bytes += len(png)
+
+            limit = settings.PDF_THUMB_CACHE_MB * 1024 * 1024
+            if _cache_bytes > limit:
+                _cache_bytes = PDFPreviewService._prune(cache_dir, int(limit * PDFPreviewService.PRUNE_TARGET))
+
+
+    @staticmethod
+    def _scanCache(cache_dir: Path):
+        total = 0
+        entries = []
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".png") and not entry.name.startswith("."):
+                    stat_result = entry.stat()
+                    total += stat_result.st_size
+                    entries.append((stat_result.st_mtime, stat_result.st_size, entry.name[:-len(".png")]))
+        return total, entries
+
+
+    @staticmethod
+    def _prune(cache_dir: Path, target_bytes: int) -> int:
+        """Delete least recently used thumbnails until the cache is at most target_bytes; returns the new size."""
+        total, entries = PDFPreviewService._scanCache(cache_dir)
+        removed = 0
+        for _, size, key in sorted(entries):
+            if total <= target_bytes:
+                break
+            for suffix in (".png", ".pages"):
+                (cache_dir / f"{key}{suffix}").unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"Evicted {removed} cached thumbnail(s), cache now {total} bytes")
+        return total
@@ -0,0 +1,271 @@
+# services/pdfText.py
+import asyncio
+import logging
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy import Integer, UnicodeText, and_, case, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.config import settings
+from app.database.database import AsyncSessionLocal
+from app.helper.pdf_text import extract_text, make_snippet, text_extraction_available
+from app.helper.pdf_storage import local_pdf_copy
+from app.helper.tabular_reader import iter_chunks
+from app.models.PDFTable import PDFTable
+from app.models.PDFText import PDFText
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_tasks: Set[asyncio.Task] = set()  # Keeps scheduled jobs referenced until they finish
+
+_TERM = re.compile(r"[^\s\"]+")
+
+
+class PDFTextService:
+    BATCH_SIZE = 200            # PDFs extracted and inserted per backfill transaction
+    IN_CLAUSE_SIZE = 2000       # SQL Server allows 2100 parameters per statement
+    SNIPPET_WINDOW = 320        # Characters cut around the first hit in SQL, then highlighted in Python
+    SNIPPETS_PER_COMMITTEE = 3
+    MAX_TERMS = 8
+
+    @staticmethod
+    def schedule(pdf_id: int) -> None:
+        """Extract the text of a freshly uploaded PDF in the background (no-op without PyMuPDF)"""
+        if not text_extraction_available():
+            return
+        task = asyncio.create_task(PDFTextService.extractStoredPdf(pdf_id))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+
+    @staticmethod
+    async def extractStoredPdf(pdf_id: int) -> Optional[int]:
+        """Background variant of extractPdf with its own session; failures are logged, backfill retries them"""
+        try:
+            async with AsyncSessionLocal() as db:
+                return await PDFTextService.extractPdf(db, pdf_id)
+        except Exception as e:
+            logger.error(f"Extracting text of PDF {pdf_id} failed: {str(e)}", exc_info=True)
+            return None
+
+
+    @staticmethod
+    async def extractPdf(db: AsyncSession, pdf_id: int) -> Optional[int]:
+        """
+        Store the text layer of one PDF in PDFText
+
+        Steps:
+        1. Load the row; PDFs that already have text are skipped
+        2. Copy the text of another row sharing the same blob, or extract it in a worker process
+        3. INSERT ... SELECT from PDFTable, so a row deleted meanwhile gets no orphaned text
+
+        Returns: characters stored, or None when nothing was done
+        """
+        # Step 1: Row to extract
+        result = await db.execute(
+            select(PDFTable.pdf, PDFTable.blobHash, PDFText.pdfID.label("done"))
+            .outerjoin(PDFText, PDFText.pdfID == PDFTable.id)
+            .where(PDFTable.id == pdf_id)
+        )
+        row = result.first()
+        if not row or not row.pdf or row.done is not None:
+            return None
+
+        # Step 2: Deduplicated content is extracted once
+        extracted = None
+        if row.blobHash:
+            result = await db.execute(
+                select(PDFText.textContent, PDFText.pageCount)
+                .join(PDFTable, PDFTable.id == PDFText.pdfID)
+                .where(PDFTable.blobHash == row.blobHash)
+                .limit(1)
+            )
+            extracted = result.first()
+        if extracted:
+            text, page_count = extracted
+        else:
+            text, page_count = await PDFTextService._extractFile(row.pdf)
+
+        # Step 3: Insert only while the PDF row still exists
+        await db.execute(
+            insert(PDFText).from_select(
+                ["pdfID", "committeeID", "pageCount", "textContent"],
+                select(
+                    PDFTable.id,
+                    PDFTable.committeeID,
+                    literal(page_count, Integer),
+                    literal(text or "", UnicodeText)
+                ).where(PDFTable.id == pdf_id)
+            )
+        )
+        await db.commit()
+
+        logger.info(f"Extracted {len(text or '')} characters from PDF {pdf_id} ({page_count} pages)")
+        return len(text or "")
+
+
+    @staticmethod
+    async def backfill(
+        db: AsyncSession,
+        batch_size: Optional[int] = None,
+        on_batch: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract every PDF that has no PDFText row yet (PDFs uploaded before this stage, imports, failures)
+
+        Keyset-paginated on PDFTable.id; each batch is extracted in the process pool
+        (files shared by several rows once) and inserted with one executemany, one commit per batch.
+        Safe to stop and re-run.
+        """
+        if not text_extraction_available():
+            raise RuntimeError("PyMuPDF is not installed (pip install PyMuPDF)")
+
+        batch_size = batch_size or PDFTextService.BATCH_SIZE
+        started = time.perf_counter()
+        summary: Dict[str, Any] = {"extracted": 0, "withText": 0, "failed": []}
+        last_id = 0
+
+        while True:
+            result = await db.execute(
+                select(PDFTable.id, PDFTable.committeeID, PDFTable.pdf)
+                .outerjoin(PDFText, PDFText.pdfID == PDFTable.id)
+                .where(PDFTable.id > last_id)
+                .where(PDFTable.pdf.isnot(None))
+                .where(PDFText.pdfID.is_(None))
+                .order_by(PDFTable.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            # One extraction per distinct file
+            paths = list(dict.fromkeys(row.pdf for row in rows))
+            outcomes = await asyncio.gather(
+                *(PDFTextService._extractFile(path) for path in paths), return_exceptions=True
+            )
+            by_path = dict(zip(paths, outcomes))
+
+            new_rows = []
+            for row in rows:
+                outcome = by_path[row.pdf]
+                if isinstance(outcome, BaseException):
+                    summary["failed"].append({"id": row.id, "path": row.pdf, "error": str(outcome)})
+                    continue
+                text, page_count = outcome
+                new_rows.append({
+                    "pdfID": row.id,
+                    "committeeID": row.committeeID,
+                    "pageCount": page_count,
+                    "textContent": text
+                })
+            if new_rows:
+                await db.execute(insert(PDFText), new_rows)
+                await db.commit()
+
+            summary["extracted"] += len(new_rows)
+            summary["withText"] += sum(1 for new_row in new_rows if new_row["textContent"])
+            if on_batch:
+                on_batch({"lastId": last_id, "rows": len(rows), "extracted": len(new_rows), "failed": len(rows) - len(new_rows)})
+
+        summary["elapsedSeconds"] = round(time.perf_counter() - started, 2)
+        logger.info(
+            f"Text backfill: {summary['extracted']} PDFs ({summary['withText']} with text), "
+            f"{len(summary['failed'])} failed"
+        )
+        return summary
+
+
+    @staticmethod
+    def searchTerms(q: str) -> List[str]:
+        """Words of a q= search (quotes dropped), at most MAX_TERMS"""
+        return _TERM.findall(q or "")[:PDFTextService.MAX_TERMS]
+
+
+    @staticmethod
+    def matchCondition(terms: List[str]):
+        """
+        WHERE condition on PDFText for all terms
+
+        With PDF_TEXT_FULLTEXT: CONTAINS(textContent, '"t1*" AND "t2*"') on the full-text index,
+        otherwise one LIKE '%t%' per term (no index, for development and small archives)
+        """
+        if settings.PDF_TEXT_FULLTEXT:
+            fulltext_query = " AND ".join(f'"{term}*"' for term in terms)
+            return func.CONTAINS(PDFText.textContent, fulltext_query)
+        return and_(*(PDFText.textContent.contains(term, autoescape=True) for term in terms))
+
+
+    @staticmethod
+    def matchingCommitteeIDs(terms: List[str]):
+        """Subquery of committee IDs with at least one PDF containing all terms (for IN filters)"""
+        return select(PDFText.committeeID).where(PDFTextService.matchCondition(terms))
+
+
+    @staticmethod
+    async def getSnippets(db: AsyncSession, committee_ids: List[int], terms: List[str]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Highlighted snippets of the matching PDFs of the given committees (one page of search results)
+
+        Only a window around the first hit of the first term leaves the database
+        Returns: committeeID -> [{"pdfID", "snippet"}], snippet is HTML with <mark> around hits
+        """
+        if not committee_ids or not terms:
+            return {}
+
+        window = PDFTextService.SNIPPET_WINDOW
+        position = func.charindex(terms[0], PDFText.textContent)
+        start = case((position > window // 2, position - window // 2), else_=1)
+
+        snippets: Dict[int, List[Dict[str, Any]]] = {}
+        for batch in iter_chunks(committee_ids, PDFTextService.IN_CLAUSE_SIZE):
+            result = await db.execute(
+                select(
+                    PDFText.pdfID,
+                    PDFText.committeeID,
+                    func.substring(PDFText.textContent, start, window).label("excerpt"),
+                    start.label("excerptStart")
+                )
+                .where(PDFText.committeeID.in_(batch))
+                .where(PDFTextService.matchCondition(terms))
+                .order_by(PDFText.committeeID, PDFText.pdfID)
+            )
+            for row in result:
+                found = snippets.setdefault(row.committeeID, [])
+                if len(found) >= PDFTextService.SNIPPETS_PER_COMMITTEE:
+                    continue
+                excerpt = row.excerpt or ""
+                snippet = make_snippet(excerpt, terms, width=window)
+                if row.excerptStart > 1 and not snippet.startswith("…"):
+                    snippet = f"…{snippet}"
+                found.append({"pdfID": row.pdfID, "snippet": snippet})
+        return snippets
+
+
+    @staticmethod
+    def shutdown() -> None:
+        global _pool
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+    @staticmethod
+    async def _extractFile(path: str) -> Tuple[str, int]:
+        global _pool
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.PDF_TEXT_WORKERS)
+
+        #  Rows not yet rewritten by the layout migration are found in the other layout;
+        #  object storage hands PyMuPDF a temporary local copy
+        async with local_pdf_copy(path) as local_path:
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(_pool, extract_text, local_path, settings.PDF_TEXT_MAX_CHARS)
+            except BrokenProcessPool:
+                _pool = None  #  A worker died, start fresh next time
+                raise
@@ -0,0 +1,175 @@
+# services/storageLayout.py
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.config import settings
+from app.helper.pdf_storage import get_pdf_storage
+from app.helper.save_pdf import alternate_pdf_path
+from app.models.PDFTable import PDFTable
+from app.services.pdf import PDFService
+
+logger = logging.getLogger(__name__)
+
+
+class StorageLayoutService:
+    BATCH_SIZE = 500        # PDFTable rows moved and rewritten per transaction
+    MOVE_WORKERS = 4        # Threads renaming files in parallel
+    MAX_REPORTED_ROWS = 1000
+
+    @staticmethod
+    async def migrateToSharded(
+        db: AsyncSession,
+        batch_size: Optional[int] = None,
+        dry_run: bool = False,
+        on_batch: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Move flat-layout PDFs (<year>/file.pdf) to <year>/<MM>/<ab>/<cd>/file.pdf and rewrite PDFTable.pdf
+
+        Steps (per batch, keyset-paginated on id):
+        1. Read the next rows below PDF_UPLOAD_PATH that are not blobs
+        2. Keep the ones still in the flat layout
+        3. Move their files (os.replace, in threads); a file already at the target from an
+           interrupted run counts as moved, an occupied target is a conflict and left alone
+        4. Rewrite the moved rows in one executemany UPDATE, commit, drop them from the path cache
+
+        Safe to stop and re-run at any time: until a row is rewritten, locate_pdf() finds
+        the file in either layout, so downloads keep working during the migration
+        """
+        if not get_pdf_storage().is_local:
+            raise RuntimeError("The layout migration moves files on disk; object storage keys need no sharding")
+
+        batch_size = batch_size or StorageLayoutService.BATCH_SIZE
+        root = Path(settings.PDF_UPLOAD_PATH)
+        root_key = StorageLayoutService._normalize(str(root))
+
+        started = time.perf_counter()
+        summary: Dict[str, Any] = {
+            "dryRun": dry_run,
+            "rowsScanned": 0,
+            "movedCount": 0,
+            "alreadyShardedCount": 0,
+            "missing": [],
+            "conflicts": [],
+            "failed": []
+        }
+        last_id = 0
+
+        with ThreadPoolExecutor(
+            max_workers=StorageLayoutService.MOVE_WORKERS, thread_name_prefix="pdf-layout"
+        ) as executor:
+            loop = asyncio.get_running_loop()
+            while True:
+                # Step 1: Next batch of non-blob rows under the upload root
+                result = await db.execute(
+                    select(PDFTable.id, PDFTable.pdf)
+                    .where(PDFTable.id > last_id)
+                    .where(PDFTable.blobHash.is_(None))
+                    .where(PDFTable.pdf.like(f"{root}%"))
+                    .order_by(PDFTable.id)
+                    .limit(batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                summary["rowsScanned"] += len(rows)
+
+                # Step 2: Flat rows and their sharded targets
+                moves: List[Tuple[int, str, str]] = []
+                for pdf_id, pdf_path in rows:
+                    target = StorageLayoutService._shardedTarget(pdf_path, root_key)
+                    if target is None:
+                        summary["alreadyShardedCount"] += 1
+                    else:
+                        moves.append((pdf_id, pdf_path, str(target)))
+
+                # Step 3: Move the files
+                outcomes = await asyncio.gather(*(
+                    loop.run_in_executor(executor, StorageLayoutService._moveFile, source, target, dry_run)
+                    for _, source, target in moves
+                ))
+
+                updates = []
+                batch_report = {"lastId": last_id, "rows": len(rows), "moved": 0, "missing": 0, "conflicts": 0, "failed": 0}
+                for (pdf_id, source, target), (outcome, error) in zip(moves, outcomes):
+                    if outcome == "moved":
+                        updates.append({"id": pdf_id, "pdf": target})
+                        batch_report["moved"] += 1
+                        continue
+                    entry = {"id": pdf_id, "path": source, "target": target}
+                    if error:
+                        entry["error"] = error
+                    key = {"missing": "missing", "conflict": "conflicts"}.get(outcome, "failed")
+                    batch_report[key] += 1
+                    if len(summary[key]) < StorageLayoutService.MAX_REPORTED_ROWS:
+                        summary[key].append(entry)
+
+                # Step 4: Point the rows at the new locations
+                if updates and not dry_run:
+                    try:
+                        await db.execute(update(PDFTable), updates)
+                        await db.commit()
+                    except Exception:
+                        await db.rollback()
+                        # The files are already moved; locate_pdf serves them until a re-run rewrites the rows
+                        logger.error(f"Layout migration: rewriting rows {updates[0]['id']}..{updates[-1]['id']} failed")
+                        raise
+                    PDFService.forget_pdf_files(row["id"] for row in updates)
+                summary["movedCount"] += len(updates)
+
+                if on_batch:
+                    on_batch(batch_report)
+
+        summary["elapsedSeconds"] = round(time.perf_counter() - started, 2)
+        logger.info(
+            f"Layout migration{' (dry run)' if dry_run else ''}: {summary['rowsScanned']} rows, "
+            f"{summary['movedCount']} moved, {len(summary['missing'])} missing, "
+            f"{len(summary['conflicts'])} conflicts, {len(summary['failed'])} failed"
+        )
+        return summary
+
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        #  Stored paths come from Windows and from older code, compare them case- and separator-insensitively
+        return os.path.normcase(os.path.normpath(path))
+
+
+    @staticmethod
+    def _shardedTarget(pdf_path: str, root_key: str) -> Optional[Path]:
+        """Sharded location for a flat <root>/<year>/file.pdf path, None when the row is in any other shape"""
+        if not pdf_path:
+            return None
+        stored = Path(pdf_path)
+        if StorageLayoutService._normalize(str(stored.parent.parent)) != root_key:
+            return None
+        target = alternate_pdf_path(pdf_path)
+        if target is None or len(target.parts) <= len(stored.parts):
+            return None  # Not a year folder, or already sharded
+        return target
+
+
+    @staticmethod
+    def _moveFile(source: str, target: str, dry_run: bool) -> Tuple[str, Optional[str]]:
+        """Returns ("moved" | "missing" | "conflict" | "failed", error)"""
+        try:
+            source_exists = os.path.exists(source)
+            target_exists = os.path.exists(target)
+            if not source_exists:
+                # An interrupted run may have moved the file without rewriting the row
+                return ("moved", None) if target_exists else ("missing", None)
+            if target_exists:
+                return "conflict", None
+            if not dry_run:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(source, target)
+            return "moved", None
+        except OSError as e:
+            return "failed", str(e)
@@ -0,0 +1,271 @@
+# services/storageReconcile.py
+import asyncio
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.config import settings
+from app.helper.pdf_storage import get_pdf_storage
+from app.helper.save_pdf import BLOB_DIR_NAME, STAGING_DIR_NAME, alternate_pdf_path
+from app.models.PDFTable import PDFTable
+from app.services.uploadSession import UploadSessionService
+
+logger = logging.getLogger(__name__)
+
+
+class StorageReconcileService:
+    SCAN_WORKERS = 4                   # Threads listing directories (blob shards) in parallel
+    STREAM_BATCH = 1000                # PDFTable rows fetched per round trip from the server-side cursor
+    ORPHAN_MIN_AGE_SECONDS = 3600      # Younger files may belong to an upload or delete still in progress
+    STAGING_MAX_AGE_SECONDS = 86400    # Staged uploads older than this were left by a crash
+    MAX_REPORTED_PATHS = 1000
+    QUARANTINE_DIR_NAME = ".quarantine"
+    MODES = ("report", "quarantine", "delete")
+
+    @staticmethod
+    def listUnits() -> List[str]:
+        """
+        Units reconciled one at a time: every year folder, every blobs/<xx> shard and .staging
+
+        Other dot-folders (.thumbs, .quarantine) and loose files in the root are not PDFs of record.
+        With object storage the units come from one listing of the bucket prefix (staging stays local)
+        """
+        root = Path(settings.PDF_UPLOAD_PATH)
+        storage = get_pdf_storage()
+        if not storage.is_local:
+            units = set()
+            for path, _, _ in storage.list_prefix(str(root)):
+                parts = Path(path).relative_to(root).parts
+                if len(parts) < 2 or parts[0].startswith("."):
+                    continue
+                units.add(f"{BLOB_DIR_NAME}/{parts[1]}" if parts[0] == BLOB_DIR_NAME and len(parts) > 2 else parts[0])
+            if (root / STAGING_DIR_NAME).is_dir():
+                units.add(STAGING_DIR_NAME)
+            return sorted(units)
+
+        units = []
+        with os.scandir(root) as it:
+            for entry in it:
+                if not entry.is_dir(follow_symlinks=False) or entry.name.startswith("."):
+                    continue
+                if entry.name == BLOB_DIR_NAME:
+                    with os.scandir(entry.path) as shards:
+                        units.extend(
+                            f"{BLOB_DIR_NAME}/{shard.name}" for shard in shards
+                            if shard.is_dir(follow_symlinks=False) and not shard.name.startswith(".")
+                        )
+                else:
+                    units.append(entry.name)
+        if (root / STAGING_DIR_NAME).is_dir():
+            units.append(STAGING_DIR_NAME)
+        return sorted(units)
+
+
+    @staticmethod
+    async def reconcileUnit(db: AsyncSession, unit: str, mode: str = "report") -> Dict[str, Any]:
+        """
+        Diff one unit (a year folder or blob shard) against PDFTable
+
+        Steps:
+        1. List the files on disk (parallel scandir, in threads) or in the bucket
+        2. Stream PDFTable paths under the unit from a server-side cursor and strike
+           them off the file set (hash diff, no ORDER BY so collations do not matter);
+           a row whose file is not at its path strikes off its other-layout location
+        3. What is left on disk is orphaned, rows whose file was not found are missing
+        4. report / quarantine (move under .quarantine/<date>/) / delete the orphans
+
+        Rows with missing files are only reported, never deleted
+        """
+        if mode not in StorageReconcileService.MODES:
+            raise ValueError(f"mode must be one of {StorageReconcileService.MODES}")
+        if mode == "quarantine" and not get_pdf_storage().is_local and unit != STAGING_DIR_NAME:
+            raise ValueError("quarantine needs local storage, use report or delete (or bucket versioning) with object storage")
+
+        root = Path(settings.PDF_UPLOAD_PATH)
+        if unit not in await asyncio.to_thread(StorageReconcileService.listUnits):
+            raise ValueError(f"Unknown storage unit: {unit}")
+        unit_path = root / unit
+
+        started = time.perf_counter()
+        now = time.time()
+
+        # Step 1: Files on disk, keyed by normalized path
+        #  Staged uploads are *.part files, everywhere else those are in-flight temp files
+        skip_suffixes = (".tmp",) if unit == STAGING_DIR_NAME else (".tmp", ".part")
+        files = await asyncio.to_thread(StorageReconcileService._scanTree, unit_path, skip_suffixes)
+
+        if unit == STAGING_DIR_NAME:
+            # Staged uploads never have rows, only old leftovers count; resumable upload sessions
+            # live for PDF_UPLOAD_SESSION_HOURS and are expired by UploadSessionService itself
+            sessions = StorageReconcileService._normalize(str(UploadSessionService.sessionDir())) + os.sep
+            files = {key: entry for key, entry in files.items() if not key.startswith(sessions)}
+            orphans = [
+                (path, size) for path, size, mtime in files.values()
+                if now - mtime > StorageReconcileService.STAGING_MAX_AGE_SECONDS
+            ]
+            missing: List[Dict[str, Any]] = []
+            rows_checked = 0
+        else:
+            # Step 2: Stream rows below the unit; LIKE narrows, the startswith check is exact
+            prefix = StorageReconcileService._normalize(str(unit_path)) + os.sep
+            stmt = select(PDFTable.id, PDFTable.pdf)
+            if unit.startswith(f"{BLOB_DIR_NAME}/"):
+                # Shard "blobs/ab" holds hashes ab..., a seek on the blobHash index
+                stmt = stmt.where(PDFTable.blobHash.like(f"{unit_path.name}%"))
+            else:
+                stmt = stmt.where(PDFTable.pdf.like(f"{unit_path}%"))
+            stmt = stmt.execution_options(yield_per=StorageReconcileService.STREAM_BATCH)
+            referenced: Set[str] = set()
+            missing = []
+            rows_checked = 0
+            result = await db.stream(stmt)
+            async for partition in result.partitions():
+                for pdf_id, pdf_path in partition:
+                    key = StorageReconcileService._normalize(pdf_path or "")
+                    if not key.startswith(prefix):
+                        continue
+                    rows_checked += 1
+                    if key not in files:
+                        #  The layout migration moves a file before it rewrites the row (and tolerates
+                        #  failed rewrites), so the row may still name the other layout
+                        alternate = alternate_pdf_path(pdf_path)
+                        key = StorageReconcileService._normalize(str(alternate)) if alternate else key
+                    if key in files:
+                        referenced.add(key)
+                    else:
+                        missing.append({"id": pdf_id, "path": pdf_path})
+
+            # Step 3: Unreferenced and old enough to be safe
+            orphans = [
+                (path, size) for key, (path, size, mtime) in files.items()
+                if key not in referenced and now - mtime > StorageReconcileService.ORPHAN_MIN_AGE_SECONDS
+            ]
+
+        # Step 4: Act on orphans (off the event loop)
+        handled: List[str] = []
+        failed: List[Dict[str, str]] = []
+        if mode != "report" and orphans:
+            handled, failed = await asyncio.to_thread(
+                StorageReconcileService._handleOrphans, root, [path for path, _ in orphans], mode
+            )
+
+        limit = StorageReconcileService.MAX_REPORTED_PATHS
+        report = {
+            "unit": unit,
+            "mode": mode,
+            "filesScanned": len(files),
+            "rowsChecked": rows_checked,
+            "orphanCount": len(orphans),
+            "orphanBytes": sum(size for _, size in orphans),
+            "missingCount": len(missing),
+            "orphans": [path for path, _ in orphans[:limit]],
+            "missing": missing[:limit],
+            "handledCount": len(handled),
+            "failed": failed[:limit],
+            "elapsedSeconds": round(time.perf_counter() - started, 2)
+        }
+        logger.info(
+            f"Reconciled {unit}: {len(files)} files, {rows_checked} rows, "
+            f"{len(orphans)} orphans, {len(missing)} missing, {len(handled)} {mode}d"
+        )
+        return report
+
+
+    @staticmethod
+    async def reconcileAll(
+        db: AsyncSession,
+        units: Optional[Iterable[str]] = None,
+        mode: str = "report",
+        pause_seconds: float = 0,
+        on_unit: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """Reconcile units one after another, pausing in between to leave I/O for production traffic"""
+        reports = []
+        unit_list = list(units) if units else await asyncio.to_thread(StorageReconcileService.listUnits)
+        for index, unit in enumerate(unit_list):
+            report = await StorageReconcileService.reconcileUnit(db, unit, mode)
+            reports.append(report)
+            if on_unit:
+                on_unit(report)
+            if pause_seconds and index < len(unit_list) - 1:
+                await asyncio.sleep(pause_seconds)
+        return reports
+
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        #  Stored paths come from Windows and from older code, compare them case- and separator-insensitively
+        return os.path.normcase(os.path.normpath(path))
+
+
+    @staticmethod
+    def _scanTree(unit_path: Path, skip_suffixes: Tuple[str, ...]) -> Dict[str, Tuple[str, int, float]]:
+        """All regular files below unit_path as {normalized path: (path, size, mtime)}; temp and dot files are skipped"""
+        files: Dict[str, Tuple[str, int, float]] = {}
+        storage = get_pdf_storage()
+        if not storage.is_local and unit_path.name != STAGING_DIR_NAME:
+            for path, size, mtime in storage.list_prefix(str(unit_path)):
+                relative = Path(path).relative_to(unit_path)
+                if any(part.startswith(".") for part in relative.parts) or path.endswith(skip_suffixes):
+                    continue
+                files[StorageReconcileService._normalize(path)] = (path, size, mtime)
+            return files
+
+        pending = [str(unit_path)]
+
+        def scan(directory: str) -> Tuple[List[str], List[Tuple[str, int, float]]]:
+            subdirs, found = [], []
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.name.startswith(".") or entry.name.endswith(skip_suffixes):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            stat_result = entry.stat(follow_symlinks=False)
+                            found.append((entry.path, stat_result.st_size, stat_result.st_mtime))
+            except FileNotFoundError:
+                pass  #  Removed while scanning
+            return subdirs, found
+
+        with ThreadPoolExecutor(max_workers=StorageReconcileService.SCAN_WORKERS) as executor:
+            while pending:
+                results = list(executor.map(scan, pending))
+                pending = []
+                for subdirs, found in results:
+                    pending.extend(subdirs)
+                    for path, size, mtime in found:
+                        files[StorageReconcileService._normalize(path)] = (path, size, mtime)
+        return files
+
+
+    @staticmethod
+    def _handleOrphans(root: Path, paths: List[str], mode: str) -> Tuple[List[str], List[Dict[str, str]]]:
+        handled, failed = [], []
+        quarantine_root = root / StorageReconcileService.QUARANTINE_DIR_NAME / datetime.now().strftime("%Y-%m-%d")
+        storage = get_pdf_storage()
+        for path in paths:
+            try:
+                if mode == "delete" and not storage.is_local and Path(path).relative_to(root).parts[0] != STAGING_DIR_NAME:
+                    storage.delete(path)
+                elif mode == "delete":
+                    os.remove(path)
+                else:
+                    target = quarantine_root / Path(path).relative_to(root)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.move(path, target)
+                handled.append(path)
+            except FileNotFoundError:
+                handled.append(path)  #  Gone already (e.g. a delayed delete got there first)
+            except Exception as e:
+                failed.append({"path": path, "reason": str(e)})
+        if handled:
+            logger.warning(f"{mode}: {len(handled)} orphaned PDF file(s) under {root}")
+        return handled, failed
@@ -0,0 +1,250 @@
+# services/uploadSession.py
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from fastapi import HTTPException
+from app.database.config import settings
+from app.helper.save_pdf import STAGING_DIR_NAME, is_pdf_header, stage_file_copy, write_stream_at
+
+logger = logging.getLogger(__name__)
+
+_CONTENT_RANGE = re.compile(r"^bytes (?P<start>\d+)-(?P<end>\d+)/(?P<total>\d+|\*)$")
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_last_sweep = 0.0  # time.monotonic() of the last expireSessions run in this worker
+
+
+class UploadSessionService:
+    SESSION_DIR_NAME = "uploads"    # Under PDF_UPLOAD_PATH/.staging, same volume as the final folders
+    SWEEP_INTERVAL_SECONDS = 600    # Stale sessions are swept at most this often, on session creation
+    CHUNK_HINT = 8 * 1024 * 1024    # Suggested PUT size: big enough to be fast, small enough to retry cheaply
+
+    @staticmethod
+    def sessionDir() -> Path:
+        return Path(settings.PDF_UPLOAD_PATH) / STAGING_DIR_NAME / UploadSessionService.SESSION_DIR_NAME
+
+
+    @staticmethod
+    async def createSession(size: int, filename: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Start a resumable upload of `size` bytes
+
+        Creates <id>.part (the bytes received so far) and <id>.json (declared size, name)
+        The received offset is the .part file's size, so any worker can resume any session
+        """
+        max_bytes = settings.PDF_MAX_UPLOAD_MB * 1024 * 1024
+        if size <= 0:
+            raise HTTPException(status_code=400, detail="Upload size must be greater than zero")
+        if max_bytes and size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"PDF is larger than the {settings.PDF_MAX_UPLOAD_MB} MB upload limit")
+
+        await UploadSessionService._sweepIfDue()
+
+        upload_id = uuid.uuid4().hex
+        session = {"uploadID": upload_id, "size": size, "filename": filename, "createdAt": time.time()}
+
+        def create() -> None:
+            session_dir = UploadSessionService.sessionDir()
+            session_dir.mkdir(parents=True, exist_ok=True)
+            (session_dir / f"{upload_id}.part").touch(exist_ok=False)
+            (session_dir / f"{upload_id}.json").write_text(json.dumps(session), encoding="utf-8")
+
+        await asyncio.to_thread(create)
+        logger.info(f"Upload session {upload_id} started ({size} bytes, {filename})")
+        return UploadSessionService._status(session, 0)
+
+
+    @staticmethod
+    async def getSession(upload_id: str) -> Dict[str, Any]:
+        """Declared size and received offset; 404 for unknown or expired sessions"""
+        session, offset = await asyncio.to_thread(UploadSessionService._load, upload_id)
+        return UploadSessionService._status(session, offset)
+
+
+    @staticmethod
+    async def writeRange(upload_id: str, content_range: Optional[str], chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Append a byte range (Content-Range: bytes <start>-<end>/<total>) to a session
+
+        Steps:
+        1. Parse the range; total must match the declared size
+        2. start may repeat bytes already received (a retried chunk) but must not leave a gap (409)
+        3. Sniff the %PDF- header on the first range, before anything is written (415)
+        4. Stream the body into <id>.part at start; what arrives before a disconnect is kept
+
+        A complete session accepts no more writes, its file is what finalize copies
+        """
+        # Step 1: Range header
+        match = _CONTENT_RANGE.match((content_range or "").strip())
+        if not match:
+            raise HTTPException(status_code=400, detail="Content-Range header must be 'bytes <start>-<end>/<total>'")
+        start, end = int(match.group("start")), int(match.group("end"))
+        session, offset = await asyncio.to_thread(UploadSessionService._load, upload_id)
+        size = session["size"]
+        if match.group("total") != "*" and int(match.group("total")) != size:
+            raise HTTPException(status_code=400, detail=f"Upload size is {size} bytes, not {match.group('total')}")
+        if end < start or end >= size:
+            raise HTTPException(status_code=416, detail=f"Range must lie within 0-{size - 1}")
+
+        # Step 2: No gaps, no writes after completion
+        if offset >= size:
+            raise HTTPException(status_code=409, detail={"message": "Upload is already complete", "offset": offset})
+        if start > offset:
+            raise HTTPException(status_code=409, detail={"message": f"Upload must resume at byte {offset}", "offset": offset})
+
+        # Step 3: Check the header from the first range before writing it
+        body = chunks.__aiter__()
+        if start == 0:
+            first = b""
+            async for chunk in body:
+                first = chunk
+                break
+            if first and len(first) >= min(1024, size) and not is_pdf_header(first):
+                raise HTTPException(status_code=415, detail="Only PDF files are allowed")
+            body = UploadSessionService._prepend(first, body)
+
+        # Step 4: Write in place
+        part_path = UploadSessionService.sessionDir() / f"{upload_id}.part"
+        written = await write_stream_at(body, part_path, start, end - start + 1)
+        await asyncio.to_thread(os.utime, part_path.with_suffix(".json"))  # Activity keeps the session alive
+
+        _, offset = await asyncio.to_thread(UploadSessionService._load, upload_id)
+        logger.info(f"Upload session {upload_id}: {written} bytes at {start}, {offset}/{size} received")
+        return UploadSessionService._status(session, offset)
+
+
+    @staticmethod
+    async def stageSession(upload_id: str, dest_dir: str) -> Tuple[Path, str, int]:
+        """
+        Copy a complete session into dest_dir/.staging, hashing it in the same pass
+
+        Returns the same (staged path, SHA-256, size) as stage_upload, so the committee
+        services attach it exactly like a multipart upload. The session itself stays
+        until deleteSession, a failed attach can be retried without uploading again
+        """
+        session, offset = await asyncio.to_thread(UploadSessionService._load, upload_id)
+        if offset != session["size"]:
+            raise HTTPException(
+                status_code=409,
+                detail={"message": f"Upload is incomplete ({offset} of {session['size']} bytes)", "offset": offset}
+            )
+
+        part_path = UploadSessionService.sessionDir() / f"{upload_id}.part"
+
+        def read_head() -> bytes:
+            with open(part_path, "rb") as f:
+                return f.read(1024)
+
+        if not is_pdf_header(await asyncio.to_thread(read_head)):
+            raise HTTPException(status_code=415, detail="Only PDF files are allowed")
+
+        return await asyncio.to_thread(stage_file_copy, str(part_path), dest_dir)
+
+
+    @staticmethod
+    async def deleteSession(upload_id: str) -> bool:
+        """Remove a session's files (after a successful attach, or when the client cancels)"""
+        if not _UPLOAD_ID.match(upload_id or ""):
+            return False
+
+        def remove() -> bool:
+            found = False
+            for suffix in (".part", ".json"):
+                try:
+                    (UploadSessionService.sessionDir() / f"{upload_id}{suffix}").unlink()
+                    found = True
+                except FileNotFoundError:
+                    pass
+            return found
+
+        return await asyncio.to_thread(remove)
+
+
+    @staticmethod
+    def expireSessions() -> int:
+        """Remove sessions idle for longer than PDF_UPLOAD_SESSION_HOURS (blocking, run in a thread)"""
+        session_dir = UploadSessionService.sessionDir()
+        cutoff = time.time() - settings.PDF_UPLOAD_SESSION_HOURS * 3600
+        removed = 0
+        try:
+            entries = list(os.scandir(session_dir))
+        except FileNotFoundError:
+            return 0
+
+        last_activity: Dict[str, float] = {}
+        for entry in entries:
+            upload_id, _, suffix = entry.name.partition(".")
+            if suffix not in ("part", "json"):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            last_activity[upload_id] = max(last_activity.get(upload_id, 0), mtime)
+
+        for upload_id, mtime in last_activity.items():
+            if mtime >= cutoff:
+                continue
+            for suffix in (".part", ".json"):
+                (session_dir / f"{upload_id}{suffix}").unlink(missing_ok=True)
+            removed += 1
+
+        if removed:
+            logger.info(f"Expired {removed} idle upload session(s)")
+        return removed
+
+
+    @staticmethod
+    async def _sweepIfDue() -> None:
+        global _last_sweep
+        now = time.monotonic()
+        if _last_sweep and now - _last_sweep < UploadSessionService.SWEEP_INTERVAL_SECONDS:
+            return
+        _last_sweep = now
+        try:
+            await asyncio.to_thread(UploadSessionService.expireSessions)
+        except OSError as e:
+            logger.warning(f"Could not sweep upload sessions: {str(e)}")
+
+
+    @staticmethod
+    def _load(upload_id: str) -> Tuple[Dict[str, Any], int]:
+        """Session metadata and received offset (blocking); 404 for unknown or expired sessions"""
+        if not _UPLOAD_ID.match(upload_id or ""):
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        session_dir = UploadSessionService.sessionDir()
+        try:
+            meta_path = session_dir / f"{upload_id}.json"
+            session = json.loads(meta_path.read_text(encoding="utf-8"))
+            part_stat = os.stat(session_dir / f"{upload_id}.part")
+            idle_since = max(part_stat.st_mtime, meta_path.stat().st_mtime)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        if time.time() - idle_since > settings.PDF_UPLOAD_SESSION_HOURS * 3600:
+            raise HTTPException(status_code=404, detail="Upload session expired")
+        return session, part_stat.st_size
+
+
+    @staticmethod
+    def _status(session: Dict[str, Any], offset: int) -> Dict[str, Any]:
+        return {
+            "uploadID": session["uploadID"],
+            "size": session["size"],
+            "offset": offset,
+            "complete": offset >= session["size"],
+            "chunkSize": UploadSessionService.CHUNK_HINT
+        }
+
+
+    @staticmethod
+    async def _prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        if first:
+            yield first
+        async for chunk in rest:
+            yield chunk
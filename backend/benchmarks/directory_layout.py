@@ -0,0 +1,97 @@
+"""
+File create and stat latency vs. directory size, flat vs. sharded layout.
+
+Creates N small files per size step in a scratch folder, once all in one
+folder (the old <year>/file.pdf layout) and once spread by sharded_pdf_path
+(<year>/<MM>/<ab>/<cd>/file.pdf), then stats a random sample of them. Run it
+on the disk that holds PDF_UPLOAD_PATH (NTFS and ext4 behave differently);
+--dir must be on that volume. Nothing outside the scratch folder is touched.
+
+Usage (run from backend/):
+    python benchmarks/directory_layout.py --dir "D:/pdf-bench" --sizes 1000 10000 50000
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.helper.save_pdf import sharded_pdf_path  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def file_names(count):
+    #  Same shape as build_pdf_destination: committeeNo.year.count-timestamp.pdf
+    for i in range(count):
+        month = i % 12 + 1
+        yield f"{i}.2025.1-2025-{month:02d}-15_10-30-{i % 60:02d}-AM.pdf"
+
+
+def run(root, layout, count, sample):
+    year_dir = root / layout / "2025"
+    year_dir.mkdir(parents=True)
+    payload = b"%PDF-1.4\n" + b"0" * 1024
+
+    paths = []
+    create_seconds = []
+    for name in file_names(count):
+        path = sharded_pdf_path(year_dir, name) if layout == "sharded" else year_dir / name
+        started = time.perf_counter()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "xb") as f:
+            f.write(payload)
+        create_seconds.append(time.perf_counter() - started)
+        paths.append(path)
+
+    stat_seconds = []
+    for path in random.sample(paths, min(sample, len(paths))):
+        started = time.perf_counter()
+        os.stat(path)
+        stat_seconds.append(time.perf_counter() - started)
+
+    #  Listing the folder a file lives in (what Explorer / backups / reconcile do)
+    started = time.perf_counter()
+    with os.scandir(paths[-1].parent) as it:
+        listed = sum(1 for _ in it)
+    list_seconds = time.perf_counter() - started
+
+    shutil.rmtree(root / layout)
+    return create_seconds, stat_seconds, listed, list_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", type=Path, default=None, help="Scratch folder on the upload volume (default: system temp)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="Files per run")
+    parser.add_argument("--sample", type=int, default=2000, help="Random files stat'ed per run")
+    args = parser.parse_args()
+
+    if args.dir:
+        args.dir.mkdir(parents=True, exist_ok=True)
+    random.seed(0)
+
+    print(f"{'files':>7} {'layout':>8} | {'create p50':>10} {'p99':>8} | {'stat p50':>9} {'p99':>8} | folder listing")
+    for count in args.sizes:
+        for layout in ("flat", "sharded"):
+            with tempfile.TemporaryDirectory(dir=args.dir) as scratch:
+                create_seconds, stat_seconds, listed, list_seconds = run(Path(scratch), layout, count, args.sample)
+            print(
+                f"{count:>7} {layout:>8} | "
+                f"{statistics.median(create_seconds) * 1e6:>8.0f}us {percentile(create_seconds, 99) * 1e6:>6.0f}us | "
+                f"{statistics.median(stat_seconds) * 1e6:>7.0f}us {percentile(stat_seconds, 99) * 1e6:>6.0f}us | "
+                f"{listed} entries in {list_seconds * 1000:.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Size and time of the PDF optimization stage on a folder of sample scans.
+
+Runs the same optimize_pdf used after uploads (recompress + linearize) on
+copies of every PDF in the folder and prints per-file and total savings.
+The sample files themselves are never modified.
+
+Usage (pikepdf installed, run from backend/):
+    python benchmarks/pdf_optimize.py "D:/scans/samples"
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.helper.pdf_optimize import optimization_available, optimize_pdf  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", type=Path, help="Folder with sample PDFs (searched recursively)")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N files")
+    args = parser.parse_args()
+
+    if not optimization_available():
+        parser.error("pikepdf is not installed (pip install pikepdf)")
+
+    files = sorted(args.folder.rglob("*.pdf"))[:args.limit]
+    if not files:
+        parser.error(f"No PDFs under {args.folder}")
+
+    total_original = total_optimized = 0
+    seconds = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for path in files:
+            dest = os.path.join(work_dir, "optimized.pdf")
+            started = time.perf_counter()
+            try:
+                original, optimized = optimize_pdf(str(path), dest)
+            except Exception as e:
+                print(f"{path.name}: failed ({e})")
+                continue
+            elapsed = time.perf_counter() - started
+            seconds.append(elapsed)
+
+            #  Same rule as the upload pipeline: keep the original unless the copy is smaller
+            kept = min(original, optimized)
+            total_original += original
+            total_optimized += kept
+            print(f"{path.name}: {original / 1024:.0f}KB -> {kept / 1024:.0f}KB "
+                  f"({100 * (1 - kept / original):.1f}% saved) in {elapsed:.2f}s")
+
+    if seconds:
+        print(f"{len(seconds)} files: {total_original / 1048576:.1f}MB -> {total_optimized / 1048576:.1f}MB "
+              f"({100 * (1 - total_optimized / total_original):.1f}% saved), "
+              f"median {statistics.median(seconds):.2f}s, slowest {max(seconds):.2f}s per file")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Concurrent PDF uploads vs. concurrent GETs against a running API.
+
+Uploads large files to PATCH /api/committees/{id} while other threads keep
+calling a cheap GET, then prints GET latency with and without upload load.
+If uploads block the event loop, the "under upload load" percentiles explode.
+
+Usage (server already running, committee must exist):
+    python benchmarks/upload_concurrency.py --base-url http://localhost:9000 --committee-id 1
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure_gets(url, stop_event, latencies):
+    with requests.Session() as session:
+        while not stop_event.is_set():
+            started = time.perf_counter()
+            session.get(url, timeout=60).raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+
+def run_gets(url, workers, seconds=None, stop_event=None):
+    stop_event = stop_event or threading.Event()
+    latencies = []
+    threads = [threading.Thread(target=measure_gets, args=(url, stop_event, latencies)) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    if seconds is not None:
+        time.sleep(seconds)
+        stop_event.set()
+    return threads, latencies, stop_event
+
+
+def upload_once(base_url, committee_id, payload):
+    started = time.perf_counter()
+    response = requests.patch(
+        f"{base_url}/api/committees/{committee_id}",
+        data={"notes": "upload benchmark"},
+        files={"file": ("benchmark.pdf", payload, "application/pdf")},
+        timeout=600
+    )
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+def report(label, latencies):
+    if not latencies:
+        print(f"{label}: no requests completed")
+        return
+    print(
+        f"{label}: n={len(latencies)} p50={statistics.median(latencies):.1f}ms "
+        f"p95={percentile(latencies, 95):.1f}ms max={max(latencies):.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:9000")
+    parser.add_argument("--committee-id", type=int, required=True, help="Committee that receives the test PDFs")
+    parser.add_argument("--uploads", type=int, default=16, help="Total uploads")
+    parser.add_argument("--upload-workers", type=int, default=8, help="Uploads in flight at once")
+    parser.add_argument("--size-mb", type=int, default=50, help="Size of each uploaded file")
+    parser.add_argument("--get-workers", type=int, default=4)
+    parser.add_argument("--get-path", default="/api/committees/test-health")
+    args = parser.parse_args()
+
+    get_url = f"{args.base_url}{args.get_path}"
+    payload = b"%PDF-1.4\n" + os.urandom(args.size_mb * 1024 * 1024)
+
+    # Baseline: GET latency with no uploads
+    threads, baseline, _ = run_gets(get_url, args.get_workers, seconds=5)
+    for thread in threads:
+        thread.join()
+
+    # Same GETs while uploads are running
+    threads, loaded, stop_event = run_gets(get_url, args.get_workers)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.upload_workers) as executor:
+        upload_times = list(executor.map(
+            lambda _: upload_once(args.base_url, args.committee_id, payload), range(args.uploads)
+        ))
+    elapsed = time.perf_counter() - started
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+
+    total_mb = args.uploads * args.size_mb
+    print(f"uploads: {args.uploads} x {args.size_mb}MB in {elapsed:.1f}s ({total_mb / elapsed:.1f} MB/s), "
+          f"slowest {max(upload_times):.1f}s")
+    report("GET baseline", baseline)
+    report("GET under upload load", loaded)
+
+
+if __name__ == "__main__":
+    main()
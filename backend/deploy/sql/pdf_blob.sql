@@ -0,0 +1,13 @@
+-- Content-addressed PDF storage (PDF_DEDUP_ENABLED), SQL Server.
+-- create_all only runs with MODE=development; run this once on existing databases.
+
+CREATE TABLE PDFBlob (
+    hash varchar(64) NOT NULL CONSTRAINT PK_PDFBlob PRIMARY KEY,  -- SHA-256 hex of the file bytes
+    path nvarchar(max) NOT NULL,                                  -- Where the single stored copy lives
+    size bigint NULL,
+    refCount int NOT NULL CONSTRAINT DF_PDFBlob_refCount DEFAULT 0,  -- PDFTable rows using this blob
+    createdDate datetime NULL CONSTRAINT DF_PDFBlob_createdDate DEFAULT GETDATE()
+);
+
+ALTER TABLE PDFTable ADD blobHash varchar(64) NULL;
+CREATE INDEX ix_PDFTable_blobHash ON PDFTable (blobHash);
@@ -0,0 +1,39 @@
+import argparse
+import asyncio
+import json
+
+from app.database.database import AsyncSessionLocal
+from app.services.pdfText import PDFTextService
+
+
+async def main(batch_size: int) -> None:
+    def print_batch(report: dict) -> None:
+        print(
+            f"up to id {report['lastId']:>9} | rows {report['rows']:>5} | "
+            f"extracted {report['extracted']:>5} | failed {report['failed']:>4}",
+            flush=True
+        )
+
+    async with AsyncSessionLocal() as db:
+        try:
+            summary = await PDFTextService.backfill(db, batch_size, on_batch=print_batch)
+        finally:
+            PDFTextService.shutdown()
+
+    print(
+        f"Extracted {summary['extracted']} PDFs ({summary['withText']} with a text layer) "
+        f"in {summary['elapsedSeconds']}s"
+    )
+    for failure in summary["failed"]:
+        print(f"  failed  {json.dumps(failure, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract searchable text from PDFs that have none yet (safe to re-run)")
+    parser.add_argument("--batch-size", type=int, default=PDFTextService.BATCH_SIZE, help="PDFs per transaction")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.batch_size))
+
+
+# Git Bash: ./.venv/Scripts/python.exe extract_pdf_text.py
@@ -0,0 +1,56 @@
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from app.database.database import AsyncSessionLocal
+from app.helper.tabular_reader import iter_tabular_rows
+from app.services.archiveImport import ArchiveImportService
+
+
+async def main(path: Path, pdf_dir: Path, user_id: int, checkpoint: Path, chunk_size: int) -> None:
+    def print_progress(progress: dict) -> None:
+        print(
+            f"read {progress['rowsRead']:>7} | committees {progress['committeesCreated']:>7} | "
+            f"pdfs {progress['pdfsCopied']:>7} | members {progress['membersLinked']:>7} | failed {progress['failed']:>5}",
+            flush=True
+        )
+
+    with open(path, "rb") as source:
+        async with AsyncSessionLocal() as db:
+            report = await ArchiveImportService.importArchive(
+                db,
+                iter_tabular_rows(source, path.name),
+                source_name=path.name,
+                pdf_root=pdf_dir,
+                userID=user_id,
+                checkpoint_path=checkpoint,
+                chunk_size=chunk_size,
+                on_progress=print_progress
+            )
+
+    print(f"done in {report['elapsedSeconds']}s")
+    if report["aborted"]:
+        print(f"stopped: {report['aborted']} (run the same command again to resume)")
+    for error in report["errors"]:
+        print(json.dumps(error, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import paper-era committees and their scanned PDFs")
+    parser.add_argument("file", type=Path, help="CSV or XLSX file with one committee per row")
+    parser.add_argument("--pdf-dir", type=Path, required=True, help="Folder tree holding the scanned PDFs")
+    parser.add_argument("--user-id", type=int, required=True, help="userID recorded on imported rows")
+    parser.add_argument("--checkpoint", type=Path, help="Progress file (default: <file>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and import from the first row")
+    parser.add_argument("--chunk-size", type=int, default=ArchiveImportService.CHUNK_SIZE)
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or args.file.with_name(args.file.name + ".checkpoint.json")
+    if args.restart:
+        checkpoint_path.unlink(missing_ok=True)
+
+    asyncio.run(main(args.file, args.pdf_dir, args.user_id, checkpoint_path, args.chunk_size))
+
+
+# Git Bash: ./.venv/Scripts/python.exe import_archive.py archive.xlsx --pdf-dir "D:/scans" --user-id 1
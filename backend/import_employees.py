@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from app.database.database import AsyncSessionLocal
+from app.helper.tabular_reader import iter_tabular_rows
+from app.services.employeeImport import EmployeeImportService
+
+
+async def main(path: Path, chunk_size: int) -> None:
+    def print_progress(progress: dict) -> None:
+        print(
+            f"read {progress['rowsRead']:>7} | inserted {progress['inserted']:>7} | "
+            f"updated {progress['updated']:>7} | unchanged {progress['unchanged']:>7} | failed {progress['failed']:>5}",
+            flush=True
+        )
+
+    with open(path, "rb") as source:
+        async with AsyncSessionLocal() as db:
+            report = await EmployeeImportService.importEmployees(
+                db,
+                iter_tabular_rows(source, path.name),
+                chunk_size=chunk_size,
+                on_progress=print_progress
+            )
+
+    print(f"done in {report['elapsedSeconds']}s")
+    for error in report["errors"]:
+        print(json.dumps(error, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import / refresh the employee table from an HR extract")
+    parser.add_argument("file", type=Path, help="CSV or XLSX file with name, employee_desc, gender columns")
+    parser.add_argument("--chunk-size", type=int, default=EmployeeImportService.CHUNK_SIZE)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.file, args.chunk_size))
+
+
+# Git Bash: ./.venv/Scripts/python.exe import_employees.py employees.xlsx
@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+import json
+
+from app.database.database import AsyncSessionLocal
+from app.services.storageLayout import StorageLayoutService
+
+
+async def main(batch_size: int, dry_run: bool, verbose: bool) -> None:
+    def print_batch(report: dict) -> None:
+        print(
+            f"up to id {report['lastId']:>9} | rows {report['rows']:>5} | moved {report['moved']:>5} | "
+            f"missing {report['missing']:>4} | conflicts {report['conflicts']:>4} | failed {report['failed']:>4}",
+            flush=True
+        )
+
+    async with AsyncSessionLocal() as db:
+        summary = await StorageLayoutService.migrateToSharded(db, batch_size, dry_run, on_batch=print_batch)
+
+    print(
+        f"{'Would move' if dry_run else 'Moved'} {summary['movedCount']} of {summary['rowsScanned']} rows "
+        f"in {summary['elapsedSeconds']}s ({summary['alreadyShardedCount']} already sharded or blobs)"
+    )
+    for key in ("missing", "conflicts", "failed"):
+        if summary[key]:
+            print(f"{key}: {len(summary[key])}")
+            if verbose or key == "failed":
+                for row in summary[key]:
+                    print(f"  {json.dumps(row, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move flat <year>/file.pdf uploads to <year>/<MM>/<ab>/<cd>/ and rewrite PDFTable.pdf"
+    )
+    parser.add_argument("--batch-size", type=int, default=StorageLayoutService.BATCH_SIZE, help="Rows per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would move")
+    parser.add_argument("--verbose", action="store_true", help="List every missing file and conflict")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.batch_size, args.dry_run, args.verbose))
+
+
+# Git Bash: ./.venv/Scripts/python.exe migrate_storage_layout.py --dry-run
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import json
+
+from app.database.database import AsyncSessionLocal
+from app.services.storageReconcile import StorageReconcileService
+
+
+async def main(units, mode: str, pause: float, verbose: bool) -> None:
+    def print_unit(report: dict) -> None:
+        print(
+            f"{report['unit']:>10} | files {report['filesScanned']:>7} | rows {report['rowsChecked']:>7} | "
+            f"orphans {report['orphanCount']:>5} ({report['orphanBytes'] / 1048576:.1f}MB) | "
+            f"missing {report['missingCount']:>5} | {mode} {report['handledCount']:>5} | {report['elapsedSeconds']}s",
+            flush=True
+        )
+        if verbose:
+            for path in report["orphans"]:
+                print(f"  orphan  {path}")
+            for row in report["missing"]:
+                print(f"  missing {json.dumps(row, ensure_ascii=False)}")
+        for failure in report["failed"]:
+            print(f"  failed  {json.dumps(failure, ensure_ascii=False)}")
+
+    async with AsyncSessionLocal() as db:
+        await StorageReconcileService.reconcileAll(db, units, mode, pause_seconds=pause, on_unit=print_unit)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find PDFs without PDFTable rows and rows without files")
+    parser.add_argument("units", nargs="*", help="Year folders / blob shards to check (default: all, one at a time)")
+    parser.add_argument("--mode", choices=StorageReconcileService.MODES, default="report")
+    parser.add_argument("--pause", type=float, default=1.0, help="Seconds to wait between units, keeps disk I/O low")
+    parser.add_argument("--verbose", action="store_true", help="List every orphan and missing file")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.units, args.mode, args.pause, args.verbose))
+
+
+# Git Bash: ./.venv/Scripts/python.exe reconcile_storage.py 2024 --mode quarantine
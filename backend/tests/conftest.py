@@ -0,0 +1,28 @@
+"""
+Shared setup for the backend tests.
+
+Run from backend/:
+    pip install pytest httpx moto boto3
+    python -m pytest tests
+
+Settings are read when app.database.config is first imported, so the upload
+folders point at throwaway temp directories before any app module loads;
+the tests never touch a real PDF archive or database.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ["PDF_UPLOAD_PATH"] = tempfile.mkdtemp(prefix="committees-pdfs-")
+os.environ["PDF_SOURCE_PATH"] = tempfile.mkdtemp(prefix="committees-source-")
+os.environ["PDF_STORAGE_BACKEND"] = "local"
+os.environ["PDF_DELIVERY_MODE"] = "app"
+os.environ.setdefault("DATABASE_SERVER", "localhost")
+os.environ.setdefault("DATABASE_NAME", "committees_test")
+os.environ.setdefault("DATABASE_USER", "test")
+os.environ.setdefault("DATABASE_PASSWORD", "test")
+os.environ.setdefault("MODE", "test")
+os.environ.setdefault("JWT_SECRET", "test")
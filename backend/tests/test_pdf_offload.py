@@ -0,0 +1,162 @@
+"""
+End-to-end check of PDF_DELIVERY_MODE=x-accel / x-sendfile through a stub proxy.
+
+StubProxy plays nginx (deploy/nginx-pdf-offload.conf) or mod_xsendfile: every
+request goes to the API first; when the answer carries X-Accel-Redirect or
+X-Sendfile, the proxy serves that file itself (with Range), otherwise it relays
+the API response. The internal location cannot be requested directly.
+"""
+from pathlib import Path
+from urllib.parse import unquote
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from starlette.responses import FileResponse, PlainTextResponse, Response
+
+from app.database.config import settings
+from app.database.database import get_async_db
+from app.routes.committees import committeesRouter
+from app.services.pdf import PDFService
+
+ACCEL_PREFIX = "/protected-pdfs/"
+PDF_ID = 1
+PDF_BYTES = b"%PDF-1.4\n" + bytes(range(256)) * 64 + b"\n%%EOF\n"
+
+#  Hop-by-hop and body headers the proxy recomputes for the file it serves
+_DROPPED_HEADERS = {"x-accel-redirect", "x-sendfile", "content-length", "transfer-encoding"}
+
+
+class StubProxy:
+    """Minimal nginx / mod_xsendfile stand-in in front of the API (ASGI)."""
+
+    def __init__(self, api: FastAPI, upload_dir: Path):
+        self.api = api
+        self.upload_dir = upload_dir
+        self.offloaded = []
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.api(scope, receive, send)
+
+        request = Request(scope, receive)
+        if request.url.path.startswith(ACCEL_PREFIX):
+            #  nginx "internal;": only reachable through X-Accel-Redirect
+            return await PlainTextResponse("Not Found", status_code=404)(scope, receive, send)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=self.api), base_url="http://api") as client:
+            upstream = await client.request(
+                request.method, request.url.path, params=request.query_params, headers=request.headers.raw
+            )
+
+        target = self._offload_target(upstream.headers)
+        headers = {key: value for key, value in upstream.headers.items() if key.lower() not in _DROPPED_HEADERS}
+        if target is None:
+            response = Response(upstream.content, status_code=upstream.status_code, headers=headers)
+        else:
+            self.offloaded.append(target)
+            #  The proxy handles Range / If-Range against the file, like nginx does for internal redirects
+            response = FileResponse(target, headers=headers, media_type=upstream.headers.get("content-type"))
+        await response(scope, receive, send)
+
+    def _offload_target(self, headers) -> Path:
+        if "x-accel-redirect" in headers:
+            relative = unquote(headers["x-accel-redirect"][len(ACCEL_PREFIX):])
+            return self.upload_dir / relative
+        if "x-sendfile" in headers:
+            return Path(headers["x-sendfile"])
+        return None
+
+
+@pytest.fixture
+def stored_pdf() -> Path:
+    path = Path(settings.PDF_UPLOAD_PATH) / "2025" / "05" / "ab" / "cd" / "7.2025.1-2025-05-04_10-30-00-AM.pdf"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(PDF_BYTES)
+    return path
+
+
+@pytest.fixture
+def api(monkeypatch, stored_pdf) -> FastAPI:
+    async def get_pdf_file_info(db, pdf_id):
+        #  Stands in for the PDFTable lookup: only PDF_ID exists (and may be served)
+        return (str(stored_pdf), None) if pdf_id == PDF_ID else None
+
+    monkeypatch.setattr(PDFService, "get_pdf_file_info", staticmethod(get_pdf_file_info))
+    monkeypatch.setattr(settings, "PDF_ACCEL_PREFIX", ACCEL_PREFIX)
+
+    application = FastAPI()
+    application.include_router(committeesRouter)
+    application.dependency_overrides[get_async_db] = lambda: None
+    return application
+
+
+@pytest.fixture(params=["x-accel", "x-sendfile"])
+def proxy(request, monkeypatch, api) -> TestClient:
+    monkeypatch.setattr(settings, "PDF_DELIVERY_MODE", request.param)
+    return TestClient(StubProxy(api, Path(settings.PDF_UPLOAD_PATH)))
+
+
+def test_api_answers_with_headers_only(monkeypatch, api, stored_pdf):
+    monkeypatch.setattr(settings, "PDF_DELIVERY_MODE", "x-accel")
+    response = TestClient(api).get(f"/api/committees/pdf/file/{PDF_ID}")
+
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["x-accel-redirect"] == ACCEL_PREFIX + "2025/05/ab/cd/7.2025.1-2025-05-04_10-30-00-AM.pdf"
+    assert response.headers["content-type"] == "application/pdf"
+    assert "etag" in response.headers
+
+
+def test_proxy_serves_file_bytes(proxy, stored_pdf):
+    response = proxy.get(f"/api/committees/pdf/file/{PDF_ID}")
+
+    assert response.status_code == 200
+    assert response.content == PDF_BYTES
+    assert response.headers["content-length"] == str(len(PDF_BYTES))
+    assert response.headers["content-type"] == "application/pdf"
+    assert "immutable" in response.headers["cache-control"]
+    assert "x-accel-redirect" not in response.headers
+    assert "x-sendfile" not in response.headers
+    #  The bytes came from the proxy, not from the API streaming the file
+    assert proxy.app.offloaded == [stored_pdf]
+
+
+@pytest.mark.parametrize(
+    "range_header, start, end",
+    [("bytes=0-99", 0, 99), ("bytes=1000-", 1000, len(PDF_BYTES) - 1), ("bytes=-16", len(PDF_BYTES) - 16, len(PDF_BYTES) - 1)],
+)
+def test_proxy_serves_ranges(proxy, range_header, start, end):
+    response = proxy.get(f"/api/committees/pdf/file/{PDF_ID}", headers={"Range": range_header})
+
+    assert response.status_code == 206
+    assert response.content == PDF_BYTES[start:end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(PDF_BYTES)}"
+    assert len(proxy.app.offloaded) == 1
+
+
+def test_proxy_relays_not_modified(proxy):
+    etag = proxy.get(f"/api/committees/pdf/file/{PDF_ID}").headers["etag"]
+    response = proxy.get(f"/api/committees/pdf/file/{PDF_ID}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_unknown_pdf_is_404_without_file(proxy):
+    response = proxy.get(f"/api/committees/pdf/file/{PDF_ID + 1}")
+
+    assert response.status_code == 404
+    assert PDF_BYTES not in response.content
+    assert "x-accel-redirect" not in response.headers
+    assert "x-sendfile" not in response.headers
+    assert proxy.app.offloaded == []
+
+
+def test_internal_location_is_not_reachable(proxy):
+    response = proxy.get(ACCEL_PREFIX + "2025/05/ab/cd/7.2025.1-2025-05-04_10-30-00-AM.pdf")
+
+    assert response.status_code == 404
+    assert response.content != PDF_BYTES
@@ -0,0 +1,72 @@
+"""
+PDFService.locate_pdf_file with a stale per-worker path cache: another worker moved
+the row to a new blob and the old file is gone.
+"""
+import asyncio
+from collections import namedtuple
+from pathlib import Path
+
+import pytest
+
+from app.database.config import settings
+from app.services.pdf import PDFService
+
+Row = namedtuple("Row", "pdf blobHash")
+
+
+class _Result:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class _PDFTable:
+    """The slice of an AsyncSession get_pdf_file_info uses, answering for one PDFTable row."""
+
+    def __init__(self, row):
+        self.row = row
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        return _Result(self.row)
+
+
+@pytest.fixture
+def blob_dir():
+    path = Path(settings.PDF_UPLOAD_PATH) / "blobs" / "cd"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def test_stale_cached_path_is_read_again(blob_dir):
+    new_blob = blob_dir / ("cd" + "0" * 62 + ".pdf")
+    new_blob.write_bytes(b"%PDF-1.4\n%%EOF\n")
+    PDFService.cache_pdf_files([(41, str(blob_dir / ("01" + "0" * 62 + ".pdf")), "01" + "0" * 62)])
+    db = _PDFTable(Row(str(new_blob), "cd" + "0" * 62))
+
+    located, stat_result, blob_hash = asyncio.run(PDFService.locate_pdf_file(db, 41))
+
+    assert located == str(new_blob)
+    assert stat_result.st_size == new_blob.stat().st_size
+    assert blob_hash == "cd" + "0" * 62
+    assert db.queries == 1
+    #  The fresh row is cached again
+    assert asyncio.run(PDFService.locate_pdf_file(db, 41))[0] == str(new_blob)
+    assert db.queries == 1
+
+
+def test_missing_file_after_fresh_read(blob_dir):
+    db = _PDFTable(Row(str(blob_dir / ("02" + "0" * 62 + ".pdf")), "02" + "0" * 62))
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(PDFService.locate_pdf_file(db, 42))
+    assert db.queries == 2
+
+
+def test_unknown_record():
+    db = _PDFTable(None)
+
+    assert asyncio.run(PDFService.locate_pdf_file(db, 43)) is None
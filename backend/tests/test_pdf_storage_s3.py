@@ -0,0 +1,278 @@
+"""
+S3PDFStorage against a moto-mocked bucket: key mapping, put / stat / range /
+delete / list and the flat <-> sharded fallback of rows not yet migrated.
+"""
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from app.database.config import settings
+from app.helper.pdf_storage import S3PDFStorage
+from app.helper.save_pdf import sharded_pdf_path
+
+BUCKET = "committee-pdfs"
+UPLOAD_DIR = Path(settings.PDF_UPLOAD_PATH)
+FILENAME = "7.2025.1-2025-05-04_10-30-00-AM.pdf"
+FLAT_PATH = UPLOAD_DIR / "2025" / FILENAME
+SHARDED_PATH = sharded_pdf_path(UPLOAD_DIR / "2025", FILENAME)
+PDF_BYTES = b"%PDF-1.4\n" + bytes(range(256)) * 40 + b"\n%%EOF\n"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    for name, value in (
+        ("AWS_ACCESS_KEY_ID", "testing"),
+        ("AWS_SECRET_ACCESS_KEY", "testing"),
+        ("AWS_SESSION_TOKEN", "testing"),
+        ("AWS_DEFAULT_REGION", "us-east-1"),
+    ):
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def storage(s3) -> S3PDFStorage:
+    return S3PDFStorage(BUCKET, prefix="/archive/", region="us-east-1")
+
+
+def _put(s3, key: str, body: bytes = PDF_BYTES) -> None:
+    s3.put_object(Bucket=BUCKET, Key=key, Body=body)
+
+
+def _keys(s3):
+    return sorted(item["Key"] for item in s3.list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+
+def _local_file(tmp_path, body: bytes = PDF_BYTES) -> Path:
+    local = tmp_path / "upload.part"
+    local.write_bytes(body)
+    return local
+
+
+# ---------------------------------------------------------------------------
+# key mapping
+# ---------------------------------------------------------------------------
+
+def test_key_maps_upload_path_under_prefix(storage):
+    assert storage.prefix == "archive"
+    assert storage.key(str(FLAT_PATH)) == f"archive/2025/{FILENAME}"
+    assert storage.key(str(UPLOAD_DIR)) == "archive"
+    assert storage.path(f"archive/2025/{FILENAME}") == str(FLAT_PATH)
+
+
+def test_key_without_prefix(s3):
+    storage = S3PDFStorage(BUCKET, region="us-east-1")
+
+    assert storage.key(str(FLAT_PATH)) == f"2025/{FILENAME}"
+    assert storage.key(str(UPLOAD_DIR)) == ""
+    assert storage.path(f"2025/{FILENAME}") == str(FLAT_PATH)
+
+
+def test_key_outside_upload_path_is_not_found(storage):
+    with pytest.raises(FileNotFoundError):
+        storage.key("/srv/legacy/7.2025.1.pdf")
+
+
+# ---------------------------------------------------------------------------
+# put
+# ---------------------------------------------------------------------------
+
+def test_put_file_uploads_and_removes_local_copy(s3, storage, tmp_path):
+    local = _local_file(tmp_path)
+
+    assert storage.put_file(local, str(FLAT_PATH)) == str(FLAT_PATH)
+    assert not local.exists()
+    stored = s3.get_object(Bucket=BUCKET, Key=f"archive/2025/{FILENAME}")
+    assert stored["Body"].read() == PDF_BYTES
+    assert stored["ContentType"] == "application/pdf"
+
+
+def test_put_file_refuses_to_overwrite(s3, storage, tmp_path):
+    _put(s3, f"archive/2025/{FILENAME}", b"original")
+    local = _local_file(tmp_path)
+
+    with pytest.raises(FileExistsError):
+        storage.put_file(local, str(FLAT_PATH))
+    assert local.exists()
+    assert s3.get_object(Bucket=BUCKET, Key=f"archive/2025/{FILENAME}")["Body"].read() == b"original"
+
+    storage.put_file(local, str(FLAT_PATH), overwrite=True)
+    assert s3.get_object(Bucket=BUCKET, Key=f"archive/2025/{FILENAME}")["Body"].read() == PDF_BYTES
+
+
+def test_put_stream(s3, storage, tmp_path):
+    with open(_local_file(tmp_path), "rb") as source:
+        storage.put_stream(source, str(FLAT_PATH))
+
+    assert s3.get_object(Bucket=BUCKET, Key=f"archive/2025/{FILENAME}")["Body"].read() == PDF_BYTES
+
+
+# ---------------------------------------------------------------------------
+# stat
+# ---------------------------------------------------------------------------
+
+def test_stat_synthesizes_stat_result(s3, storage):
+    _put(s3, f"archive/2025/{FILENAME}")
+    last_modified = s3.head_object(Bucket=BUCKET, Key=f"archive/2025/{FILENAME}")["LastModified"]
+
+    located, stat_result = storage.stat(str(FLAT_PATH))
+
+    assert located == str(FLAT_PATH)
+    assert isinstance(stat_result, os.stat_result)
+    assert stat_result.st_size == len(PDF_BYTES)
+    assert isinstance(stat_result.st_mtime, float)
+    assert stat_result.st_mtime == last_modified.timestamp()
+    assert stat_result.st_mtime_ns == int(stat_result.st_mtime * 1e9)
+    assert datetime.fromtimestamp(stat_result.st_mtime, timezone.utc) == last_modified
+
+
+def test_stat_missing_object(storage):
+    with pytest.raises(FileNotFoundError):
+        storage.stat(str(FLAT_PATH))
+
+
+def test_stat_falls_back_to_sharded_layout(s3, storage):
+    _put(s3, storage.key(str(SHARDED_PATH)))
+
+    located, stat_result = storage.stat(str(FLAT_PATH))
+
+    assert located == str(SHARDED_PATH)
+    assert stat_result.st_size == len(PDF_BYTES)
+
+
+def test_stat_falls_back_to_flat_layout(s3, storage):
+    _put(s3, f"archive/2025/{FILENAME}")
+
+    located, _ = storage.stat(str(SHARDED_PATH))
+
+    assert located == str(FLAT_PATH)
+
+
+# ---------------------------------------------------------------------------
+# iter_range
+# ---------------------------------------------------------------------------
+
+def test_iter_range_whole_object(s3, storage):
+    _put(s3, f"archive/2025/{FILENAME}")
+
+    assert b"".join(storage.iter_range(str(FLAT_PATH))) == PDF_BYTES
+
+
+@pytest.mark.parametrize("start, end", [(0, 0), (0, 99), (100, 4095), (len(PDF_BYTES) - 10, len(PDF_BYTES) - 1)])
+def test_iter_range_is_inclusive(s3, storage, start, end):
+    _put(s3, f"archive/2025/{FILENAME}")
+
+    assert b"".join(storage.iter_range(str(FLAT_PATH), start, end)) == PDF_BYTES[start:end + 1]
+
+
+def test_iter_range_open_ended(s3, storage):
+    _put(s3, f"archive/2025/{FILENAME}")
+
+    assert b"".join(storage.iter_range(str(FLAT_PATH), 5000)) == PDF_BYTES[5000:]
+
+
+def test_iter_range_sends_range_header(s3, storage):
+    _put(s3, f"archive/2025/{FILENAME}")
+    sent = []
+    storage.client.meta.events.register(
+        "before-call.s3.GetObject", lambda params, **kwargs: sent.append(params["headers"].get("Range"))
+    )
+
+    list(storage.iter_range(str(FLAT_PATH), 10, 19))
+    list(storage.iter_range(str(FLAT_PATH), 10))
+
+    assert sent == ["bytes=10-19", "bytes=10-"]
+
+
+def test_iter_range_honours_chunk_size(s3, storage):
+    _put(s3, f"archive/2025/{FILENAME}")
+
+    chunks = list(storage.iter_range(str(FLAT_PATH), 0, 999, chunk_size=256))
+
+    assert b"".join(chunks) == PDF_BYTES[:1000]
+    assert all(len(chunk) <= 256 for chunk in chunks)
+    assert len(chunks) >= 4
+
+
+def test_iter_range_missing_object(storage):
+    with pytest.raises(FileNotFoundError):
+        list(storage.iter_range(str(FLAT_PATH)))
+
+
+# ---------------------------------------------------------------------------
+# delete
+# ---------------------------------------------------------------------------
+
+def test_delete(s3, storage):
+    _put(s3, f"archive/2025/{FILENAME}")
+
+    assert storage.delete(str(FLAT_PATH)) is True
+    assert _keys(s3) == []
+    assert storage.delete(str(FLAT_PATH)) is False
+
+
+def test_delete_removes_object_in_other_layout(s3, storage):
+    _put(s3, storage.key(str(SHARDED_PATH)))
+
+    assert storage.delete(str(FLAT_PATH)) is True
+    assert _keys(s3) == []
+
+
+# ---------------------------------------------------------------------------
+# list_prefix
+# ---------------------------------------------------------------------------
+
+def test_list_prefix_stays_inside_prefix(s3, storage):
+    _put(s3, f"archive/2025/{FILENAME}")
+    _put(s3, storage.key(str(SHARDED_PATH)), b"sharded")
+    _put(s3, "archive/20250/not-a-year.pdf")
+    _put(s3, f"other/2025/{FILENAME}")
+
+    listed = {path: size for path, size, _ in storage.list_prefix(str(UPLOAD_DIR / "2025"))}
+
+    assert listed == {str(FLAT_PATH): len(PDF_BYTES), str(SHARDED_PATH): len(b"sharded")}
+
+
+def test_list_prefix_root(s3, storage):
+    _put(s3, f"archive/2025/{FILENAME}")
+    _put(s3, "archive/2024/old.pdf")
+    _put(s3, f"other/2025/{FILENAME}")
+    last_modified = s3.head_object(Bucket=BUCKET, Key=f"archive/2025/{FILENAME}")["LastModified"]
+
+    listed = {path: (size, mtime) for path, size, mtime in storage.list_prefix(str(UPLOAD_DIR))}
+
+    assert set(listed) == {str(FLAT_PATH), str(UPLOAD_DIR / "2024" / "old.pdf")}
+    assert listed[str(FLAT_PATH)] == (len(PDF_BYTES), last_modified.timestamp())
+
+
+def test_list_prefix_without_storage_prefix(s3):
+    storage = S3PDFStorage(BUCKET, region="us-east-1")
+    _put(s3, f"2025/{FILENAME}")
+    _put(s3, "20250/not-a-year.pdf")
+
+    assert [path for path, _, _ in storage.list_prefix(str(UPLOAD_DIR / "2025"))] == [str(FLAT_PATH)]
+    assert len(list(storage.list_prefix(str(UPLOAD_DIR)))) == 2
+
+
+# ---------------------------------------------------------------------------
+# fetch_local
+# ---------------------------------------------------------------------------
+
+def test_fetch_local_downloads_temporary_copy(s3, storage):
+    _put(s3, storage.key(str(SHARDED_PATH)))
+
+    local_path, temporary = storage.fetch_local(str(FLAT_PATH))
+
+    try:
+        assert temporary is True
+        assert Path(local_path).read_bytes() == PDF_BYTES
+    finally:
+        Path(local_path).unlink()
@@ -0,0 +1,105 @@
+"""
+StorageReconcileService.reconcileUnit on a local year folder: rows and files in
+either layout (flat <year>/<name> or sharded <year>/<MM>/<ab>/<cd>/<name>), and on .staging.
+"""
+import asyncio
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from app.database.config import settings
+from app.helper.save_pdf import sharded_pdf_path
+from app.services.storageReconcile import StorageReconcileService
+from app.services.uploadSession import UploadSessionService
+
+YEAR = "2019"
+FILENAME = "7.2019.1-2019-03-04_10-30-00-AM.pdf"
+OLD = time.time() - 7 * 86400
+
+
+class _Rows:
+    """The slice of an AsyncSession reconcileUnit uses: db.stream(stmt).partitions()."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def stream(self, stmt):
+        return self
+
+    async def partitions(self):
+        yield self.rows
+
+
+@pytest.fixture
+def year_dir():
+    path = Path(settings.PDF_UPLOAD_PATH) / YEAR
+    path.mkdir(parents=True, exist_ok=True)
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _write(path: Path, body: bytes = b"%PDF-1.4\n%%EOF\n") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
+    #  os.replace during the layout migration keeps the old mtime: well past the orphan age guard
+    os.utime(path, (OLD, OLD))
+    return path
+
+
+def _reconcile(rows, mode="report"):
+    return asyncio.run(StorageReconcileService.reconcileUnit(_Rows(rows), YEAR, mode))
+
+
+def test_flat_row_with_sharded_file_is_not_orphaned(year_dir):
+    flat = year_dir / FILENAME
+    sharded = _write(sharded_pdf_path(year_dir, FILENAME))
+
+    report = _reconcile([(1, str(flat))], mode="delete")
+
+    assert report["rowsChecked"] == 1
+    assert report["missingCount"] == 0
+    assert report["orphanCount"] == 0
+    assert sharded.exists()
+
+
+def test_sharded_row_with_flat_file_is_not_orphaned(year_dir):
+    flat = _write(year_dir / FILENAME)
+
+    report = _reconcile([(1, str(sharded_pdf_path(year_dir, FILENAME)))], mode="delete")
+
+    assert report["missingCount"] == 0
+    assert report["orphanCount"] == 0
+    assert flat.exists()
+
+
+def test_unreferenced_and_missing_are_still_reported(year_dir):
+    stray = _write(sharded_pdf_path(year_dir, "9.2019.1-2019-06-01_09-00-00-AM.pdf"))
+    gone = year_dir / FILENAME
+
+    report = _reconcile([(1, str(gone))])
+
+    assert report["missing"] == [{"id": 1, "path": str(gone)}]
+    assert report["orphans"] == [str(stray)]
+
+
+def test_staging_keeps_upload_sessions(monkeypatch):
+    monkeypatch.setattr(settings, "PDF_UPLOAD_SESSION_HOURS", 72)
+    staging = Path(settings.PDF_UPLOAD_PATH) / ".staging"
+    session = UploadSessionService.sessionDir() / ("a" * 32)
+    live = [_write(session.with_suffix(".part")), _write(session.with_suffix(".json"), b"{}")]
+    #  Idle for two days: past STAGING_MAX_AGE_SECONDS, still inside the session lifetime
+    for path in live:
+        os.utime(path, (time.time() - 2 * 86400,) * 2)
+    leftover = _write(staging / "0123.part")
+
+    try:
+        report = asyncio.run(StorageReconcileService.reconcileUnit(_Rows([]), ".staging", "delete"))
+
+        assert report["orphans"] == [str(leftover)]
+        assert not leftover.exists()
+        assert all(path.exists() for path in live)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)